@@ -0,0 +1,314 @@
+"""
+Referential integrity check, and optional repair, of roadmaps and lessons.
+
+Two streaming passes, each holding only one --batch-size batch in memory:
+
+1. Roadmaps: the lesson refs and outline entries of each batch are resolved
+   with one $in query on lessons. Reports refs to lessons that don't exist
+   (dangling refs and outline entries) and outlines that are missing or
+   don't list the same lessons as the refs.
+2. Lessons created more than --min-age-minutes ago (a younger one may
+   belong to a roadmap still being written): the owners of each batch are
+   looked up with one $in on the indexed outline.lesson_id. Reports lessons
+   no roadmap references (orphans, e.g. left by a delete that died between
+   its two writes) and referenced lessons that still have no content and
+   nobody generating them (placeholders whose pre-generation was lost with
+   a restart or gave up).
+
+Pass 2 trusts the outlines once pass 1 found them in sync. If it didn't,
+orphan candidates are confirmed against the refs themselves, which scans
+the roadmaps (the refs are not indexed).
+
+With --repair every batch's fixes are one bulk_write: dangling refs and
+outline entries are pulled, out-of-sync outlines rebuilt from the lessons,
+orphans deleted, and stuck placeholders queued as lesson jobs for
+app.worker (deduplicated per lesson, like async lesson generation).
+
+Exits with status 1 if a problem was found and not repaired, so it can run
+as a scheduled check.
+
+Usage (from the backend directory):
+    python -m app.integrity
+    python -m app.integrity --repair
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+# Before the app modules read their settings from the environment
+load_dotenv()
+
+from bson import DBRef, ObjectId
+from pymongo import DeleteMany, UpdateOne
+
+from app.models.job import Job
+from app.models.lesson import Lesson
+from app.models.roadmap import Roadmap
+from app.services.database import connect_mongo
+from app.services.job_queue import enqueue_jobs
+from app.services.lesson_generation import is_generated, CLAIM_TIMEOUT_SECONDS
+from app.services.roadmap_outline import lesson_ref_id, LESSON_OUTLINE_PROJECTION
+
+# Problems reported, in report order
+ISSUES = {
+    "dangling_refs": "lesson refs to missing lessons",
+    "dangling_outline": "outline entries of missing lessons",
+    "outline_out_of_sync": "roadmaps whose outline doesn't match their lessons",
+    "orphaned_lessons": "lessons no roadmap references",
+    "stuck_placeholders": "lessons still without content and not queued for generation",
+}
+
+# Only whether the content is empty is needed, not the content itself
+LESSON_SCAN_PROJECTION = {"lesson": {"$slice": 1}, "generation_claimed_at": 1}
+
+
+class IntegrityScan:
+    def __init__(self, batch_size: int, min_age_minutes: float, repair: bool, samples: int, progress_seconds: float):
+        self.batch_size = batch_size
+        self.min_age = timedelta(minutes=min_age_minutes)
+        self.repair = repair
+        self.samples = samples
+        self.progress_seconds = progress_seconds
+        self.found = dict.fromkeys(ISSUES, 0)
+        self.repaired = dict.fromkeys(ISSUES, 0)
+        # A few example ids per problem; everything else is only counted
+        self.examples = {issue: [] for issue in ISSUES}
+        self.scanned = {"roadmaps": 0, "lessons": 0}
+        # Roadmaps whose outline was out of sync and still is, see check_lessons
+        self.unsynced_outlines = 0
+
+    @property
+    def roadmaps(self):
+        return Roadmap.get_motor_collection()
+
+    @property
+    def lessons(self):
+        return Lesson.get_motor_collection()
+
+    def _found(self, issue: str, count: int, example):
+        if not count:
+            return
+        self.found[issue] += count
+        if len(self.examples[issue]) < self.samples:
+            self.examples[issue].append(str(example))
+
+    async def _stream(self, name, cursor, total, check):
+        """Feed a cursor to check() in batches, printing progress every progress_seconds"""
+        start = last_report = time.monotonic()
+        batch = []
+        async for document in cursor:
+            batch.append(document)
+            if len(batch) == self.batch_size:
+                await check(batch)
+                self.scanned[name] += len(batch)
+                batch = []
+                if time.monotonic() - last_report >= self.progress_seconds:
+                    last_report = time.monotonic()
+                    scanned = self.scanned[name]
+                    found = ", ".join(f"{issue} {count}" for issue, count in self.found.items() if count)
+                    print(f"📈 {scanned}/~{total} {name} ({scanned / (last_report - start):.0f}/s)"
+                          + (f" | {found}" if found else ""))
+        if batch:
+            await check(batch)
+            self.scanned[name] += len(batch)
+
+    async def scan(self):
+        cutoff = datetime.now(timezone.utc) - self.min_age
+        roadmaps_total = await self.roadmaps.estimated_document_count()
+        lessons_total = await self.lessons.estimated_document_count()
+
+        print(f"🔍 Checking the lesson refs of ~{roadmaps_total} roadmaps")
+        await self._stream(
+            "roadmaps",
+            self.roadmaps.find({}, {"lessons": 1, "outline": 1}).batch_size(self.batch_size),
+            roadmaps_total,
+            self.check_roadmaps,
+        )
+
+        print(f"🔍 Checking ~{lessons_total} lessons created before {cutoff:%Y-%m-%d %H:%M} UTC")
+        await self._stream(
+            "lessons",
+            self.lessons.find(
+                {"_id": {"$lt": ObjectId.from_datetime(cutoff)}}, LESSON_SCAN_PROJECTION
+            ).batch_size(self.batch_size),
+            lessons_total,
+            self.check_lessons,
+        )
+
+    async def check_roadmaps(self, batch):
+        """Dangling refs and outline drift of a batch of roadmaps, with one $in on lessons"""
+        lesson_ids = set()
+        for raw_roadmap in batch:
+            lesson_ids.update(lesson_ref_id(lesson_ref) for lesson_ref in raw_roadmap.get("lessons", []))
+            lesson_ids.update(entry.get("lesson_id") for entry in raw_roadmap.get("outline") or [])
+        lesson_ids.discard(None)
+        lessons = {
+            lesson_data["_id"]: lesson_data
+            async for lesson_data in self.lessons.find({"_id": {"$in": list(lesson_ids)}}, LESSON_OUTLINE_PROJECTION)
+        }
+
+        operations = []
+        fixing = dict.fromkeys(("dangling_refs", "dangling_outline", "outline_out_of_sync"), 0)
+        for raw_roadmap in batch:
+            roadmap_id = raw_roadmap["_id"]
+            refs = raw_roadmap.get("lessons", [])
+            outline = raw_roadmap.get("outline")
+            # Unparseable refs are dangling too; they can't resolve to anything
+            dangling = [lesson_ref for lesson_ref in refs if lesson_ref_id(lesson_ref) not in lessons]
+            live_ids = [lesson_ref_id(lesson_ref) for lesson_ref in refs if lesson_ref_id(lesson_ref) in lessons]
+            dangling_outline = [entry.get("lesson_id") for entry in outline or [] if entry.get("lesson_id") not in lessons]
+            in_sync = outline is not None and (
+                set(live_ids) == {entry["lesson_id"] for entry in outline if entry.get("lesson_id") in lessons}
+            )
+
+            self._found("dangling_refs", len(dangling), roadmap_id)
+            self._found("dangling_outline", len(dangling_outline), roadmap_id)
+            if not in_sync:
+                self._found("outline_out_of_sync", 1, roadmap_id)
+                self.unsynced_outlines += 1
+            if not self.repair or (in_sync and not dangling and not dangling_outline):
+                continue
+            fixing["dangling_refs"] += len(dangling)
+            fixing["dangling_outline"] += len(dangling_outline)
+            fixing["outline_out_of_sync"] += not in_sync
+
+            if in_sync:
+                pull = {"lessons": {"$in": dangling}} if dangling else {}
+                if dangling_outline:
+                    pull["outline"] = {"lesson_id": {"$in": dangling_outline}}
+                operations.append(UpdateOne({"_id": roadmap_id}, {"$pull": pull}))
+                continue
+
+            # Rebuilt from the lessons, which also drops the dangling entries. Only
+            # if the outline is still the one read, so a concurrent update wins
+            rebuilt = sorted(
+                (
+                    {
+                        "lesson_id": lesson_id,
+                        "day": lessons[lesson_id].get("day", 0),
+                        "title": lessons[lesson_id].get("title", "Untitled"),
+                        "summary": lessons[lesson_id].get("summary", ""),
+                        "completed": lessons[lesson_id].get("completed", False),
+                    }
+                    for lesson_id in dict.fromkeys(live_ids)
+                ),
+                key=lambda entry: entry["day"]
+            )
+            update = {"$set": {"outline": rebuilt}}
+            if dangling:
+                update["$pull"] = {"lessons": {"$in": dangling}}
+            operations.append(UpdateOne(
+                {"_id": roadmap_id, "outline": outline if outline is not None else {"$exists": False}}, update
+            ))
+
+        if not operations:
+            return
+        result = await self.roadmaps.bulk_write(operations, ordered=False)
+        if result.modified_count < len(operations):
+            # Some guarded update lost a race; count none of the batch as repaired
+            print("⚠️ Some roadmaps changed while being repaired; run the check again")
+            return
+        for issue, count in fixing.items():
+            self.repaired[issue] += count
+        self.unsynced_outlines -= fixing["outline_out_of_sync"]
+
+    async def check_lessons(self, batch):
+        """Orphans and stuck placeholders of a batch of lessons, with one $in on outline.lesson_id"""
+        lesson_ids = [lesson_data["_id"] for lesson_data in batch]
+        owned = set()
+        async for raw_roadmap in self.roadmaps.find({"outline.lesson_id": {"$in": lesson_ids}}, {"outline.lesson_id": 1}):
+            owned.update(entry["lesson_id"] for entry in raw_roadmap["outline"])
+
+        orphans = [lesson_id for lesson_id in lesson_ids if lesson_id not in owned]
+        if orphans and self.unsynced_outlines:
+            # Some outline may be missing a lesson its refs still point to
+            async for raw_roadmap in self.roadmaps.find(
+                {"$or": [
+                    {"lessons.$id": {"$in": orphans}},
+                    {"lessons": {"$in": orphans + [DBRef("lessons", lesson_id) for lesson_id in orphans]}},
+                ]},
+                {"lessons": 1}
+            ):
+                owned.update(lesson_ref_id(lesson_ref) for lesson_ref in raw_roadmap["lessons"])
+            orphans = [lesson_id for lesson_id in orphans if lesson_id not in owned]
+        for lesson_id in orphans:
+            self._found("orphaned_lessons", 1, lesson_id)
+
+        claim_cutoff = datetime.now(timezone.utc) - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)
+        stuck = [
+            lesson_data["_id"] for lesson_data in batch
+            if lesson_data["_id"] in owned and not is_generated(lesson_data)
+            and not _claimed_since(lesson_data.get("generation_claimed_at"), claim_cutoff)
+        ]
+        if stuck:
+            # Lessons with a job waiting for a worker are taken care of
+            queued = {
+                job["active_key"]
+                async for job in Job.get_motor_collection().find(
+                    {"active_key": {"$in": [f"lesson:{lesson_id}" for lesson_id in stuck]}}, {"active_key": 1}
+                )
+            }
+            stuck = [lesson_id for lesson_id in stuck if f"lesson:{lesson_id}" not in queued]
+        for lesson_id in stuck:
+            self._found("stuck_placeholders", 1, lesson_id)
+
+        if not self.repair:
+            return
+        if orphans:
+            result = await self.lessons.bulk_write([DeleteMany({"_id": {"$in": orphans}})])
+            self.repaired["orphaned_lessons"] += result.deleted_count
+        if stuck:
+            self.repaired["stuck_placeholders"] += await enqueue_jobs(
+                "lesson", {str(lesson_id): {"lesson_id": lesson_id} for lesson_id in stuck}
+            )
+
+    def report(self) -> bool:
+        """Print the findings; True if everything found was repaired"""
+        print(f"\n📊 Scanned {self.scanned['roadmaps']} roadmaps and {self.scanned['lessons']} lessons")
+        for issue, description in ISSUES.items():
+            found = self.found[issue]
+            line = f"  {'✗' if found else '✓'} {found} {description}"
+            if self.repair and found:
+                line += f" ({self.repaired[issue]} repaired)"
+            print(line)
+            if self.examples[issue]:
+                print(f"      e.g. {', '.join(self.examples[issue])}")
+        if self.repair and self.repaired["stuck_placeholders"]:
+            print(f"🛠️ Queued {self.repaired['stuck_placeholders']} lesson generations; run `python -m app.worker` to process them")
+        return all(self.repaired[issue] >= self.found[issue] for issue in ISSUES)
+
+
+def _claimed_since(claimed_at, cutoff) -> bool:
+    if claimed_at is None:
+        return False
+    if claimed_at.tzinfo is None:
+        # Motor returns naive UTC datetimes unless tz_aware is set
+        claimed_at = claimed_at.replace(tzinfo=timezone.utc)
+    return claimed_at >= cutoff
+
+
+async def check(args) -> bool:
+    client, _ = await connect_mongo()
+    try:
+        scan = IntegrityScan(args.batch_size, args.min_age_minutes, args.repair, args.samples, args.progress_seconds)
+        await scan.scan()
+        return scan.report()
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repair", action="store_true", help="Fix what is found instead of only reporting it")
+    parser.add_argument("--batch-size", type=int, default=500, help="Documents per $in lookup and bulk write")
+    parser.add_argument("--min-age-minutes", type=float, default=30,
+                        help="Skip lessons younger than this in the orphan and placeholder checks")
+    parser.add_argument("--samples", type=int, default=5, help="Example ids printed per problem")
+    parser.add_argument("--progress-seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(check(args)) else 1)
@@ -1,25 +1,46 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-import motor.motor_asyncio
-from beanie import init_beanie
+import asyncio
 import os
 import ssl
-import certifi
+import time
 from dotenv import load_dotenv
 
+# Load environment variables before the app modules read their settings
+load_dotenv()
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
 # Use relative imports instead of absolute imports
-from .models.lesson import Lesson
-from .models.roadmap import Roadmap
-from .routes import lesson_routes, roadmap_routes
+from .routes import lesson_routes, roadmap_routes, job_routes, debug_routes, test_apis
+from .services.database import connect_mongo, ensure_indexes
+from .services.pregeneration import pregeneration_pool, PREGENERATE_LESSONS
+from .services import gemini_service
+from .services.topic_index import topic_index
+from .services.metrics import registry, MetricsMiddleware, mongo_listener
+from .services.llm_gateway import openai_gateway, gemini_gateway
+from .services.cache_service import generation_cache
+from .services.response_cache import response_cache
+from .services.shared_store import shared_store
+from .services.chatgpt_service import hedging_stats
+from .services.structured_output import structured_output_stats
+from .services.tracing import TRACING_ENABLED, TracingMiddleware, mongo_trace_listener
+from .services.serialization import FastJSONResponse
+from .services.job_queue import JobWorker, job_waiters
+from .services.generation_jobs import JOB_HANDLERS
 
-# Load environment variables
-load_dotenv()
+# Generation jobs normally run in `python -m app.worker` processes; this runs
+# a worker inside the API process instead (handy for local development)
+JOB_WORKER_INLINE = os.getenv("JOB_WORKER_INLINE", "false").lower() == "true"
+inline_job_worker = JobWorker(JOB_HANDLERS) if JOB_WORKER_INLINE else None
 
 # Create FastAPI application
 app = FastAPI(
     title="DinoLearn API",
     description="API for the DinoLearn educational platform",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson, with ObjectIds encoded as strings
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -29,38 +50,79 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Cloned-From", "X-Trace-Id", "Location"],
 )
 
+# Opt-in request tracing; nothing is installed unless TRACING=on
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+# Added last, so it is the outermost middleware and the recorded latency
+# covers CORS, tracing and error handling too
+app.add_middleware(MetricsMiddleware)
+
+# In-process component stats exported next to the request metrics
+registry.register_stats("openai_gateway", openai_gateway.stats)
+registry.register_stats("gemini_gateway", gemini_gateway.stats)
+registry.register_stats("gemini_pool", gemini_service.get_pool_stats)
+registry.register_stats("generation_cache", generation_cache.stats)
+registry.register_stats("response_cache", response_cache.stats)
+if shared_store:
+    registry.register_stats("shared_cache", shared_store.stats)
+registry.register_stats("pregeneration", pregeneration_pool.stats)
+registry.register_stats("topic_index", topic_index.stats)
+registry.register_stats("hedging", hedging_stats)
+registry.register_stats("structured_output", structured_output_stats)
+registry.register_stats("job_waiters", job_waiters.stats)
+if inline_job_worker:
+    registry.register_stats("job_worker", inline_job_worker.stats)
+
 # MongoDB connection setup
 @app.on_event("startup")
 async def startup_db_client():
-    # Get MongoDB URI from environment variable
-    mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-    app.mongodb_client = motor.motor_asyncio.AsyncIOMotorClient(
-        mongo_uri,
-        tlsCAFile=certifi.where()
-    )
-    
-    # Extract database name from connection string or use default
-    if "mongodb+srv://" in mongo_uri and "mongodb.net" in mongo_uri:
-        # For MongoDB Atlas connections, use the same database as connection
-        app.mongodb = app.mongodb_client.get_database("dinolearn")
-    else:
-        # For local connections, use dinolearn_db
-        app.mongodb = app.mongodb_client.dinolearn_db
-    
-    # Initialize Beanie with our document models
-    await init_beanie(
-        database=app.mongodb,
-        document_models=[Lesson, Roadmap]
+    app.state.started_at = time.perf_counter()
+    app.state.ready = False
+
+    # Beanie only; nothing here waits on Mongo, so the server starts
+    # accepting connections straight away
+    app.mongodb_client, app.mongodb = await connect_mongo(
+        [mongo_listener] + ([mongo_trace_listener] if TRACING_ENABLED else []),
+        create_indexes=False
     )
-    
-    # Log connection info (hide password)
-    safe_uri = mongo_uri.split('@')[1] if '@' in mongo_uri else mongo_uri
-    print(f"Connected to MongoDB at: {safe_uri}")
+
+    # Background lesson pre-generation needs Beanie to be ready
+    if PREGENERATE_LESSONS:
+        pregeneration_pool.start()
+
+    if inline_job_worker:
+        inline_job_worker.start()
+
+    if shared_store:
+        await shared_store.open()
+
+    app.state.warm_up = asyncio.create_task(warm_up())
+
+async def warm_up():
+    """Create indexes and build the topic index, then report ready on /ready"""
+    try:
+        # Similarity index used to reuse roadmaps for near-duplicate topics
+        await asyncio.gather(ensure_indexes(), topic_index.build())
+        app.state.ready = True
+        app.state.ready_after = time.perf_counter() - app.state.started_at
+        print(f"✅ Ready after {app.state.ready_after:.2f}s")
+    except Exception as e:
+        # Stay unready so the orchestrator restarts or keeps routing around us
+        print(f"❌ Warm-up failed: {str(e)}")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.warm_up.cancel()
+    if inline_job_worker:
+        await inline_job_worker.stop()
+    await pregeneration_pool.stop()
+    await gemini_service.close_http_client()
+    if shared_store:
+        shared_store.close()
     app.mongodb_client.close()
     print("MongoDB connection closed")
 
@@ -77,16 +139,34 @@ app.include_router(
     tags=["lessons"]
 )
 
+app.include_router(
+    job_routes.router,
+    prefix="/api/jobs",
+    tags=["jobs"]
+)
+
+app.include_router(test_apis.router, tags=["testing"])
+
+if TRACING_ENABLED:
+    app.include_router(debug_routes.router, prefix="/debug", tags=["debug"])
+
 # Root endpoint
 @app.get("/")
 async def root():
     return {"message": "Welcome to DinoLearn API. Visit /docs for API documentation."}
 
-from app.routes import test_apis
-app.include_router(test_apis.router, tags=["testing"])
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    """Readiness probe: 200 once Beanie is initialized and the indexes exist, 503 until then"""
+    if not app.state.ready:
+        return FastJSONResponse({"ready": False}, status_code=503)
+    return {"ready": True, "startup_seconds": round(app.state.ready_after, 3)}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
-from app.routes import lesson_routes
-app.include_router(lesson_routes.router, prefix="/api/lessons", tags=["lessons"])
 
 
 # Run the application 
@@ -0,0 +1,77 @@
+"""
+Backfill the embedded lesson outline on roadmaps created before it existed.
+
+Streams roadmaps that have no `outline` field in batches, resolves each
+batch's lessons with one $in query and writes the outlines with one
+bulk_write per batch. Safe to re-run; already migrated roadmaps are skipped.
+
+Usage (from the backend directory):
+    python -m app.migrate_outline
+"""
+
+import asyncio
+
+from dotenv import load_dotenv
+
+# Before the app modules read their settings from the environment
+load_dotenv()
+
+from pymongo import UpdateOne
+
+from app.models.roadmap import Roadmap
+from app.services.database import connect_mongo
+from app.services.roadmap_outline import fetch_lesson_outlines
+
+# Roadmaps backfilled per $in query and bulk_write
+BATCH_SIZE = 100
+
+
+async def backfill_batch(batch):
+    lessons_by_roadmap = await fetch_lesson_outlines(batch)
+    operations = []
+    for raw_roadmap in batch:
+        outline = [
+            {
+                "lesson_id": lesson["_id"],
+                "day": lesson.get("day", 0),
+                "title": lesson.get("title", "Untitled"),
+                "summary": lesson.get("summary", ""),
+                "completed": lesson.get("completed", False),
+            }
+            for lesson in lessons_by_roadmap[raw_roadmap["_id"]]
+        ]
+        # Guard on the field still missing so a concurrent write isn't clobbered
+        operations.append(UpdateOne(
+            {"_id": raw_roadmap["_id"], "outline": {"$exists": False}},
+            {"$set": {"outline": outline}}
+        ))
+
+    result = await Roadmap.get_motor_collection().bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+async def migrate():
+    # Same connection and database as the app, without creating indexes
+    client, _ = await connect_mongo(create_indexes=False)
+
+    cursor = Roadmap.get_motor_collection().find(
+        {"outline": {"$exists": False}}, {"lessons": 1}
+    ).batch_size(BATCH_SIZE)
+
+    migrated = 0
+    batch = []
+    async for raw_roadmap in cursor:
+        batch.append(raw_roadmap)
+        if len(batch) == BATCH_SIZE:
+            migrated += await backfill_batch(batch)
+            batch = []
+            print(f"  Backfilled {migrated} roadmaps...")
+    if batch:
+        migrated += await backfill_batch(batch)
+
+    print(f"Backfilled outline on {migrated} roadmaps")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,22 @@
+import os
+from datetime import datetime, timezone
+from typing import Any
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+
+# How long persisted generations are kept before Mongo's TTL monitor removes them
+PERSIST_TTL_SECONDS = int(os.getenv("LLM_CACHE_PERSIST_TTL_SECONDS", 30 * 24 * 3600))
+
+class GenerationCache(Document):
+    key: str
+    model: str
+    value: Any
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "llm_cache"
+        indexes = [
+            IndexModel([("key", ASCENDING)], unique=True),
+            IndexModel([("created_at", ASCENDING)], expireAfterSeconds=PERSIST_TTL_SECONDS),
+        ]
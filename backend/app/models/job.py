@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+
+# queued -> running -> succeeded | failed (permanent error) | dead (out of attempts).
+# A running job whose lease expires is claimable again, like a queued one.
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "dead")
+JOB_FINISHED_STATUSES = ("succeeded", "failed", "dead")
+
+class Job(Document):
+    """A generation job; written and claimed with raw Motor updates by app.services.job_queue"""
+    kind: str
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    status: str = "queued"
+    attempts: int = 0
+    max_attempts: int = 3
+    # Not claimable before this (retry backoff)
+    available_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # Set while running; the lease is renewed by the worker's heartbeat
+    lease_token: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    # Set while queued or running, so an equivalent job isn't enqueued twice
+    active_key: Optional[str] = None
+    # The job's active_key, kept after it finishes so a retry can dedupe again
+    dedupe_key: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # Finished jobs are removed by Mongo's TTL monitor; dead jobs are kept
+    expires_at: Optional[datetime] = None
+
+    class Settings:
+        name = "jobs"
+
+        # Created by init_beanie at startup
+        indexes = [
+            # Claiming the oldest available queued job
+            IndexModel([("status", ASCENDING), ("available_at", ASCENDING)], name="status_available_at"),
+            # Reclaiming running jobs whose lease expired
+            IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease_expires_at"),
+            IndexModel(
+                [("active_key", ASCENDING)], name="active_key", unique=True,
+                partialFilterExpression={"active_key": {"$type": "string"}}
+            ),
+            IndexModel([("expires_at", ASCENDING)], name="expires_at", expireAfterSeconds=0),
+        ]
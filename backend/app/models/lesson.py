@@ -1,13 +1,20 @@
 from typing import List, Optional
 from beanie import Document
 from pydantic import Field
+from pymongo import IndexModel, ASCENDING
 
 class Lesson(Document):
     day: int
     title: str
     summary: str
     lesson: List[dict]
-    completed: bool
+    quiz: List[dict] = Field(default_factory=list)
+    completed: bool = False
     
     class Settings:
-        name = "lessons"
\ No newline at end of file
+        name = "lessons"
+
+        # Created by init_beanie at startup
+        indexes = [
+            IndexModel([("day", ASCENDING), ("title", ASCENDING)], name="day_title"),
+        ]
\ No newline at end of file
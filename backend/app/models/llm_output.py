@@ -0,0 +1,61 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+# Shapes the LLMs are asked to return. Generated JSON is validated against
+# these before it is cached or stored, and they double as the response
+# schemas sent to the providers.
+
+class LessonSection(BaseModel):
+    section: str
+    content: str
+
+class QuizQuestion(BaseModel):
+    question: str
+    options: List[str] = Field(min_length=2)
+    answer: str
+
+class LessonContent(BaseModel):
+    day: Optional[int] = None
+    title: Optional[str] = None
+    summary: str
+    lesson: List[LessonSection] = Field(min_length=1)
+    quiz: List[QuizQuestion] = Field(default_factory=list)
+
+class Prequiz(BaseModel):
+    prequiz: List[QuizQuestion] = Field(min_length=1)
+
+class RoadmapDay(BaseModel):
+    day: int
+    title: str = Field(min_length=1)
+
+class RoadmapPlan(BaseModel):
+    topic: str
+    roadmap: List[RoadmapDay] = Field(min_length=1)
+
+# Keys of the OpenAPI subset Gemini accepts in generationConfig.responseSchema
+GEMINI_SCHEMA_KEYS = {"type", "properties", "required", "items", "enum", "nullable", "description"}
+
+def gemini_schema(model: type) -> dict:
+    """Convert a model's JSON schema to the form Gemini's responseSchema expects"""
+    schema = model.model_json_schema()
+    definitions = schema.get("$defs", {})
+
+    def convert(node):
+        if "$ref" in node:
+            return convert(definitions[node["$ref"].split("/")[-1]])
+        if "anyOf" in node:
+            # Optional[X] is anyOf [X, null]
+            options = [option for option in node["anyOf"] if option.get("type") != "null"]
+            return {**convert(options[0]), "nullable": True}
+        converted = {key: value for key, value in node.items() if key in GEMINI_SCHEMA_KEYS}
+        if "type" in converted:
+            converted["type"] = converted["type"].upper()
+        if "properties" in converted:
+            converted["properties"] = {
+                name: convert(child) for name, child in converted["properties"].items()
+            }
+        if "items" in converted:
+            converted["items"] = convert(converted["items"])
+        return converted
+
+    return convert(schema)
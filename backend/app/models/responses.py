@@ -0,0 +1,67 @@
+from datetime import datetime
+from typing import Any, List, Optional
+from pydantic import BaseModel, Field
+
+# Response shapes of the roadmap, lesson and job endpoints. They document the API
+# in OpenAPI only: handlers build plain dicts (or return raw Mongo documents)
+# and serialize them with orjson, so nothing is validated on the way out.
+
+class RoadmapItemOut(BaseModel):
+    day: int
+    title: str
+    summary: str = ""
+    id: Optional[str] = Field(None, alias="_id", description="Only on GET /api/roadmaps/{id}")
+
+class RoadmapDataOut(BaseModel):
+    topic: str
+    roadmap: List[RoadmapItemOut]
+
+class RoadmapOut(BaseModel):
+    id: str = Field(alias="_id")
+    title: str
+    roadmap_data: RoadmapDataOut
+
+class LessonOut(BaseModel):
+    id: str = Field(alias="_id")
+    day: int
+    title: str
+    summary: str
+    lesson: List[dict]
+    quiz: List[dict] = Field(default_factory=list)
+    completed: bool = False
+
+class LessonOutlineOut(BaseModel):
+    lesson_id: str
+    day: int
+    title: str
+    summary: str = ""
+    completed: bool = False
+
+class SimilarRoadmapOut(BaseModel):
+    id: str = Field(alias="_id")
+    topic: str
+    similarity: float
+
+class CreatedRoadmapOut(RoadmapOut):
+    lessons: List[LessonOut]
+    outline: List[LessonOutlineOut]
+    similar: Optional[SimilarRoadmapOut] = Field(
+        None, description="An existing roadmap similar enough to clone instead (with clone_from); absent when none"
+    )
+
+class JobAcceptedOut(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+class JobOut(BaseModel):
+    id: str = Field(alias="_id")
+    kind: str
+    status: str = Field(description="queued, running, succeeded, failed or dead")
+    attempts: int
+    max_attempts: int
+    result: Optional[Any] = Field(None, description="The response body the synchronous endpoint would have returned")
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
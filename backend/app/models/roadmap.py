@@ -1,11 +1,23 @@
 from typing import List, Optional, Dict, Any
-from beanie import Document, Link
-from pydantic import Field, computed_field
+from beanie import Document, Link, PydanticObjectId
+from pydantic import BaseModel, Field, computed_field
+from pymongo import IndexModel, ASCENDING, TEXT
 from app.models.lesson import Lesson
 
+class LessonOutline(BaseModel):
+    """Denormalized copy of a lesson's list fields, embedded in its roadmap"""
+    lesson_id: PydanticObjectId
+    day: int
+    title: str
+    summary: str = ""
+    completed: bool = False
+
 class Roadmap(Document):
     title: str = ""
     lessons: List[Link[Lesson]] = Field(default_factory=list)
+    # Kept in sync by create_roadmap, lesson generation and complete_lesson,
+    # so reading a roadmap never has to dereference its lessons
+    outline: List[LessonOutline] = Field(default_factory=list)
     
     @computed_field
     def roadmap_data(self) -> Dict[str, Any]:
@@ -14,8 +26,11 @@ class Roadmap(Document):
         topic = title.replace(" Roadmap", "").strip() or "Untitled Topic"
         roadmap_items = []
         
+        if getattr(self, "outline", None):
+            roadmap_items = [{"day": item.day, "title": item.title} for item in self.outline]
+
         # Convert lessons to roadmap items with day and title
-        if hasattr(self, "lessons") and self.lessons:
+        elif hasattr(self, "lessons") and self.lessons:
             for lesson in self.lessons:
                 try:
                     if hasattr(lesson, "day") and hasattr(lesson, "title"):
@@ -34,6 +49,16 @@ class Roadmap(Document):
     
     class Settings:
         name = "roadmaps"
+
+        # Created by init_beanie at startup
+        indexes = [
+            # (title, _id) keyset pagination of GET /api/roadmaps
+            IndexModel([("title", ASCENDING), ("_id", ASCENDING)], name="title_id"),
+            # Case-insensitive word search on GET /api/roadmaps?title=...
+            IndexModel([("title", TEXT)], name="title_text"),
+            # Positional outline updates when a lesson is generated or completed
+            IndexModel([("outline.lesson_id", ASCENDING)], name="outline_lesson_id"),
+        ]
         
         # Customize the serialization to include computed fields
         model_dump_config = {
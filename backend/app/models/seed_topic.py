@@ -0,0 +1,32 @@
+from datetime import datetime, timezone
+from typing import Optional
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+
+# pending -> roadmap (roadmap and placeholder lessons stored) -> done (every lesson generated).
+# A failed attempt leaves the status where it was and records the error.
+SEED_STATUSES = ("pending", "roadmap", "done")
+
+class SeedTopic(Document):
+    """Checkpoint of one topic of a seeding run; written with raw Motor bulk writes by app.seed"""
+    run: str
+    topic: str
+    status: str = "pending"
+    # Assigned just before the roadmap is inserted, so a resumed run can tell
+    # whether an interrupted write went through
+    roadmap_id: Optional[PydanticObjectId] = None
+    lessons_total: int = 0
+    lessons_done: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "seed_topics"
+
+        indexes = [
+            IndexModel([("run", ASCENDING), ("topic", ASCENDING)], name="run_topic", unique=True),
+            IndexModel([("run", ASCENDING), ("status", ASCENDING)], name="run_status"),
+        ]
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.services.tracing import trace_buffer, folded_stacks
+
+router = APIRouter()
+
+@router.get("/traces")
+async def list_traces():
+    """Recently traced requests, newest first"""
+    return {"traces": trace_buffer.summaries()}
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str, format: Optional[str] = None):
+    """
+    A recorded trace as a span tree, or with `format=folded` as folded
+    stacks for flamegraph.pl / speedscope
+    """
+    trace = trace_buffer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found (it may have been evicted)")
+    if format == "folded":
+        return PlainTextResponse(folded_stacks(trace))
+    return trace
@@ -0,0 +1,78 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import Annotated
+from bson import ObjectId
+from app.models.responses import JobOut
+from app.services.job_queue import (
+    get_job,
+    wait_for_job,
+    retry_job,
+    job_counts,
+    job_waiters,
+    JOB_WAIT_MAX_SECONDS,
+)
+from app.services.serialization import FastJSONResponse
+
+router = APIRouter()
+
+
+def parse_job_id(job_id: str) -> ObjectId:
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Job id must be a valid ObjectId"
+        )
+    return ObjectId(job_id)
+
+
+@router.get("/stats")
+async def get_job_stats():
+    """Jobs per status (including dead letters) and long-poll waiters in this process"""
+    try:
+        return {"jobs": await job_counts(), "waiters": job_waiters.stats()}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving job stats: {str(e)}"
+        )
+
+@router.get("/{job_id}", response_model=None, responses={200: {"model": JobOut}})
+async def get_job_status(
+    job_id: str,
+    wait: Annotated[float, Query(ge=0, le=JOB_WAIT_MAX_SECONDS)] = 0,
+):
+    """
+    Status of a generation job, with its result once it has succeeded.
+    With `wait=N` the request is held for up to N seconds and answered as
+    soon as the job finishes.
+    """
+    job_obj_id = parse_job_id(job_id)
+    try:
+        job = await wait_for_job(job_obj_id, wait) if wait else await get_job(job_obj_id)
+    except Exception as e:
+        print(f"❌ Failed to fetch job: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving job: {str(e)}"
+        )
+
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID {job_id} not found"
+        )
+    return FastJSONResponse(job)
+
+@router.post("/{job_id}/retry")
+async def retry_failed_job(job_id: str):
+    """Queue a failed or dead-lettered job again"""
+    job_obj_id = parse_job_id(job_id)
+    queued_id = await retry_job(job_obj_id)
+    if queued_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job with ID {job_id} does not exist or has not failed"
+        )
+    if queued_id != job_obj_id:
+        # The same work was enqueued again while this job was finished
+        return {"message": f"Job {queued_id} is already doing this work", "status_url": f"/api/jobs/{queued_id}"}
+    return {"message": f"Job {job_id} queued again 🔁", "status_url": f"/api/jobs/{job_id}"}
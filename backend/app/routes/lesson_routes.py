@@ -1,9 +1,50 @@
-from fastapi import APIRouter, HTTPException, Body, status
+from fastapi import APIRouter, HTTPException, Body, status, Header, Query
+from typing import Optional, Annotated, List
 from app.models.lesson import Lesson
-from app.services.chatgpt_service import generate_lesson_plan_and_quiz
+from app.services.lesson_generation import get_or_generate_lesson, stream_lesson, is_generated, LessonNotFound
+from app.services.roadmap_outline import update_outline, update_outlines
+from app.services.response_cache import response_cache
+from app.services.hedging import LatencyBudgetExceeded
+from app.services.serialization import FastJSONResponse, dumps
+from app.models.responses import LessonOut, JobAcceptedOut
+from app.services.job_queue import enqueue_job, accepted_response
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
 
 router = APIRouter()
+
+@router.post("/complete")
+async def complete_lessons(ids: List[str] = Body(..., embed=True)):
+    """Mark many lessons as completed in one request"""
+    try:
+        lesson_obj_ids = [ObjectId(id) for id in ids]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="All lesson ids must be valid ObjectIds"
+        )
+
+    try:
+        result = await Lesson.get_motor_collection().update_many(
+            {"_id": {"$in": lesson_obj_ids}},
+            {"$set": {"completed": True}}
+        )
+        await update_outlines(lesson_obj_ids, completed=True)
+        for lesson_obj_id in lesson_obj_ids:
+            response_cache.invalidate_lesson(lesson_obj_id)
+
+        return {
+            "message": f"{result.matched_count} lessons marked as completed ✅",
+            "requested": len(lesson_obj_ids),
+            "matched": result.matched_count
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error completing lessons: {str(e)}"
+        )
+
 @router.post("/complete/{id}")
 async def complete_lesson(id: str):
     try:
@@ -21,49 +62,49 @@ async def complete_lesson(id: str):
                 detail=f"Lesson with ID {id} not found"
             )
 
+        await update_outline(lesson_obj_id, completed=True)
+        response_cache.invalidate_lesson(lesson_obj_id)
+
         return {"message": f"Lesson {id} marked as completed ✅"}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error completing lesson: {str(e)}"
         )
-@router.post("/generate/{id}")
-async def generate_lesson_by_id(id: str):
+@router.post(
+    "/generate/{id}", response_model=None,
+    responses={200: {"model": LessonOut}, 202: {"model": JobAcceptedOut}}
+)
+async def generate_lesson_by_id(id: str, async_job: bool = Query(False, alias="async")):
     """
-    Generate detailed content for a specific lesson by ObjectId
+    Generate detailed content for a specific lesson by ObjectId.
+    Concurrent requests for the same lesson share one generation.
+
+    With `async=true` an already generated lesson is returned as usual;
+    otherwise the generation is queued for a job worker and the response is
+    202 with the job to poll at GET /api/jobs/{id}. Requests for a lesson
+    that is already queued get the same job.
     """
     try:
         lesson_id = ObjectId(id)
-        lesson_collection = Lesson.get_motor_collection()
-
-        lesson_data = await lesson_collection.find_one({"_id": lesson_id})
-
-        if not lesson_data:
-            raise HTTPException(status_code=404, detail="Lesson not found")
-
-        if lesson_data.get("lesson") and len(lesson_data["lesson"]) > 0:
-            return lesson_data  # Already generated
-
-        # Generate using ChatGPT
-        day = lesson_data.get("day")
-        title = lesson_data.get("title")
-        topic = title.split(":")[0].strip()  # crude fallback from title
-
-        generated = await generate_lesson_plan_and_quiz(day, title, topic)
-
-        # Update lesson in DB
-        await lesson_collection.update_one(
-            {"_id": lesson_id},
-            {"$set": {
-                "summary": generated["summary"],
-                "lesson": generated["lesson"],
-                "quiz": generated["quiz"]
-            }}
-        )
-
-        return generated
-
+        if async_job:
+            lesson_data = await Lesson.get_motor_collection().find_one({"_id": lesson_id})
+            if not lesson_data:
+                raise LessonNotFound(id)
+            if is_generated(lesson_data):
+                return FastJSONResponse(lesson_data)
+            job = await enqueue_job("lesson", {"lesson_id": lesson_id}, dedupe_key=str(lesson_id))
+            return accepted_response(job)
+
+        return FastJSONResponse(await get_or_generate_lesson(lesson_id))
+
+    except LessonNotFound:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    except LatencyBudgetExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -72,22 +113,72 @@ async def generate_lesson_by_id(id: str):
             detail=f"Error generating lesson: {str(e)}"
         )
     
-@router.get("/{id}")
-async def get_lesson_by_id(id: str):
+@router.api_route("/generate/{id}/stream", methods=["GET", "POST"])
+async def stream_lesson_by_id(id: str):
     """
-    Get the full lesson document by ObjectId
+    Server-sent events variant of /generate/{id}.
+    Emits `summary`, one `section` per lesson section and one `question` per quiz
+    question as soon as each is complete, then `done` with the full lesson.
     """
     try:
         lesson_id = ObjectId(id)
+        events = stream_lesson(lesson_id)
+        # Pull the first event now so a missing lesson is still a plain 404
+        first_event = await events.__anext__()
+    except LessonNotFound:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating lesson: {str(e)}"
+        )
+
+    async def event_stream():
+        event, data = first_event
+        yield format_sse(event, data)
+        try:
+            async for event, data in events:
+                yield format_sse(event, data)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield format_sse("error", {"detail": f"Error generating lesson: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+@router.get("/{id}", response_model=None, responses={200: {"model": LessonOut}})
+async def get_lesson_by_id(
+    id: str,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    Get the full lesson document by ObjectId.
+    Served from the response cache when possible, with ETag / 304 support.
+    """
+    try:
+        cached = response_cache.get("lesson", id)
+        if cached is not None:
+            return response_cache.respond(cached, if_none_match)
+
+        lesson_id = ObjectId(id)
+        read_token = response_cache.read_token()
         lesson_data = await Lesson.get_motor_collection().find_one({"_id": lesson_id})
 
         if not lesson_data:
             raise HTTPException(status_code=404, detail="Lesson not found")
 
-        # Convert ObjectId to string before returning
-        lesson_data["_id"] = str(lesson_data["_id"])
-        return lesson_data
+        entry = response_cache.set("lesson", lesson_id, lesson_data, read_token, generated=is_generated(lesson_data))
+        return response_cache.respond(entry, if_none_match)
 
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -1,98 +1,241 @@
-from fastapi import APIRouter, HTTPException, status, Body
-from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Body, Query, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional, Annotated, List
+import base64
+import json
 from bson import ObjectId
 from app.models.roadmap import Roadmap
 from app.models.lesson import Lesson
-from app.services.gemini_service import generate_roadmap_from_gemini
-from app.services.chatgpt_service import generate_lesson_plan_and_quiz
+from app.models.responses import RoadmapOut, CreatedRoadmapOut, JobAcceptedOut
+from app.services.pregeneration import pregeneration_pool
+from app.services.lesson_generation import generate_roadmap_lessons, RoadmapNotFound
+from app.services.roadmap_creation import create_roadmap_from_topic, find_similar, format_created_roadmap, CloneSourceNotFound
+from app.services.roadmap_outline import fetch_lesson_outlines, lesson_ref_id
+from app.services.response_cache import response_cache
+from app.services.topic_index import topic_index, ROADMAP_REUSE
+from app.services.serialization import FastJSONResponse, dumps
+from app.services.job_queue import enqueue_job, accepted_response
 
 router = APIRouter()
 
-@router.post("/", response_model=Roadmap)
-async def create_roadmap(topic: str = Body(..., embed=True)):
+@router.post(
+    "/", response_model=None,
+    responses={200: {"model": CreatedRoadmapOut}, 202: {"model": JobAcceptedOut}}
+)
+async def create_roadmap(
+    topic: str = Body(..., embed=True),
+    clone_from: Optional[str] = Body(None),
+    reuse: bool = Body(ROADMAP_REUSE),
+    async_job: bool = Query(False, alias="async")
+):
+    """
+    Create a roadmap for a topic. With clone_from, or with reuse=true when an
+    existing roadmap's topic is similar enough, the existing roadmap and its
+    generated lessons are copied instead of generating new ones. The source
+    is reported in the X-Cloned-From header. Otherwise a similar enough
+    roadmap is only suggested, in the response's `similar` field.
+
+    With `async=true` the roadmap is created by a job worker instead, and the
+    response is 202 with the job to poll at GET /api/jobs/{id}.
+    """
     try:
-        roadmap_data = await generate_roadmap_from_gemini(topic)
-
-        lesson_refs = []
-        for item in roadmap_data["roadmap"]:
-            day = item["day"]
-            title = item["title"]
-            # Store just placeholders for now
-            lesson = Lesson(
-                day=day,
-                title=title,
-                summary="",
-                lesson=[],
-                quiz=[]
-            )
-            await lesson.insert()
-            lesson_refs.append(lesson)
+        source_id = None
+        if clone_from:
+            if not ObjectId.is_valid(clone_from):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="clone_from must be a valid ObjectId"
+                )
+            source_id = ObjectId(clone_from)
 
-        roadmap = Roadmap(
-            title=f"{roadmap_data['topic']} Roadmap",
-            lessons=lesson_refs
-        )
-        await roadmap.insert()
+        if async_job:
+            job = await enqueue_job("roadmap", {"topic": topic, "clone_from": source_id, "reuse": reuse})
+            return accepted_response(job)
 
-        return roadmap
+        roadmap, topic, cloned_from, similar = await create_roadmap_from_topic(topic, source_id, reuse)
+        headers = {"X-Cloned-From": str(cloned_from)} if cloned_from else None
 
+        # Built from the in-memory documents rather than through a Roadmap
+        # response_model, which would re-validate everything and walk the links
+        return FastJSONResponse(format_created_roadmap(roadmap, topic, similar), headers=headers)
+
+    except CloneSourceNotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create roadmap: {str(e)}")
 
-@router.get("/")
-async def get_roadmaps(title: Optional[str] = None):
-    """Retrieve all roadmaps with their lesson summaries (sorted by day)"""
+
+# `lessons` is only read for roadmaps that predate the embedded outline
+ROADMAP_LIST_PROJECTION = {"title": 1, "outline": 1, "lessons": 1}
+ROADMAP_LIST_SORT = [("title", 1), ("_id", 1)]
+
+# Roadmaps are read and their lessons resolved this many at a time
+ROADMAP_BATCH_SIZE = 100
+ROADMAP_PAGE_MAX = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def format_roadmap(raw_roadmap, lessons, include_lesson_ids=False):
+    """
+    Build the roadmap response shape from a raw roadmap and its lessons,
+    given either as its embedded outline or as resolved lesson docs
+    """
+    roadmap_title = raw_roadmap.get("title", "Untitled Roadmap")
+    topic = roadmap_title.replace(" Roadmap", "").strip() or "Untitled"
+
+    roadmap_items = []
+    for lesson_data in lessons:
+        item = {
+            "day": lesson_data.get("day", 0),
+            "title": lesson_data.get("title", "Untitled"),
+            "summary": lesson_data.get("summary", ""),
+        }
+        if include_lesson_ids:
+            item["_id"] = lesson_data.get("lesson_id", lesson_data.get("_id"))
+        roadmap_items.append(item)
+
+    # ObjectIds are left as they are; the orjson encoder writes them as strings
+    return {
+        "_id": raw_roadmap.get("_id", "unknown"),
+        "title": roadmap_title,
+        "roadmap_data": {
+            "topic": topic,
+            "roadmap": roadmap_items
+        }
+    }
+
+
+@router.get("/pregeneration/stats")
+async def get_pregeneration_stats():
+    """Queue depth, lag and counters of the background lesson pre-generation pool"""
+    return pregeneration_pool.stats()
+
+@router.get("/similar")
+async def get_similar_roadmap(topic: str = Query(...)):
+    """
+    The existing roadmap whose topic is most similar to this one, if it's
+    similar enough to clone (pass its id as clone_from when creating)
+    """
+    return {"match": await find_similar(topic)}
+
+def encode_cursor(raw_roadmap) -> str:
+    """Opaque continuation token pointing just after this roadmap in (title, _id) order"""
+    payload = json.dumps({"t": raw_roadmap.get("title", ""), "id": str(raw_roadmap["_id"])})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token: str):
     try:
-        query = {}
-        if title:
-            query["title"] = {"$regex": title, "$options": "i"}
+        payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return payload["t"], ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid roadmap cursor"
+        )
 
-        roadmaps_collection = Roadmap.get_motor_collection()
-        roadmaps_data = await roadmaps_collection.find(query).sort("title", 1).to_list(length=None)
 
-        result = []
-        for raw_roadmap in roadmaps_data:
-            try:
-                roadmap_id = str(raw_roadmap.get("_id", "unknown"))
-                roadmap_title = raw_roadmap.get("title", "Untitled Roadmap")
-                topic = roadmap_title.replace(" Roadmap", "").strip() or "Untitled"
-
-                # ⛓️ Fetch all linked lessons
-                lesson_refs = raw_roadmap.get("lessons", [])
-                lessons = []
-
-                for lesson_ref in lesson_refs:
-                    lesson_id = None
-                    if isinstance(lesson_ref, dict) and "_id" in lesson_ref:
-                        lesson_id = lesson_ref["_id"]
-                    elif isinstance(lesson_ref, str):
-                        lesson_id = lesson_ref
-                    
-                    if lesson_id:
-                        lesson_data = await Lesson.get_motor_collection().find_one({"_id": lesson_id})
-                        if lesson_data:
-                            lessons.append({
-                                "day": lesson_data.get("day", 0),
-                                "title": lesson_data.get("title", "Untitled"),
-                                "summary": lesson_data.get("summary", ""),
-                            })
-
-                sorted_lessons = sorted(lessons, key=lambda x: x["day"])
-                result.append({
-                    "_id": roadmap_id,
-                    "title": roadmap_title,
-                    "roadmap_data": {
-                        "topic": topic,
-                        "roadmap": sorted_lessons
-                    }
-                })
+def build_roadmap_query(title: Optional[str], cursor: Optional[str]) -> dict:
+    clauses = []
+    if title:
+        # Served by the title_text index (case-insensitive, whole words)
+        clauses.append({"$text": {"$search": title}})
+    if cursor:
+        # Keyset pagination: everything strictly after the last (title, _id) seen
+        last_title, last_id = decode_cursor(cursor)
+        clauses.append({"$or": [
+            {"title": {"$gt": last_title}},
+            {"title": last_title, "_id": {"$gt": last_id}},
+        ]})
+
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+async def iter_roadmap_batches(query: dict, limit: Optional[int] = None):
+    """Yield roadmaps from the Motor cursor in batches, in (title, _id) order"""
+    cursor = Roadmap.get_motor_collection().find(
+        query, ROADMAP_LIST_PROJECTION
+    ).sort(ROADMAP_LIST_SORT).batch_size(ROADMAP_BATCH_SIZE)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    batch = []
+    async for raw_roadmap in cursor:
+        batch.append(raw_roadmap)
+        if len(batch) == ROADMAP_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
+
+async def iter_formatted_roadmaps(query: dict, limit: Optional[int] = None):
+    """Yield (raw_roadmap, formatted_roadmap) pairs, resolving lessons one batch at a time"""
+    async for batch in iter_roadmap_batches(query, limit):
+        # ⛓️ Roadmaps without an embedded outline have their lessons fetched
+        # for the whole batch in one round trip
+        lessons_by_roadmap = await fetch_lesson_outlines(
+            [raw_roadmap for raw_roadmap in batch if "outline" not in raw_roadmap]
+        )
+        for raw_roadmap in batch:
+            try:
+                # An empty embedded outline is still an outline, not a cue to look up lessons
+                if "outline" in raw_roadmap:
+                    lessons = raw_roadmap["outline"]
+                else:
+                    lessons = lessons_by_roadmap[raw_roadmap["_id"]]
+                yield raw_roadmap, format_roadmap(raw_roadmap, lessons)
             except Exception as e:
                 print(f"⚠️ Skipping roadmap due to error: {str(e)}")
                 continue
 
-        return result
 
+@router.get("/", response_model=None, responses={200: {"model": List[RoadmapOut]}})
+async def get_roadmaps(
+    title: Optional[str] = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=ROADMAP_PAGE_MAX)] = None,
+    cursor: Optional[str] = None,
+    format: Optional[str] = None,
+    accept: Annotated[Optional[str], Header()] = None,
+):
+    """
+    Retrieve roadmaps with their lesson summaries (sorted by day).
+
+    Pass `limit` to page through results; the token for the next page is
+    returned in the X-Next-Cursor header and goes back in as `cursor`.
+    With `format=ndjson` or `Accept: application/x-ndjson` roadmaps are
+    streamed one JSON object per line as they are read from Mongo.
+    """
+    try:
+        query = build_roadmap_query(title, cursor)
+
+        if format == "ndjson" or (accept and NDJSON_MEDIA_TYPE in accept):
+            async def ndjson_lines():
+                async for _, roadmap in iter_formatted_roadmaps(query, limit):
+                    yield dumps(roadmap) + b"\n"
+
+            return StreamingResponse(ndjson_lines(), media_type=NDJSON_MEDIA_TYPE)
+
+        # Read one extra roadmap to know whether another page follows
+        result = []
+        last_raw = None
+        has_more = False
+        async for raw_roadmap, roadmap in iter_formatted_roadmaps(query, limit + 1 if limit else None):
+            if limit and len(result) == limit:
+                has_more = True
+                break
+            result.append(roadmap)
+            last_raw = raw_roadmap
+
+        headers = {"X-Next-Cursor": encode_cursor(last_raw)} if has_more else None
+        return FastJSONResponse(result, headers=headers)
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Failed to fetch roadmaps: {str(e)}")
         raise HTTPException(
@@ -100,16 +243,29 @@ async def get_roadmaps(title: Optional[str] = None):
             detail=f"Error retrieving roadmaps: {str(e)}"
         )
 
-@router.get("/{roadmap_id}")
-async def get_roadmap_by_id(roadmap_id: str):
-    """Retrieve a specific roadmap by its ID"""
+@router.get("/{roadmap_id}", response_model=None, responses={200: {"model": RoadmapOut}})
+async def get_roadmap_by_id(
+    roadmap_id: str,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    Retrieve a specific roadmap by its ID.
+    Served from the response cache when possible, with ETag / 304 support.
+    """
     try:
+        cached = response_cache.get("roadmap", roadmap_id)
+        if cached is not None:
+            return response_cache.respond(cached, if_none_match)
+
         # Convert string ID to ObjectId
         roadmap_obj_id = ObjectId(roadmap_id)
+        read_token = response_cache.read_token()
         
         # Get the roadmap
         roadmaps_collection = Roadmap.get_motor_collection()
-        roadmap = await roadmaps_collection.find_one({"_id": roadmap_obj_id})
+        roadmap = await roadmaps_collection.find_one(
+            {"_id": roadmap_obj_id}, ROADMAP_LIST_PROJECTION
+        )
         
         if not roadmap:
             raise HTTPException(
@@ -117,50 +273,107 @@ async def get_roadmap_by_id(roadmap_id: str):
                 detail=f"Roadmap with ID {roadmap_id} not found"
             )
         
-        # Format the response
-        formatted_roadmap = {
-            "_id": str(roadmap.get("_id", "unknown")),
-            "title": roadmap.get("title", "Untitled Roadmap"),
-        }
-        
-        # Get the topic from the title
-        topic = roadmap.get("title", "").replace(" Roadmap", "").strip() or "Untitled"
-        
-        # Process lessons
-        lesson_refs = roadmap.get("lessons", [])
-        lessons = []
-        
-        for lesson_ref in lesson_refs:
-            lesson_id = None
-            if isinstance(lesson_ref, dict) and "_id" in lesson_ref:
-                lesson_id = lesson_ref["_id"]
-            elif isinstance(lesson_ref, str):
-                lesson_id = lesson_ref
-            
-            if lesson_id:
-                lesson_data = await Lesson.get_motor_collection().find_one({"_id": lesson_id})
-                if lesson_data:
-                    lessons.append({
-                        "day": lesson_data.get("day", 0),
-                        "title": lesson_data.get("title", "Untitled"),
-                        "summary": lesson_data.get("summary", ""),
-                        "_id": str(lesson_data.get("_id", "unknown"))
-                    })
-        
-        # Sort lessons by day
-        sorted_lessons = sorted(lessons, key=lambda x: x["day"])
-        
-        # Add roadmap data to the response
-        formatted_roadmap["roadmap_data"] = {
-            "topic": topic,
-            "roadmap": sorted_lessons
-        }
-        
-        return formatted_roadmap
+        # The embedded outline makes this a single read; older roadmaps
+        # resolve their lessons with one query, sorted by day in the database
+        lessons = roadmap.get("outline")
+        if lessons is None:
+            lessons = (await fetch_lesson_outlines([roadmap]))[roadmap_obj_id]
+        formatted = format_roadmap(roadmap, lessons, include_lesson_ids=True)
+
+        items = formatted["roadmap_data"]["roadmap"]
+        entry = response_cache.set(
+            "roadmap", roadmap_obj_id, formatted, read_token,
+            lesson_ids=[item["_id"] for item in items],
+            # Placeholder lessons have no summary until they are generated
+            generated=all(item["summary"] for item in items)
+        )
+        return response_cache.respond(entry, if_none_match)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Failed to fetch roadmap: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving roadmap: {str(e)}"
         )
+
+@router.post("/{roadmap_id}/generate")
+async def generate_roadmap_lessons_by_id(roadmap_id: str, stream: bool = False):
+    """
+    Generate all missing lessons of a roadmap in one request.
+    Lessons that already have content are skipped. With `stream=true` the
+    per-day status is streamed as NDJSON as each lesson finishes.
+    """
+    try:
+        statuses = generate_roadmap_lessons(ObjectId(roadmap_id))
+
+        if stream:
+            # Pull the first status now so a missing roadmap is still a plain 404
+            first_status = await statuses.__anext__()
+
+            async def ndjson_lines():
+                yield dumps(first_status) + b"\n"
+                async for lesson_status in statuses:
+                    yield dumps(lesson_status) + b"\n"
+
+            return StreamingResponse(ndjson_lines(), media_type=NDJSON_MEDIA_TYPE)
+
+        lessons = sorted([lesson_status async for lesson_status in statuses], key=lambda x: x["day"])
+        counts = {}
+        for lesson_status in lessons:
+            counts[lesson_status["status"]] = counts.get(lesson_status["status"], 0) + 1
+
+        return {"roadmap_id": roadmap_id, "counts": counts, "lessons": lessons}
+
+    except RoadmapNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Roadmap with ID {roadmap_id} not found"
+        )
+    except StopAsyncIteration:
+        # A roadmap without lessons has nothing to stream
+        return StreamingResponse(iter(()), media_type=NDJSON_MEDIA_TYPE)
+    except Exception as e:
+        print(f"❌ Failed to generate roadmap lessons: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generating roadmap lessons: {str(e)}"
+        )
+
+@router.delete("/{roadmap_id}")
+async def delete_roadmap(roadmap_id: str):
+    """Delete a roadmap and its lessons, cancelling their queued and running pre-generation"""
+    try:
+        roadmap_obj_id = ObjectId(roadmap_id)
+        roadmaps_collection = Roadmap.get_motor_collection()
+        roadmap = await roadmaps_collection.find_one_and_delete(
+            {"_id": roadmap_obj_id}, projection={"lessons": 1}
+        )
+
+        if not roadmap:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Roadmap with ID {roadmap_id} not found"
+            )
+
+        pregeneration_pool.cancel_roadmap(roadmap_obj_id)
+        response_cache.invalidate_roadmap(roadmap_obj_id)
+        topic_index.remove(roadmap_obj_id)
+
+        lesson_ids = [lesson_ref_id(ref) for ref in roadmap.get("lessons", [])]
+        lesson_ids = [lesson_id for lesson_id in lesson_ids if lesson_id is not None]
+        result = await Lesson.get_motor_collection().delete_many({"_id": {"$in": lesson_ids}})
+        for lesson_id in lesson_ids:
+            response_cache.invalidate_lesson(lesson_id)
+
+        return {"message": f"Roadmap {roadmap_id} deleted with {result.deleted_count} lessons 🗑️"}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Failed to delete roadmap: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error deleting roadmap: {str(e)}"
+        )
@@ -0,0 +1,583 @@
+"""
+Bulk seeding: generate roadmaps and all of their lessons for a file of topics.
+
+Topics go through a bounded two-stage pipeline. Up to --roadmap-concurrency
+Gemini roadmap generations run at once; their results are written in
+batches (one insert_many per collection for up to --batch-size roadmaps),
+which queues their lessons for up to --lesson-concurrency OpenAI
+generations, written back with one bulk_write per collection per batch.
+The provider gateways' rate limits and concurrency caps are the throttle,
+so a large run proceeds as fast as the providers allow.
+
+Progress is checkpointed in the seed_topics collection, one document per
+topic of a named run (--run). Running the same command again resumes it:
+done topics are skipped, stored roadmaps only get their missing lessons,
+and a roadmap whose write was interrupted is recognized by the id assigned
+to it beforehand. Results lost with an interrupted batch were already put
+in the generation cache, so generating them again costs no provider call.
+
+Offline mode: --export-requests DIR writes the outstanding generations as
+batch request files instead of calling the providers (roadmaps.gemini.jsonl
+in Gemini batch format, lessons.openai.jsonl in OpenAI Batch API format),
+and --import-responses FILE... stores the batch outputs. Lessons can only be
+requested once their roadmap exists, so an offline run is export, import
+(roadmaps), export, import (lessons).
+
+Usage (from the backend directory):
+    python -m app.seed topics.txt --run launch
+    python -m app.seed topics.txt --run launch --export-requests batches/
+    python -m app.seed --run launch --import-responses batches/roadmaps.output.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+# Before the app modules read their settings from the environment
+load_dotenv()
+
+from beanie import PydanticObjectId
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.models.lesson import Lesson
+from app.models.llm_output import LessonContent, RoadmapPlan
+from app.models.roadmap import Roadmap
+from app.models.seed_topic import SEED_STATUSES, SeedTopic
+from app.services import gemini_service
+from app.services.chatgpt_service import build_lesson_prompt, generate_lesson_plan_and_quiz, OPENAI_MODEL
+from app.services.database import connect_mongo, DOCUMENT_MODELS
+from app.services.db_session import maybe_transaction
+from app.services.gemini_service import build_roadmap_prompt, generate_roadmap_plan, ROADMAP_SCHEMA
+from app.services.llm_gateway import openai_gateway, gemini_gateway
+from app.services.roadmap_outline import build_outline, lesson_ref_id
+from app.services.shared_store import shared_store
+from app.services.structured_output import parse_structured, StructuredOutputError
+
+# Seeded when no topics file is given (what db_init used to create)
+SAMPLE_TOPICS = ["Effective Study Techniques"]
+
+# Checkpoints created / roadmaps scanned per round trip
+CHECKPOINT_BATCH = 1000
+
+
+def read_topics(path: str) -> list:
+    """One topic per line, or JSON lines with a "topic" field; blank lines, # comments and repeats are skipped"""
+    topics = []
+    with open(path, encoding="utf-8") as topics_file:
+        for line in topics_file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            topics.append(json.loads(line)["topic"].strip() if line.startswith("{") else line)
+    return list(dict.fromkeys(topic for topic in topics if topic))
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class WriteBatcher:
+    """Collects results and hands them to flush(items) in batches of batch_size, or every flush_seconds"""
+
+    def __init__(self, flush, batch_size: int, flush_seconds: float = None):
+        self._flush = flush
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._items = []
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._closed = asyncio.Event()
+        self.batches = 0
+        self.errors = 0
+
+    def start(self):
+        if self.flush_seconds:
+            self._task = asyncio.create_task(self._periodic())
+
+    async def add(self, item):
+        self._items.append(item)
+        if len(self._items) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            items, self._items = self._items, []
+            if not items:
+                return
+            try:
+                await self._flush(items)
+                self.batches += 1
+            except Exception as e:
+                # The checkpoints weren't advanced, so the next run redoes these
+                self.errors += 1
+                print(f"❌ Failed to write a batch of {len(items)}, they will be redone on the next run: {str(e)}")
+
+    async def _periodic(self):
+        while not self._closed.is_set():
+            try:
+                await asyncio.wait_for(self._closed.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    async def close(self):
+        # Not cancelled: a flush in progress has already taken its items
+        self._closed.set()
+        if self._task:
+            await self._task
+        await self.flush()
+
+
+class Seeder:
+    def __init__(self, run: str, batch_size: int, max_attempts: int):
+        self.run = run
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        # Unfinished checkpoints of this run by id
+        self.seeds = {}
+        # Checkpoint id -> lessons still to generate
+        self.remaining = {}
+        # Called with each lesson task of a stored roadmap (online mode)
+        self.lesson_sink = None
+        self._failed_this_run = set()
+        self.counts = {"roadmaps": 0, "lessons": 0, "roadmap_failures": 0, "lesson_failures": 0}
+
+    @property
+    def collection(self):
+        return SeedTopic.get_motor_collection()
+
+    async def add_topics(self, topics):
+        """Create checkpoints for topics not in the run yet; existing ones keep their progress"""
+        now = datetime.now(timezone.utc)
+        added = 0
+        for batch in chunks(topics, CHECKPOINT_BATCH):
+            result = await self.collection.bulk_write([
+                UpdateOne(
+                    {"run": self.run, "topic": topic},
+                    {"$setOnInsert": {
+                        "status": "pending", "roadmap_id": None, "lessons_total": 0, "lessons_done": 0,
+                        "attempts": 0, "error": None, "created_at": now, "updated_at": now,
+                    }},
+                    upsert=True
+                )
+                for topic in batch
+            ], ordered=False)
+            added += result.upserted_count
+        return added
+
+    async def load(self):
+        """Unfinished work of the run: (checkpoints needing a roadmap, lesson tasks)"""
+        pending, with_roadmap = [], []
+        cursor = self.collection.find({
+            "run": self.run, "status": {"$ne": "done"}, "attempts": {"$lt": self.max_attempts}
+        })
+        async for seed in cursor:
+            self.seeds[seed["_id"]] = seed
+            (pending if seed["status"] == "pending" else with_roadmap).append(seed)
+
+        # A run interrupted between storing roadmaps and advancing their checkpoints
+        assigned = {seed["roadmap_id"]: seed for seed in pending if seed.get("roadmap_id")}
+        if assigned:
+            stored = await Roadmap.get_motor_collection().find(
+                {"_id": {"$in": list(assigned)}}, {"_id": 1}
+            ).to_list(length=None)
+            recovered = [assigned[doc["_id"]] for doc in stored]
+            if recovered:
+                await self._set_status(recovered, "roadmap")
+                pending = [seed for seed in pending if seed not in recovered]
+                with_roadmap.extend(recovered)
+
+        lesson_tasks, lost = await self.missing_lessons(with_roadmap)
+        if lost:
+            # Roadmap deleted since; generate it again
+            await self.collection.update_many(
+                {"_id": {"$in": [seed["_id"] for seed in lost]}},
+                {"$set": {"status": "pending", "roadmap_id": None, "lessons_done": 0}}
+            )
+            pending.extend(lost)
+        return pending, lesson_tasks
+
+    async def missing_lessons(self, seeds):
+        """Lesson tasks for the ungenerated lessons of the checkpoints' roadmaps, and checkpoints whose roadmap is gone"""
+        tasks, lost, finished = [], [], []
+        for batch in chunks(seeds, CHECKPOINT_BATCH):
+            by_roadmap = {seed["roadmap_id"]: seed for seed in batch}
+            seed_by_lesson = {}
+            async for roadmap in Roadmap.get_motor_collection().find(
+                {"_id": {"$in": list(by_roadmap)}}, {"lessons": 1}
+            ):
+                seed = by_roadmap.pop(roadmap["_id"])
+                self.remaining[seed["_id"]] = 0
+                for ref in roadmap.get("lessons", []):
+                    seed_by_lesson[lesson_ref_id(ref)] = seed
+            # The roadmaps still left here no longer exist
+            lost.extend(by_roadmap.values())
+
+            missing = Lesson.get_motor_collection().find(
+                {"_id": {"$in": list(seed_by_lesson)}, "lesson.0": {"$exists": False}},
+                {"day": 1, "title": 1}
+            ).sort("day", 1)
+            async for lesson_data in missing:
+                seed = seed_by_lesson[lesson_data["_id"]]
+                self.remaining[seed["_id"]] += 1
+                tasks.append(self._lesson_task(seed, lesson_data))
+            finished.extend(seed for seed in batch if self.remaining.get(seed["_id"]) == 0)
+
+        if finished:
+            await self._set_status(finished, "done")
+        return tasks, lost
+
+    @staticmethod
+    def _lesson_task(seed, lesson_data):
+        return {
+            "seed_id": seed["_id"],
+            "roadmap_id": seed["roadmap_id"],
+            "lesson_id": lesson_data["_id"],
+            "day": lesson_data.get("day"),
+            "title": lesson_data.get("title"),
+            "topic": seed["topic"],
+        }
+
+    async def _set_status(self, seeds, status):
+        await self.collection.update_many(
+            {"_id": {"$in": [seed["_id"] for seed in seeds]}},
+            {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}}
+        )
+        for seed in seeds:
+            seed["status"] = status
+
+    async def record_failure(self, seed_id, error):
+        """Keep the error on the checkpoint; attempts counts the runs in which the topic failed"""
+        update = {"$set": {"error": str(error)[:500], "updated_at": datetime.now(timezone.utc)}}
+        if seed_id not in self._failed_this_run:
+            self._failed_this_run.add(seed_id)
+            update["$inc"] = {"attempts": 1}
+        await self.collection.update_one({"_id": seed_id}, update)
+
+    async def write_roadmaps(self, items):
+        """Store a batch of (checkpoint, roadmap plan) as placeholder lessons and roadmaps"""
+        now = datetime.now(timezone.utc)
+        roadmap_ids = {seed["_id"]: PydanticObjectId() for seed, _ in items}
+        # Ids go on the checkpoints first, so a resumed run can tell whether the inserts went through
+        await self.collection.bulk_write([
+            UpdateOne({"_id": seed_id}, {"$set": {"roadmap_id": roadmap_id, "updated_at": now}})
+            for seed_id, roadmap_id in roadmap_ids.items()
+        ], ordered=False)
+
+        lessons, roadmaps = [], []
+        for seed, plan in items:
+            lesson_refs = [
+                Lesson(id=PydanticObjectId(), day=item["day"], title=item["title"], summary="", lesson=[], quiz=[])
+                for item in plan["roadmap"]
+            ]
+            lessons.extend(lesson_refs)
+            roadmaps.append(Roadmap(
+                id=roadmap_ids[seed["_id"]],
+                title=f"{plan['topic']} Roadmap",
+                lessons=lesson_refs,
+                outline=build_outline(lesson_refs)
+            ))
+
+        async with maybe_transaction() as session:
+            await Lesson.insert_many(lessons, session=session)
+            await Roadmap.insert_many(roadmaps, session=session)
+
+        await self.collection.bulk_write([
+            UpdateOne({"_id": seed["_id"]}, {"$set": {
+                "status": "roadmap", "lessons_total": len(roadmap.lessons), "lessons_done": 0,
+                "error": None, "updated_at": now,
+            }})
+            for (seed, _), roadmap in zip(items, roadmaps)
+        ], ordered=False)
+        self.counts["roadmaps"] += len(items)
+
+        for (seed, _), roadmap in zip(items, roadmaps):
+            seed["status"] = "roadmap"
+            seed["roadmap_id"] = roadmap.id
+            self.remaining[seed["_id"]] = len(roadmap.lessons)
+            if self.lesson_sink:
+                for lesson in roadmap.lessons:
+                    await self.lesson_sink(self._lesson_task(seed, {"_id": lesson.id, "day": lesson.day, "title": lesson.title}))
+
+    async def write_lessons(self, items):
+        """Store a batch of (lesson task, generated content) and advance their checkpoints"""
+        now = datetime.now(timezone.utc)
+        await Lesson.get_motor_collection().bulk_write([
+            UpdateOne(
+                # Leave lessons generated through the API in the meantime alone
+                {"_id": task["lesson_id"], "lesson.0": {"$exists": False}},
+                {"$set": {"summary": generated["summary"], "lesson": generated["lesson"], "quiz": generated["quiz"]}}
+            )
+            for task, generated in items
+        ], ordered=False)
+        await Roadmap.get_motor_collection().bulk_write([
+            UpdateOne(
+                {"_id": task["roadmap_id"], "outline.lesson_id": task["lesson_id"]},
+                {"$set": {"outline.$.summary": generated["summary"]}}
+            )
+            for task, generated in items
+        ], ordered=False)
+
+        done_per_seed = {}
+        for task, _ in items:
+            done_per_seed[task["seed_id"]] = done_per_seed.get(task["seed_id"], 0) + 1
+        operations = []
+        for seed_id, done in done_per_seed.items():
+            self.remaining[seed_id] -= done
+            update = {"$inc": {"lessons_done": done}, "$set": {"updated_at": now}}
+            if self.remaining[seed_id] <= 0:
+                update["$set"]["status"] = "done"
+                if seed_id not in self._failed_this_run:
+                    update["$set"]["error"] = None
+            operations.append(UpdateOne({"_id": seed_id}, update))
+        await self.collection.bulk_write(operations, ordered=False)
+        self.counts["lessons"] += len(items)
+
+    async def run_online(self, pending, lesson_tasks, roadmap_concurrency, lesson_concurrency, flush_seconds):
+        """Generate everything outstanding through the provider gateways"""
+        roadmap_batcher = WriteBatcher(self.write_roadmaps, self.batch_size, flush_seconds)
+        lesson_batcher = WriteBatcher(self.write_lessons, self.batch_size, flush_seconds)
+        # Bounded, so a fast stage waits for the slower one instead of piling up work in memory
+        roadmap_queue = asyncio.Queue(maxsize=roadmap_concurrency * 2)
+        lesson_queue = asyncio.Queue(maxsize=lesson_concurrency * 4)
+        self.lesson_sink = lesson_queue.put
+
+        async def roadmap_worker():
+            while (seed := await roadmap_queue.get()) is not None:
+                try:
+                    plan = await generate_roadmap_plan(seed["topic"])
+                except Exception as e:
+                    self.counts["roadmap_failures"] += 1
+                    print(f"⚠️ Roadmap for '{seed['topic']}' failed: {str(e)}")
+                    await self.record_failure(seed["_id"], e)
+                    continue
+                await roadmap_batcher.add((seed, plan))
+
+        async def lesson_worker():
+            while (task := await lesson_queue.get()) is not None:
+                try:
+                    generated = await generate_lesson_plan_and_quiz(task["day"], task["title"], task["topic"])
+                except Exception as e:
+                    self.counts["lesson_failures"] += 1
+                    print(f"⚠️ Lesson '{task['title']}' failed: {str(e)}")
+                    await self.record_failure(task["seed_id"], e)
+                    continue
+                await lesson_batcher.add((task, generated))
+
+        async def roadmap_stage():
+            workers = [asyncio.create_task(roadmap_worker()) for _ in range(roadmap_concurrency)]
+            for seed in pending:
+                await roadmap_queue.put(seed)
+            for _ in workers:
+                await roadmap_queue.put(None)
+            await asyncio.gather(*workers)
+            # The last roadmaps queue their lessons as they are written
+            await roadmap_batcher.close()
+
+        async def resumed_lessons():
+            for task in lesson_tasks:
+                await lesson_queue.put(task)
+
+        roadmap_batcher.start()
+        lesson_batcher.start()
+        lesson_workers = [asyncio.create_task(lesson_worker()) for _ in range(lesson_concurrency)]
+        try:
+            await asyncio.gather(roadmap_stage(), resumed_lessons())
+            for _ in lesson_workers:
+                await lesson_queue.put(None)
+            await asyncio.gather(*lesson_workers)
+        finally:
+            # Interrupted: keep what has been generated, without queueing more lessons
+            self.lesson_sink = None
+            for worker in lesson_workers:
+                worker.cancel()
+            await roadmap_batcher.close()
+            await lesson_batcher.close()
+
+    def export_requests(self, directory, pending, lesson_tasks):
+        """Write the outstanding generations as provider batch request files"""
+        os.makedirs(directory, exist_ok=True)
+        roadmaps_path = os.path.join(directory, "roadmaps.gemini.jsonl")
+        lessons_path = os.path.join(directory, "lessons.openai.jsonl")
+
+        # Empty files aren't written, so files still being processed offline aren't clobbered
+        if pending:
+            with open(roadmaps_path, "w", encoding="utf-8") as requests_file:
+                for seed in pending:
+                    requests_file.write(json.dumps({
+                        "key": f"roadmap:{seed['_id']}",
+                        "request": {
+                            "contents": [{"parts": [{"text": build_roadmap_prompt(seed["topic"])}]}],
+                            "generationConfig": {"responseMimeType": "application/json", "responseSchema": ROADMAP_SCHEMA},
+                        },
+                    }) + "\n")
+            print(f"📝 {len(pending)} roadmap requests -> {roadmaps_path}")
+
+        if lesson_tasks:
+            with open(lessons_path, "w", encoding="utf-8") as requests_file:
+                for task in lesson_tasks:
+                    requests_file.write(json.dumps({
+                        "custom_id": f"lesson:{task['seed_id']}:{task['lesson_id']}",
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": OPENAI_MODEL,
+                            "messages": [{"role": "user", "content": build_lesson_prompt(task["day"], task["title"], task["topic"])}],
+                            "response_format": {"type": "json_object"},
+                        },
+                    }) + "\n")
+            print(f"📝 {len(lesson_tasks)} lesson requests -> {lessons_path}")
+
+    async def import_responses(self, paths, lesson_tasks):
+        """Store batch outputs (Gemini or OpenAI batch format, or {"custom_id", "text"} lines)"""
+        roadmap_batcher = WriteBatcher(self.write_roadmaps, self.batch_size)
+        lesson_batcher = WriteBatcher(self.write_lessons, self.batch_size)
+        tasks_by_lesson = {task["lesson_id"]: task for task in lesson_tasks}
+        skipped = 0
+
+        for path in paths:
+            with open(path, encoding="utf-8") as responses_file:
+                for line in responses_file:
+                    if not line.strip():
+                        continue
+                    custom_id, text, error = parse_response_line(json.loads(line))
+                    kind, seed_id, *rest = custom_id.split(":")
+                    seed = self.seeds.get(ObjectId(seed_id))
+                    if kind == "roadmap":
+                        target = seed if seed and seed["status"] == "pending" else None
+                    else:
+                        target = tasks_by_lesson.pop(ObjectId(rest[0]), None)
+                    if target is None:
+                        # Already imported, or not part of this run's outstanding work
+                        skipped += 1
+                        continue
+
+                    try:
+                        if error:
+                            raise ValueError(error)
+                        if kind == "roadmap":
+                            plan = parse_structured(text, RoadmapPlan, "roadmap")
+                            # Marked now so a repeated line isn't stored twice
+                            seed["status"] = "importing"
+                            await roadmap_batcher.add((seed, plan))
+                        else:
+                            await lesson_batcher.add((target, parse_structured(text, LessonContent, "lesson")))
+                    except (ValueError, StructuredOutputError) as e:
+                        self.counts[f"{kind}_failures"] += 1
+                        print(f"⚠️ {custom_id}: {str(e)}")
+                        await self.record_failure(ObjectId(seed_id), e)
+
+        await roadmap_batcher.close()
+        await lesson_batcher.close()
+        if skipped:
+            print(f"⏭️ Skipped {skipped} responses already imported or not outstanding in run '{self.run}'")
+
+    async def report(self):
+        statuses = dict.fromkeys(SEED_STATUSES, 0)
+        async for row in self.collection.aggregate([
+            {"$match": {"run": self.run}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ]):
+            statuses[row["_id"]] = row["count"]
+        exhausted = await self.collection.count_documents({
+            "run": self.run, "status": {"$ne": "done"}, "attempts": {"$gte": self.max_attempts}
+        })
+        print(f"📊 Run '{self.run}': {statuses['done']} done, {statuses['roadmap']} with lessons outstanding, "
+              f"{statuses['pending']} without a roadmap ({exhausted} gave up after {self.max_attempts} failed runs)")
+
+
+def parse_response_line(record):
+    """(custom id, generated text, error) of one batch output line"""
+    if "key" in record:
+        # Gemini batch output
+        if record.get("error") or "response" not in record:
+            return record["key"], None, str(record.get("error") or "no response")
+        try:
+            return record["key"], record["response"]["candidates"][0]["content"]["parts"][0]["text"], None
+        except (KeyError, IndexError):
+            return record["key"], None, "no text in response"
+
+    if "text" in record:
+        return record["custom_id"], record["text"], None
+
+    # OpenAI Batch API output
+    response = record.get("response") or {}
+    if record.get("error") or response.get("status_code") != 200:
+        return record["custom_id"], None, str(record.get("error") or f"status {response.get('status_code')}")
+    try:
+        return record["custom_id"], response["body"]["choices"][0]["message"]["content"], None
+    except (KeyError, IndexError):
+        return record["custom_id"], None, "no content in response"
+
+
+async def report_progress(seeder: Seeder, interval: float):
+    start = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        minutes = (time.monotonic() - start) / 60
+        counts = seeder.counts
+        print(f"📈 {counts['roadmaps']} roadmaps, {counts['lessons']} lessons "
+              f"({counts['lessons'] / minutes:.0f}/min), "
+              f"{counts['roadmap_failures'] + counts['lesson_failures']} failures | "
+              f"waiting on gateway: gemini {gemini_gateway.waiting}, openai {openai_gateway.waiting}")
+
+
+async def seed(args):
+    client, _ = await connect_mongo(document_models=DOCUMENT_MODELS + [SeedTopic])
+    seeder = Seeder(args.run, args.batch_size, args.max_attempts)
+    if shared_store:
+        await shared_store.open()
+    try:
+        if args.topics_file or not args.import_responses:
+            topics = read_topics(args.topics_file) if args.topics_file else SAMPLE_TOPICS
+            added = await seeder.add_topics(topics)
+            print(f"🌱 Run '{args.run}': {len(topics)} topics, {added} new")
+
+        pending, lesson_tasks = await seeder.load()
+        print(f"🌱 {len(pending)} roadmaps and {len(lesson_tasks)} lessons outstanding")
+
+        if args.export_requests:
+            seeder.export_requests(args.export_requests, pending, lesson_tasks)
+        elif args.import_responses:
+            await seeder.import_responses(args.import_responses, lesson_tasks)
+        elif pending or lesson_tasks:
+            start = time.monotonic()
+            progress = asyncio.create_task(report_progress(seeder, args.progress_seconds))
+            try:
+                await seeder.run_online(
+                    pending, lesson_tasks, args.roadmap_concurrency, args.lesson_concurrency, args.flush_seconds
+                )
+            finally:
+                progress.cancel()
+            print(f"✅ Generated {seeder.counts['roadmaps']} roadmaps and {seeder.counts['lessons']} lessons "
+                  f"in {time.monotonic() - start:.1f}s")
+
+        await seeder.report()
+    finally:
+        await gemini_service.close_http_client()
+        if shared_store:
+            shared_store.close()
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("topics_file", nargs="?", help="Topics, one per line or JSON lines with a \"topic\" field")
+    parser.add_argument("--run", default="seed", help="Checkpoint name; the same name resumes a run")
+    # Twice the gateway caps, so the gateways always have the next request queued
+    parser.add_argument("--roadmap-concurrency", type=int, default=gemini_gateway.max_concurrency * 2)
+    parser.add_argument("--lesson-concurrency", type=int, default=openai_gateway.max_concurrency * 2)
+    parser.add_argument("--batch-size", type=int, default=50, help="Roadmaps or lessons per bulk write")
+    parser.add_argument("--flush-seconds", type=float, default=2.0, help="Write partial batches at least this often")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Skip topics that failed in this many runs")
+    parser.add_argument("--progress-seconds", type=float, default=10.0)
+    parser.add_argument("--export-requests", metavar="DIR", help="Write batch request files instead of generating")
+    parser.add_argument("--import-responses", metavar="FILE", nargs="+", help="Store batch output files")
+    args = parser.parse_args()
+    asyncio.run(seed(args))
@@ -0,0 +1,152 @@
+"""
+Content-addressed cache for LLM generation results.
+
+Entries are keyed by a hash of the model, the fully rendered prompt and the
+inputs, so a change to a prompt template produces new keys and old entries are
+simply never hit again. Lookups go through an in-process LRU with TTL first,
+then the host-wide SQLite store shared by all worker processes
+(shared_store), and fall back to the persistent `llm_cache` Mongo collection.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from app.models.generation_cache import GenerationCache
+from app.services.shared_store import shared_store
+
+
+def make_key(model: str, prompt: str, inputs: dict) -> str:
+    """Hash the model, rendered prompt and inputs into a stable cache key"""
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "inputs": inputs},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Bounded in-process LRU cache where every entry expires after `ttl` seconds"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        return self._entries.pop(key, None) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class GenerationCacheStore:
+    """Three-tier (memory + host-shared SQLite + Mongo) cache for generated lessons, quizzes and roadmaps"""
+
+    def __init__(self, max_entries: int, ttl: float, shared=None):
+        self.memory = LRUCache(max_entries, ttl)
+        self.shared = shared
+        self.persistent_hits = 0
+        self.persistent_misses = 0
+        self.persistent_errors = 0
+
+    async def get(self, key: str):
+        value = self.memory.get(key)
+        if value is not None:
+            return copy.deepcopy(value)
+
+        if self.shared is not None:
+            # Deserialized fresh from the file, so no copy is needed
+            value = self.shared.get(key)
+            if value is not None:
+                self.memory.set(key, copy.deepcopy(value))
+                return value
+
+        try:
+            doc = await GenerationCache.get_motor_collection().find_one({"key": key}, {"value": 1})
+        except Exception as e:
+            # Beanie not initialized (scripts) or Mongo unavailable: treat as a miss
+            self.persistent_errors += 1
+            print(f"⚠️ Generation cache lookup failed: {str(e)}")
+            return None
+
+        if doc is None:
+            self.persistent_misses += 1
+            return None
+
+        self.persistent_hits += 1
+        self.memory.set(key, doc["value"])
+        if self.shared is not None:
+            await self.shared.set(key, doc["value"])
+        return copy.deepcopy(doc["value"])
+
+    async def set(self, key: str, model: str, value):
+        self.memory.set(key, copy.deepcopy(value))
+        if self.shared is not None:
+            await self.shared.set(key, value)
+        try:
+            await GenerationCache.get_motor_collection().update_one(
+                {"key": key},
+                {"$set": {
+                    "model": model,
+                    "value": value,
+                    "created_at": datetime.now(timezone.utc)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            self.persistent_errors += 1
+            print(f"⚠️ Generation cache write failed: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "memory_entries": len(self.memory),
+            "memory_hits": self.memory.hits,
+            "memory_misses": self.memory.misses,
+            "memory_evictions": self.memory.evictions,
+            "memory_expirations": self.memory.expirations,
+            "persistent_hits": self.persistent_hits,
+            "persistent_misses": self.persistent_misses,
+            "persistent_errors": self.persistent_errors,
+        }
+
+
+generation_cache = GenerationCacheStore(
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 512)),
+    ttl=float(os.getenv("LLM_CACHE_TTL_SECONDS", 24 * 3600)),
+    shared=shared_store,
+)
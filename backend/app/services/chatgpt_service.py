@@ -1,12 +1,89 @@
 import os
-import json
-import re
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
+from app.services.cache_service import generation_cache, make_key
+from app.services.json_stream import JSONStreamScanner
+from app.services.llm_gateway import openai_gateway, estimate_tokens
+from app.services.gemini_service import generate_text_from_gemini, GEMINI_MODEL
+from app.services.hedging import Tier, hedged_generate, policy_from_env
+from app.services.structured_output import generate_structured, parse_structured, StructuredOutputError
+from app.models.llm_output import LessonContent, Prequiz, gemini_schema
+from app.services.metrics import llm_fallbacks, llm_tokens
 
-load_dotenv()
+_openai_client = None
 
-openai = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def get_openai_client():
+    """
+    The shared AsyncOpenAI client, created on first use: importing the SDK
+    takes about a third of the app's import time, which a worker shouldn't
+    pay before it can serve its first request
+    """
+    global _openai_client
+    if _openai_client is None:
+        from openai import AsyncOpenAI
+
+        # Retries and timeouts are handled by the gateway, not the SDK
+        _openai_client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            max_retries=0,
+            timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", 90))
+        )
+    return _openai_client
+
+OPENAI_MODEL = "gpt-4-turbo"
+
+# Expected completion sizes, used to charge the tokens-per-minute budget up front
+PREQUIZ_COMPLETION_TOKENS = 400
+LESSON_COMPLETION_TOKENS = 1500
+
+async def create_chat_completion(prompt: str, completion_tokens: int, model: str = OPENAI_MODEL, **kwargs):
+    """Send a single-message chat completion through the OpenAI gateway"""
+    return await openai_gateway.call(
+        lambda: get_openai_client().chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            **kwargs
+        ),
+        estimated_tokens=estimate_tokens(prompt, completion_tokens),
+        usage_tokens=lambda response: getattr(getattr(response, "usage", None), "total_tokens", None),
+        model=model
+    )
+
+def openai_tier(model: str, completion_tokens: int, schema, kind: str) -> Tier:
+    async def generate_text(prompt):
+        # JSON mode: the model must emit a single JSON object
+        response = await create_chat_completion(
+            prompt, completion_tokens, model=model, response_format={"type": "json_object"}
+        )
+        return response.choices[0].message.content
+
+    async def generate(prompt):
+        return await generate_structured(generate_text, prompt, schema, kind)
+    return Tier(f"openai:{model}", generate)
+
+def gemini_tier(completion_tokens: int, schema, kind: str) -> Tier:
+    response_schema = gemini_schema(schema)
+
+    async def generate_text(prompt):
+        return await generate_text_from_gemini(prompt, completion_tokens, response_schema)
+
+    async def generate(prompt):
+        return await generate_structured(generate_text, prompt, schema, kind)
+    return Tier(f"gemini:{GEMINI_MODEL}", generate)
+
+def hedge_tier(completion_tokens: int, schema, kind: str):
+    """The faster tier to hedge with: HEDGE_TIER=openai:<model>, gemini or none"""
+    if HEDGE_TIER == "none":
+        return None
+    if HEDGE_TIER == "gemini":
+        return gemini_tier(completion_tokens, schema, kind)
+    return openai_tier(HEDGE_TIER.split(":", 1)[-1], completion_tokens, schema, kind)
+
+# Latency budgets per endpoint; hedging kicks in at the budget's adaptive hedge point
+HEDGE_TIER = os.getenv("HEDGE_TIER", "openai:gpt-4o-mini")
+lesson_policy = policy_from_env("lesson", default_budget=45)
+prequiz_policy = policy_from_env("prequiz", default_budget=15)
+
+def hedging_stats() -> dict:
+    return {"lesson": lesson_policy.stats(), "prequiz": prequiz_policy.stats()}
 
 async def generate_prequiz(topic: str):
     """
@@ -42,22 +119,24 @@ Return the following JSON format EXACTLY:
 Be concise, make the questions introductory level, and follow the JSON format exactly.
 """
 
-    response = await openai.chat.completions.create(
-        model="gpt-4-turbo",
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    text = response.choices[0].message.content.strip()
+    cache_key = make_key(OPENAI_MODEL, prompt, {"kind": "prequiz", "topic": topic})
+    cached = await generation_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    # Extract JSON if ChatGPT adds extra text
-    match = re.search(r'({[\s\S]*})', text)
-    if match:
-        try:
-            return json.loads(match.group(1))
-        except json.JSONDecodeError:
-            pass
+    primary = openai_tier(OPENAI_MODEL, PREQUIZ_COMPLETION_TOKENS, Prequiz, "prequiz")
+    result, tier = await hedged_generate(
+        prequiz_policy, prompt, primary=primary, hedge=hedge_tier(PREQUIZ_COMPLETION_TOKENS, Prequiz, "prequiz")
+    )
+    if result is not None:
+        # Only the primary model's generations are cached under its key, never
+        # a hedge tier's or the fallback below
+        if tier is primary:
+            await generation_cache.set(cache_key, OPENAI_MODEL, result)
+        return result
 
     # fallback
+    llm_fallbacks.inc(("prequiz",))
     return {
         "prequiz": [
             {
@@ -78,11 +157,8 @@ Be concise, make the questions introductory level, and follow the JSON format ex
         ]
     }
 
-async def generate_lesson_plan_and_quiz(day: int, title: str, topic: str):
-    """
-    Uses ChatGPT API to generate a detailed lesson plan + quiz for a given topic/day
-    """
-    prompt = f"""
+def build_lesson_prompt(day: int, title: str, topic: str) -> str:
+    return f"""
 Create a detailed lesson plan and quiz for Day {day} titled "{title}" in the topic of "{topic}".
 
 Return the following JSON format:
@@ -127,32 +203,90 @@ Generate 3-5 quiz questions with multiple choice answers at the end.
 Be concise, technical, and follow the JSON format **exactly**.
 """
 
-    response = await openai.chat.completions.create(
-        model="gpt-4-turbo",
-        messages=[{"role": "user", "content": prompt}]
+def lesson_cache_key(prompt: str, day: int, title: str, topic: str) -> str:
+    return make_key(
+        OPENAI_MODEL, prompt, {"kind": "lesson", "day": day, "title": title, "topic": topic}
     )
 
-    text = response.choices[0].message.content.strip()
+async def generate_lesson_plan_and_quiz(day: int, title: str, topic: str):
+    """
+    Uses ChatGPT API to generate a detailed lesson plan + quiz for a given topic/day
+    """
+    prompt = build_lesson_prompt(day, title, topic)
+    cache_key = lesson_cache_key(prompt, day, title, topic)
+    cached = await generation_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    # Extract JSON if ChatGPT adds extra text
-    match = re.search(r'({[\s\S]*})', text)
-    if match:
-        try:
-            return json.loads(match.group(1))
-        except json.JSONDecodeError:
-            pass
+    primary = openai_tier(OPENAI_MODEL, LESSON_COMPLETION_TOKENS, LessonContent, "lesson")
+    result, tier = await hedged_generate(
+        lesson_policy, prompt, primary=primary, hedge=hedge_tier(LESSON_COMPLETION_TOKENS, LessonContent, "lesson")
+    )
+    if result is None:
+        # Don't hand back placeholder content: it would be stored as the lesson
+        raise StructuredOutputError(f"No valid lesson could be generated for day {day}: {title}")
 
-    # fallback
-    return {
-        "day": day,
-        "title": title,
-        "summary": f"This lesson covers the key ideas of {title}.",
-        "lesson": [
-            {"section": "Introduction", "content": f"Welcome to {title}."},
-            {"section": "Key Concepts", "content": "Key ideas and theory."},
-            {"section": "Examples", "content": "Example-driven explanations."},
-            {"section": "Practice", "content": "Hands-on practice ideas."},
-            {"section": "Summary", "content": "Key takeaways."},
-        ],
-        "quiz": []
-    }
+    # The key names the primary model; a cheaper hedge tier's output must not be served as its output
+    if tier is primary:
+        await generation_cache.set(cache_key, OPENAI_MODEL, result)
+    return result
+
+async def stream_lesson_plan_and_quiz(day: int, title: str, topic: str):
+    """
+    Streaming variant of generate_lesson_plan_and_quiz.
+
+    Yields ("summary", str), ("section", dict) and ("question", dict) events as
+    soon as each part of the JSON is complete, then ("done", full_lesson).
+    """
+    prompt = build_lesson_prompt(day, title, topic)
+    cache_key = lesson_cache_key(prompt, day, title, topic)
+    cached = await generation_cache.get(cache_key)
+    if cached is not None:
+        for event in lesson_events(cached):
+            yield event
+        yield "done", cached
+        return
+
+    # The gateway covers opening the stream; chunks are read outside its concurrency slot
+    stream = await create_chat_completion(
+        prompt, LESSON_COMPLETION_TOKENS, stream=True, response_format={"type": "json_object"},
+        stream_options={"include_usage": True}
+    )
+
+    scanner = JSONStreamScanner()
+    async for chunk in stream:
+        if getattr(chunk, "usage", None):
+            # Sent as a final chunk without choices
+            llm_tokens.inc(("openai", OPENAI_MODEL), chunk.usage.total_tokens)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        for key, value in scanner.feed(delta):
+            event = STREAM_EVENTS.get(key)
+            if event:
+                yield event, value
+
+    try:
+        result = parse_structured(scanner.buffer, LessonContent, "lesson")
+    except StructuredOutputError as e:
+        # The streamed text can't be repaired; generate it again without streaming
+        print(f"⚠️ {str(e)}, regenerating")
+        yield "done", await generate_lesson_plan_and_quiz(day, title, topic)
+        return
+
+    await generation_cache.set(cache_key, OPENAI_MODEL, result)
+    yield "done", result
+
+# JSON keys of the lesson document and the stream event each one produces
+STREAM_EVENTS = {"summary": "summary", "lesson": "section", "quiz": "question"}
+
+def lesson_events(lesson: dict):
+    """Replay a complete lesson document as stream events"""
+    if lesson.get("summary"):
+        yield "summary", lesson["summary"]
+    for section in lesson.get("lesson", []):
+        yield "section", section
+    for question in lesson.get("quiz", []):
+        yield "question", question
@@ -0,0 +1,68 @@
+"""
+MongoDB connection shared by the API (app.main) and the job worker (app.worker).
+"""
+
+import asyncio
+import os
+import certifi
+import motor.motor_asyncio
+from beanie import init_beanie
+
+from app.models.lesson import Lesson
+from app.models.roadmap import Roadmap
+from app.models.generation_cache import GenerationCache
+from app.models.job import Job
+
+DOCUMENT_MODELS = [Lesson, Roadmap, GenerationCache, Job]
+
+
+async def connect_mongo(event_listeners=(), create_indexes=True, document_models=DOCUMENT_MODELS):
+    """
+    Connect to MONGO_URI, initialize Beanie and return (client, database).
+    With create_indexes=False the caller runs ensure_indexes() itself.
+    Scripts with collections of their own pass them in document_models.
+    """
+    # Get MongoDB URI from environment variable
+    mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+    # Passing tlsCAFile turns TLS on, so only do it for connections that use TLS
+    uses_tls = mongo_uri.startswith("mongodb+srv://") or "tls=true" in mongo_uri.lower()
+    client = motor.motor_asyncio.AsyncIOMotorClient(
+        mongo_uri,
+        event_listeners=list(event_listeners),
+        **({"tlsCAFile": certifi.where()} if uses_tls else {})
+    )
+
+    # Extract database name from connection string or use default
+    if os.getenv("MONGO_DB_NAME"):
+        database = client.get_database(os.getenv("MONGO_DB_NAME"))
+    elif "mongodb+srv://" in mongo_uri and "mongodb.net" in mongo_uri:
+        # For MongoDB Atlas connections, use the same database as connection
+        database = client.get_database("dinolearn")
+    else:
+        # For local connections, use dinolearn_db
+        database = client.dinolearn_db
+
+    # Initialize Beanie with our document models; indexes are created
+    # separately, all collections at once
+    await init_beanie(database=database, document_models=document_models, skip_indexes=True)
+    if create_indexes:
+        await ensure_indexes(document_models)
+
+    # Log connection info (hide password)
+    safe_uri = mongo_uri.split('@')[1] if '@' in mongo_uri else mongo_uri
+    print(f"Connected to MongoDB at: {safe_uri}")
+    return client, database
+
+
+async def ensure_indexes(document_models=DOCUMENT_MODELS):
+    """
+    Create the indexes declared in each model's Settings: one createIndexes
+    per collection, sent concurrently, instead of Beanie's list-then-create
+    round trips one collection after another. Existing identical indexes
+    are left as they are.
+    """
+    await asyncio.gather(*(
+        model.get_motor_collection().create_indexes(model.Settings.indexes)
+        for model in document_models
+        if getattr(model.Settings, "indexes", None)
+    ))
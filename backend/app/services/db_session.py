@@ -0,0 +1,38 @@
+"""
+Multi-document transactions when the deployment supports them.
+
+Transactions need a replica set or a sharded cluster (Atlas always is one);
+on a standalone mongod, writes simply run without a session.
+"""
+
+import contextlib
+
+from app.models.lesson import Lesson
+
+_supports_transactions = None
+
+
+async def supports_transactions(client) -> bool:
+    """Ask the server once whether it is a replica set member or mongos"""
+    global _supports_transactions
+    if _supports_transactions is None:
+        try:
+            hello = await client.admin.command("hello")
+            _supports_transactions = "setName" in hello or hello.get("msg") == "isdbgrid"
+        except Exception as e:
+            print(f"⚠️ Could not detect transaction support: {str(e)}")
+            _supports_transactions = False
+    return _supports_transactions
+
+
+@contextlib.asynccontextmanager
+async def maybe_transaction():
+    """Yield a session with an open transaction, or None if transactions aren't available"""
+    client = Lesson.get_motor_collection().database.client
+    if not await supports_transactions(client):
+        yield None
+        return
+
+    async with await client.start_session() as session:
+        async with session.start_transaction():
+            yield session
@@ -1,23 +1,132 @@
 import httpx
 import os
-import re
-import json
-from dotenv import load_dotenv
+from app.services.cache_service import generation_cache, make_key
+from app.services.llm_gateway import gemini_gateway, estimate_tokens
+from app.services.structured_output import generate_structured
+from app.models.llm_output import RoadmapPlan, gemini_schema
+from app.services.metrics import llm_fallbacks
 
-load_dotenv()
+GEMINI_MODEL = "gemini-2.0-flash-lite"
+ROADMAP_COMPLETION_TOKENS = 600
+ROADMAP_SCHEMA = gemini_schema(RoadmapPlan)
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
 
-async def generate_roadmap_from_gemini(topic: str):
-    """Generate a roadmap structure using Google's Gemini API"""
+# Connection pool settings for the shared Gemini HTTP client
+GEMINI_HTTP2 = os.getenv("GEMINI_HTTP2", "false").lower() == "true"
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", 5))
+GEMINI_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", 60))
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", 20))
+GEMINI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GEMINI_MAX_KEEPALIVE_CONNECTIONS", 10))
+GEMINI_KEEPALIVE_EXPIRY = float(os.getenv("GEMINI_KEEPALIVE_EXPIRY", 30))
+
+_http_client = None
+pool_stats = {"requests": 0, "connections_opened": 0, "tls_handshakes": 0, "http2": False}
+
+def start_http_client():
+    """Create the shared keep-alive client"""
+    global _http_client
+    if _http_client is not None:
+        return _http_client
+
+    http2 = GEMINI_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("⚠️ GEMINI_HTTP2 is set but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+    pool_stats["http2"] = http2
+
+    _http_client = httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(
+            GEMINI_READ_TIMEOUT,
+            connect=GEMINI_CONNECT_TIMEOUT,
+            pool=GEMINI_CONNECT_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=GEMINI_MAX_CONNECTIONS,
+            max_keepalive_connections=GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=GEMINI_KEEPALIVE_EXPIRY
+        )
+    )
+    return _http_client
+
+def get_http_client():
+    """Return the shared client, creating it on first use"""
+    return _http_client or start_http_client()
+
+async def close_http_client():
+    """Close the shared client and its pooled connections (called at app shutdown)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+async def _trace_connection(event_name, info):
+    """httpcore trace hook: counts requests and how many needed a new connection"""
+    if event_name in ("http11.send_request_headers.started", "http2.send_request_headers.started"):
+        pool_stats["requests"] += 1
+    elif event_name == "connection.connect_tcp.complete":
+        pool_stats["connections_opened"] += 1
+    elif event_name == "connection.start_tls.complete":
+        pool_stats["tls_handshakes"] += 1
+
+def get_pool_stats():
+    return {
+        **pool_stats,
+        "max_connections": GEMINI_MAX_CONNECTIONS,
+        "max_keepalive_connections": GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+    }
+
+async def generate_text_from_gemini(prompt: str, completion_tokens: int, response_schema: dict = None) -> str:
+    """
+    Send a prompt to Gemini through the gateway and return the generated text.
+    With a response_schema, Gemini is constrained to JSON matching it.
+    """
+    api_key = os.getenv('GEMINI_API_KEY')
+
+    if not api_key or api_key == "your_gemini_api_key_here":
+        raise ValueError("GEMINI_API_KEY environment variable is not set or using placeholder value")
+
+    url = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:generateContent?key={api_key}"
+    client = get_http_client()
+    body = {"contents": [{"parts": [{"text": prompt}]}]}
+    if response_schema is not None:
+        body["generationConfig"] = {
+            "responseMimeType": "application/json",
+            "responseSchema": response_schema
+        }
+
+    async def post_prompt():
+        response = await client.post(
+            url,
+            json=body,
+            extensions={"trace": _trace_connection}
+        )
+        # 429/5xx raise so the gateway can back off and retry
+        response.raise_for_status()
+        return response.json()
+
+    data = await gemini_gateway.call(
+        post_prompt,
+        estimated_tokens=estimate_tokens(prompt, completion_tokens),
+        usage_tokens=lambda data: data.get("usageMetadata", {}).get("totalTokenCount"),
+        model=GEMINI_MODEL
+    )
+
+    # Check if there was an error in the response
+    if "error" in data:
+        raise ValueError(f"Gemini API error: {data['error']}")
+
+    # Try to access the text content
     try:
-        api_key = os.getenv('GEMINI_API_KEY')
-        
-        if not api_key or api_key == "your_gemini_api_key_here":
-            raise ValueError("GEMINI_API_KEY environment variable is not set or using placeholder value")
-            
-        print("Gemini API client initialized successfully")
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-lite:generateContent?key={api_key}"
-        
-        prompt = f'''Create a 14-day progressive learning roadmap for "{topic}" that starts with the absolute basics and gradually builds up to advanced concepts.
+        return data["candidates"][0]["content"]["parts"][0]["text"]
+    except (KeyError, IndexError) as e:
+        raise ValueError(f"Error extracting text from Gemini response: {str(e)}")
+
+def build_roadmap_prompt(topic: str) -> str:
+    return f'''Create a 14-day progressive learning roadmap for "{topic}" that starts with the absolute basics and gradually builds up to advanced concepts.
 
         Return ONLY the following JSON format with no explanations before or after:
         {{
@@ -49,55 +158,33 @@ async def generate_roadmap_from_gemini(topic: str):
         6. All titles should be specific to {topic}, clear, concise, and descriptive
         7. Ensure a logical progression of knowledge throughout the 14 days
         '''
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json={
-                    "contents": [{"parts": [{"text": prompt}]}]
-                }
-            )
-            
-            data = response.json()
-            
-            # Check if there was an error in the response
-            if "error" in data:
-                print(f"Gemini API error: {data['error']}")
-                return get_fallback_roadmap(topic)
-                
-            # Try to access the text content
-            try:
-                text = data["candidates"][0]["content"]["parts"][0]["text"]
-            except (KeyError, IndexError) as e:
-                print(f"Error extracting text from Gemini response: {str(e)}")
-                return get_fallback_roadmap(topic)
-            
-            # Extract JSON from text (sometimes Gemini adds explanations before/after JSON)
-            json_match = re.search(r'({[\s\S]*})', text)
-            if json_match:
-                try:
-                    json_data = json.loads(json_match.group(1))
-                    # Validate the expected structure
-                    if "topic" in json_data and "roadmap" in json_data and len(json_data["roadmap"]) > 0:
-                        return json_data
-                except json.JSONDecodeError:
-                    pass  # Fall through to backup plan
-            
-            # Backup: If JSON parsing failed, extract lesson titles manually
-            lines = [line for line in text.split('\n') if line.strip()]
-            roadmap = []
-            
-            for i, line in enumerate(lines[:14]):
-                # Remove day numbers like "1." or "Day 1:" from the start
-                clean_title = re.sub(r"^\d+\.\s*|^Day\s+\d+[:.]\s*", "", line, flags=re.IGNORECASE)
-                roadmap.append({"day": i+1, "title": clean_title})
-            
-            return {
-                "topic": topic,
-                "roadmap": roadmap
-            }
+
+def roadmap_cache_key(prompt: str, topic: str) -> str:
+    return make_key(GEMINI_MODEL, prompt, {"kind": "roadmap", "topic": topic})
+
+async def generate_roadmap_plan(topic: str):
+    """Generate a roadmap structure with Gemini; raises if no valid roadmap could be generated"""
+    prompt = build_roadmap_prompt(topic)
+    cache_key = roadmap_cache_key(prompt, topic)
+    cached = await generation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    async def generate_text(prompt):
+        return await generate_text_from_gemini(prompt, ROADMAP_COMPLETION_TOKENS, ROADMAP_SCHEMA)
+
+    # Repaired locally where possible; regenerated only if repair fails
+    roadmap = await generate_structured(generate_text, prompt, RoadmapPlan, "roadmap")
+    await generation_cache.set(cache_key, GEMINI_MODEL, roadmap)
+    return roadmap
+
+async def generate_roadmap_from_gemini(topic: str):
+    """Generate a roadmap structure using Google's Gemini API"""
+    try:
+        return await generate_roadmap_plan(topic)
     except Exception as e:
         print(f"Error in generate_roadmap_from_gemini: {str(e)}")
+        llm_fallbacks.inc(("roadmap",))
         return get_fallback_roadmap(topic)
 
 def get_fallback_roadmap(topic):
@@ -0,0 +1,54 @@
+"""
+Handlers for the generation jobs enqueued by the async mode of
+POST /api/roadmaps and POST /api/lessons/generate/{id}. Each returns what the
+synchronous endpoint would have responded with, stored as the job's result.
+"""
+
+from bson import ObjectId
+
+from app.models.roadmap import Roadmap
+from app.services.job_queue import PermanentJobError
+from app.services.lesson_generation import get_or_generate_lesson, LessonNotFound
+from app.services.roadmap_creation import (
+    create_roadmap_from_topic,
+    format_created_roadmap,
+    CloneSourceNotFound,
+)
+from app.services.topic_index import ROADMAP_REUSE, topic_from_title
+
+
+async def run_lesson_job(job):
+    """Generation is claimed per lesson, so a retried attempt never generates twice"""
+    lesson_id = ObjectId(job["payload"]["lesson_id"])
+    try:
+        return await get_or_generate_lesson(lesson_id)
+    except LessonNotFound:
+        raise PermanentJobError(f"Lesson {lesson_id} not found")
+
+
+async def run_roadmap_job(job):
+    """The roadmap takes the job's id, so a retry after a crash returns the stored one"""
+    existing = await Roadmap.get(job["_id"], fetch_links=True)
+    if existing is not None:
+        return format_created_roadmap(existing, topic_from_title(existing.title))
+
+    payload = job["payload"]
+    try:
+        roadmap, topic, cloned_from, similar = await create_roadmap_from_topic(
+            payload["topic"],
+            payload.get("clone_from"),
+            payload.get("reuse", ROADMAP_REUSE),
+            roadmap_id=job["_id"],
+        )
+    except CloneSourceNotFound as e:
+        raise PermanentJobError(str(e))
+
+    result = format_created_roadmap(roadmap, topic, similar)
+    result["cloned_from"] = cloned_from
+    return result
+
+
+JOB_HANDLERS = {
+    "lesson": run_lesson_job,
+    "roadmap": run_roadmap_job,
+}
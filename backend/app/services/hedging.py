@@ -0,0 +1,133 @@
+"""
+Latency-budgeted hedged generation.
+
+The primary tier (gpt-4-turbo) is called first. If it has not produced a
+valid result by the hedge point, the endpoint's HEDGE_PERCENTILE of recent
+primary latencies (half the budget until enough samples exist), a hedge
+request goes to a faster tier: a smaller OpenAI model or Gemini. The first
+schema-conforming result wins and the other request is cancelled. Nothing
+waits past the endpoint's latency budget. The tier that served each
+request is counted so cost and latency can be tuned.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from app.services.tracing import span
+
+
+class LatencyBudgetExceeded(Exception):
+    """No tier produced a valid result within the endpoint's latency budget"""
+
+
+class Tier:
+    """A model that can serve a request: generate(prompt) returns a validated document or raises"""
+
+    def __init__(self, name: str, generate):
+        self.name = name
+        self.generate = generate
+
+
+class HedgePolicy:
+    """Per-endpoint latency budget and adaptive hedge delay"""
+
+    MIN_SAMPLES = 20
+
+    def __init__(self, endpoint: str, budget: float, percentile: float):
+        self.endpoint = endpoint
+        self.budget = budget
+        self.percentile = percentile
+        self.primary_latency = deque(maxlen=200)
+        self.served_by = {}
+        self.hedges = 0
+        self.budget_exceeded = 0
+
+    def hedge_delay(self) -> float:
+        if len(self.primary_latency) < self.MIN_SAMPLES:
+            return self.budget / 2
+        ordered = sorted(self.primary_latency)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return min(ordered[index], self.budget)
+
+    def stats(self) -> dict:
+        return {
+            "budget_s": self.budget,
+            "hedge_delay_s": round(self.hedge_delay(), 3),
+            "hedges": self.hedges,
+            "budget_exceeded": self.budget_exceeded,
+            "served_by": dict(self.served_by),
+        }
+
+
+async def hedged_generate(policy: HedgePolicy, prompt: str, primary: Tier, hedge):
+    """
+    Return (document, tier) for the first valid document any tier produces,
+    or (None, None) if every tier failed. Raises LatencyBudgetExceeded when
+    the budget runs out first.
+    """
+    start = time.monotonic()
+    deadline = start + policy.budget
+    hedge_at = start + policy.hedge_delay()
+    tasks = {asyncio.ensure_future(_run_tier(primary, prompt)): primary}
+    hedge_started = hedge is None
+
+    def start_hedge():
+        nonlocal hedge_started
+        hedge_started = True
+        policy.hedges += 1
+        tasks[asyncio.ensure_future(_run_tier(hedge, prompt))] = hedge
+
+    try:
+        while tasks:
+            wait_until = deadline if hedge_started else min(hedge_at, deadline)
+            done, _ = await asyncio.wait(
+                tasks, timeout=max(0.0, wait_until - time.monotonic()),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+
+            if not done:
+                if not hedge_started and time.monotonic() < deadline:
+                    start_hedge()
+                    continue
+                policy.budget_exceeded += 1
+                raise LatencyBudgetExceeded(
+                    f"{policy.endpoint} generation exceeded its {policy.budget}s budget"
+                )
+
+            for task in done:
+                tier = tasks.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    print(f"⚠️ {policy.endpoint} generation via {tier.name} failed: {str(e)}")
+                else:
+                    if tier is primary:
+                        policy.primary_latency.append(time.monotonic() - start)
+                    policy.served_by[tier.name] = policy.served_by.get(tier.name, 0) + 1
+                    return result, tier
+
+                # This tier failed; don't wait for the hedge point to try the other
+                if not hedge_started:
+                    start_hedge()
+
+        return None, None
+    finally:
+        for task, tier in tasks.items():
+            task.cancel()
+            if tier is primary:
+                # Censored sample: the primary took at least this long
+                policy.primary_latency.append(time.monotonic() - start)
+
+
+async def _run_tier(tier: Tier, prompt: str):
+    with span(f"tier.{tier.name}"):
+        return await tier.generate(prompt)
+
+
+def policy_from_env(endpoint: str, default_budget: float) -> HedgePolicy:
+    return HedgePolicy(
+        endpoint,
+        budget=float(os.getenv(f"{endpoint.upper()}_LATENCY_BUDGET_SECONDS", default_budget)),
+        percentile=float(os.getenv("HEDGE_PERCENTILE", 90)),
+    )
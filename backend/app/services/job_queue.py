@@ -0,0 +1,465 @@
+"""
+Durable generation job queue stored in the `jobs` collection.
+
+Web workers enqueue a job and answer 202 straight away; worker processes
+(`python -m app.worker`) drain the queue. A worker claims the oldest
+available job with one find_one_and_update that also takes a lease, and
+renews the lease while the handler runs. If the worker dies, the lease runs
+out and the job becomes claimable again (the visibility timeout). A failed
+attempt is retried with exponential backoff until max_attempts, after which
+the job is dead-lettered: kept with status "dead" and its last error until
+it is retried through POST /api/jobs/{id}/retry. Handlers raise
+PermanentJobError for failures that retrying can't fix.
+
+GET /api/jobs/{id}?wait=N long-polls through job_waiters: one change stream
+per process wakes every waiting request when its job finishes. On a
+standalone mongod, which has no change streams, it falls back to one $in
+query per poll interval for all waiting jobs.
+"""
+
+import asyncio
+import contextlib
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+from app.models.job import Job, JOB_FINISHED_STATUSES
+from app.services.serialization import FastJSONResponse
+
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 60))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", 5))
+JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", 24 * 3600))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 1))
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", 4))
+JOB_WAIT_MAX_SECONDS = float(os.getenv("JOB_WAIT_MAX_SECONDS", 25))
+JOB_SHUTDOWN_GRACE_SECONDS = float(os.getenv("JOB_SHUTDOWN_GRACE_SECONDS", 30))
+# A long-poll re-reads its job this often even without a wake-up, so a
+# missed notification costs latency rather than a hung request
+JOB_WAIT_RECHECK_SECONDS = 5
+DUPLICATE_KEY_ERROR = 11000
+
+# What GET /api/jobs/{id} returns; payload, lease and dedupe fields are internal
+JOB_VIEW_PROJECTION = {
+    "kind": 1, "status": 1, "attempts": 1, "max_attempts": 1, "result": 1, "error": 1,
+    "created_at": 1, "started_at": 1, "finished_at": 1,
+}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying the job can't succeed"""
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+async def enqueue_job(kind: str, payload: dict, dedupe_key=None, max_attempts: int = JOB_MAX_ATTEMPTS) -> dict:
+    """
+    Store a queued job and return it. With dedupe_key, an unfinished job of
+    the same kind and key is returned instead of enqueueing a second one.
+    """
+    job = _new_job(kind, payload, dedupe_key, max_attempts, _now())
+    collection = Job.get_motor_collection()
+    try:
+        await collection.insert_one(job)
+        return job
+    except DuplicateKeyError:
+        existing = await collection.find_one({"active_key": job["active_key"]}, JOB_VIEW_PROJECTION)
+        if existing:
+            return existing
+        # It finished between the insert and the lookup
+        return await enqueue_job(kind, payload, dedupe_key, max_attempts)
+
+
+async def enqueue_jobs(kind: str, payloads: dict, max_attempts: int = JOB_MAX_ATTEMPTS) -> int:
+    """
+    enqueue_job for many jobs with one insert_many; payloads maps each
+    dedupe key to its job's payload. Keys that already have an unfinished
+    job are skipped. Returns how many jobs were queued.
+    """
+    if not payloads:
+        return 0
+    now = _now()
+    jobs = [_new_job(kind, payload, dedupe_key, max_attempts, now) for dedupe_key, payload in payloads.items()]
+    try:
+        result = await Job.get_motor_collection().insert_many(jobs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+            raise
+        return e.details["nInserted"]
+
+
+def _new_job(kind: str, payload: dict, dedupe_key, max_attempts: int, now) -> dict:
+    job = {
+        "kind": kind,
+        "payload": payload,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "available_at": now,
+        "created_at": now,
+    }
+    if dedupe_key is not None:
+        job["active_key"] = job["dedupe_key"] = f"{kind}:{dedupe_key}"
+    return job
+
+
+async def get_job(job_id):
+    return await Job.get_motor_collection().find_one({"_id": job_id}, JOB_VIEW_PROJECTION)
+
+
+async def wait_for_job(job_id, timeout: float):
+    """Return the job once it has finished, or as it is when the timeout runs out"""
+    deadline = time.monotonic() + timeout
+    # Registered before the first read, so a finish right after it still wakes us
+    with job_waiters.waiting(job_id) as finished:
+        job = await get_job(job_id)
+        while job is not None and job["status"] not in JOB_FINISHED_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(finished.wait(), min(remaining, JOB_WAIT_RECHECK_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+            finished.clear()
+            job = await get_job(job_id)
+    return job
+
+
+async def retry_job(job_id):
+    """
+    Queue a failed or dead job again with a fresh set of attempts. Returns the
+    id of the job now queued for its work: this one, or an equivalent job
+    enqueued while it was finished. None if it doesn't exist or hasn't failed.
+    """
+    collection = Job.get_motor_collection()
+    retryable = {"_id": job_id, "status": {"$in": ["failed", "dead"]}}
+    job = await collection.find_one(retryable, {"dedupe_key": 1})
+    if job is None:
+        return None
+
+    update = {"status": "queued", "attempts": 0, "available_at": _now()}
+    if job.get("dedupe_key"):
+        # Active again, so enqueue_job dedupes against it like a new job
+        update["active_key"] = job["dedupe_key"]
+    try:
+        result = await collection.update_one(
+            retryable,
+            {"$set": update, "$unset": {"error": "", "finished_at": "", "expires_at": ""}}
+        )
+    except DuplicateKeyError:
+        existing = await collection.find_one({"active_key": job["dedupe_key"]}, {"_id": 1})
+        if existing:
+            return existing["_id"]
+        # It finished between the update and the lookup
+        return await retry_job(job_id)
+    return job_id if result.modified_count == 1 else None
+
+
+async def job_counts() -> dict:
+    """Number of jobs per status"""
+    cursor = Job.get_motor_collection().aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+    return {group["_id"]: group["count"] async for group in cursor}
+
+
+def accepted_response(job: dict) -> FastJSONResponse:
+    """202 pointing the client at the job's status URL"""
+    status_url = f"/api/jobs/{job['_id']}"
+    return FastJSONResponse(
+        {"job_id": job["_id"], "status": job["status"], "status_url": status_url},
+        status_code=202,
+        headers={"Location": status_url},
+    )
+
+
+async def claim_job(kinds):
+    """
+    Claim the next job of one of these kinds: a running job whose lease has
+    expired first, then the queued job that has been available longest.
+    """
+    collection = Job.get_motor_collection()
+    now = _now()
+    lease = {
+        "$set": {
+            "status": "running",
+            "lease_token": uuid.uuid4().hex,
+            "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+            "started_at": now,
+        },
+        "$inc": {"attempts": 1},
+    }
+    job = await collection.find_one_and_update(
+        {"status": "running", "lease_expires_at": {"$lt": now}, "kind": {"$in": kinds}},
+        lease,
+        return_document=ReturnDocument.AFTER,
+    )
+    if job is None:
+        job = await collection.find_one_and_update(
+            {"status": "queued", "available_at": {"$lte": now}, "kind": {"$in": kinds}},
+            lease,
+            sort=[("available_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+    return job
+
+
+async def renew_lease(job) -> bool:
+    result = await Job.get_motor_collection().update_one(
+        {"_id": job["_id"], "lease_token": job["lease_token"]},
+        {"$set": {"lease_expires_at": _now() + timedelta(seconds=JOB_LEASE_SECONDS)}}
+    )
+    return result.matched_count == 1
+
+
+async def complete_job(job, result):
+    await _finish_job(job, "succeeded", {"result": result, "error": None})
+
+
+async def fail_job(job, error: str, permanent: bool = False) -> str:
+    """Record a failed attempt; returns the job's new status"""
+    if permanent:
+        status = "failed"
+    elif job["attempts"] >= job["max_attempts"]:
+        status = "dead"
+    else:
+        # Back off 1x, 2x, 4x... the base delay, with jitter
+        delay = JOB_RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1) * random.uniform(0.8, 1.2)
+        await Job.get_motor_collection().update_one(
+            {"_id": job["_id"], "lease_token": job["lease_token"]},
+            {
+                "$set": {"status": "queued", "error": error, "available_at": _now() + timedelta(seconds=delay)},
+                "$unset": {"lease_token": "", "lease_expires_at": ""},
+            }
+        )
+        return "queued"
+
+    await _finish_job(job, status, {"error": error})
+    return status
+
+
+async def release_job(job):
+    """Hand an interrupted job back to the queue without using up an attempt"""
+    await Job.get_motor_collection().update_one(
+        {"_id": job["_id"], "lease_token": job["lease_token"]},
+        {
+            "$set": {"status": "queued", "available_at": _now()},
+            "$inc": {"attempts": -1},
+            "$unset": {"lease_token": "", "lease_expires_at": ""},
+        }
+    )
+
+
+async def _finish_job(job, status: str, fields: dict):
+    now = _now()
+    update = {"status": status, "finished_at": now, **fields}
+    if status != "dead":
+        # Dead letters stay until someone retries or removes them
+        update["expires_at"] = now + timedelta(seconds=JOB_RESULT_TTL_SECONDS)
+    await Job.get_motor_collection().update_one(
+        {"_id": job["_id"], "lease_token": job["lease_token"]},
+        {"$set": update, "$unset": {"lease_token": "", "lease_expires_at": "", "active_key": ""}}
+    )
+    job_waiters.notify(job["_id"])
+
+
+class JobWaiters:
+    """Wakes long-polling requests when their job finishes"""
+
+    def __init__(self):
+        # job id -> [event, number of requests waiting on it]
+        self._waiting = {}
+        self._watcher = None
+        self.mode = None
+        self.wakeups = 0
+
+    @contextlib.contextmanager
+    def waiting(self, job_id):
+        entry = self._waiting.get(job_id)
+        if entry is None:
+            entry = self._waiting[job_id] = [asyncio.Event(), 0]
+        entry[1] += 1
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch())
+        try:
+            yield entry[0]
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._waiting[job_id]
+
+    def notify(self, job_id):
+        entry = self._waiting.get(job_id)
+        if entry is not None:
+            self.wakeups += 1
+            entry[0].set()
+
+    async def _watch(self):
+        """Runs while anyone is waiting"""
+        collection = Job.get_motor_collection()
+        try:
+            if self.mode != "poll":
+                try:
+                    await self._watch_change_stream(collection)
+                    return
+                except OperationFailure as e:
+                    # Change streams need a replica set
+                    print(f"⚠️ Job change stream unavailable, polling instead: {str(e)}")
+                    self.mode = "poll"
+            await self._poll(collection)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Waiters still re-read their job every JOB_WAIT_RECHECK_SECONDS
+            print(f"⚠️ Job watcher stopped: {str(e)}")
+
+    async def _watch_change_stream(self, collection):
+        pipeline = [{"$match": {
+            "operationType": "update",
+            "updateDescription.updatedFields.status": {"$in": list(JOB_FINISHED_STATUSES)},
+        }}]
+        async with collection.watch(pipeline, max_await_time_ms=1000) as stream:
+            self.mode = "change_stream"
+            while self._waiting:
+                change = await stream.try_next()
+                if change is not None:
+                    self.notify(change["documentKey"]["_id"])
+
+    async def _poll(self, collection):
+        while self._waiting:
+            cursor = collection.find(
+                {"_id": {"$in": list(self._waiting)}, "status": {"$in": list(JOB_FINISHED_STATUSES)}},
+                {"_id": 1}
+            )
+            async for job in cursor:
+                self.notify(job["_id"])
+            await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode or "idle",
+            "waiting_requests": sum(count for _, count in self._waiting.values()),
+            "wakeups": self.wakeups,
+        }
+
+
+job_waiters = JobWaiters()
+
+
+class JobWorker:
+    """Claims and runs jobs with up to `concurrency` handlers in flight"""
+
+    def __init__(self, handlers: dict, concurrency: int = JOB_WORKER_CONCURRENCY):
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self._tasks = []
+        self._stopping = False
+        self.running = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.dead = 0
+        self.lost_leases = 0
+
+    def start(self):
+        if self._tasks:
+            return
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+        print(f"Job worker started with {self.concurrency} slots for {', '.join(self.handlers)} jobs")
+
+    async def stop(self, grace: float = JOB_SHUTDOWN_GRACE_SECONDS):
+        """Stop claiming, let running jobs finish for up to `grace` seconds, then release them"""
+        self._stopping = True
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=grace)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self):
+        kinds = list(self.handlers)
+        while not self._stopping:
+            try:
+                job = await claim_job(kinds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Could not claim a job: {str(e)}")
+                job = None
+
+            if job is None:
+                # Jittered so idle workers don't poll in lockstep
+                await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS * random.uniform(0.5, 1.5))
+                continue
+            try:
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Recording the outcome failed; the job is retried once its lease expires
+                print(f"⚠️ Could not record the outcome of job {job['_id']}: {str(e)}")
+
+    async def _process(self, job):
+        if job["attempts"] > job["max_attempts"]:
+            # Its last lease expired, e.g. because it keeps crashing the worker
+            self.dead += 1
+            await fail_job(job, job.get("error") or "Lease expired on the final attempt")
+            return
+
+        self.running += 1
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            result = await self.handlers[job["kind"]](job)
+        except asyncio.CancelledError:
+            await release_job(job)
+            raise
+        except PermanentJobError as e:
+            self.failed += 1
+            await fail_job(job, str(e), permanent=True)
+        except Exception as e:
+            status = await fail_job(job, f"{type(e).__name__}: {str(e)}")
+            if status == "dead":
+                self.dead += 1
+            else:
+                self.retried += 1
+            print(f"⚠️ {job['kind']} job {job['_id']} attempt {job['attempts']} failed ({status}): {str(e)}")
+        else:
+            self.succeeded += 1
+            await complete_job(job, result)
+        finally:
+            heartbeat.cancel()
+            self.running -= 1
+
+    async def _heartbeat(self, job):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                if not await renew_lease(job):
+                    # Reclaimed by another worker after a stall; its result will win
+                    self.lost_leases += 1
+                    print(f"⚠️ Lost the lease on {job['kind']} job {job['_id']}")
+                    return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Could not renew the lease on job {job['_id']}: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "slots": len(self._tasks),
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "dead": self.dead,
+            "lost_leases": self.lost_leases,
+        }
@@ -0,0 +1,160 @@
+"""
+Single-pass JSON extraction and repair for LLM output.
+
+Models wrap the object in prose or code fences, leave trailing commas, and
+get cut off at the token limit. repair_json finds the first top-level
+object and fixes the defects that can be fixed without guessing:
+
+- text before the opening brace and after the matching closing brace
+- trailing commas before } or ]
+- a missing comma between adjacent array elements or object members
+- raw newlines and tabs inside strings
+- truncation: the output is cut back to the last complete top-level member
+  or element of a top-level array, and the open brackets are closed
+
+Anything else raises JSONRepairError, which is the signal to ask the model
+again rather than store placeholder content.
+"""
+
+import json
+
+CLOSERS = {"{": "}", "[": "]"}
+# Previous significant character after which a new value needs a separator
+VALUE_END = ("}", "]", '"', "v")
+
+
+class JSONRepairError(ValueError):
+    pass
+
+
+def at_safe_level(stack) -> bool:
+    """
+    True directly inside the top-level object or one of its arrays. Truncated
+    output is cut back to a boundary at this level, so a partially written
+    lesson section or quiz question is dropped whole rather than kept with
+    missing fields.
+    """
+    return len(stack) == 1 or (len(stack) == 2 and stack[1] == "[")
+
+
+def repair_json(text: str):
+    """Return (value, repaired), where repaired says whether the text needed fixing"""
+    start = text.find("{")
+    if start < 0:
+        raise JSONRepairError("No JSON object in model output")
+
+    # Fast path: well-formed output, possibly wrapped in prose
+    end = text.rfind("}") + 1
+    try:
+        return json.loads(text[start:end]), False
+    except json.JSONDecodeError:
+        pass
+
+    out = []
+    stack = []
+    repaired = False
+    in_string = False
+    escape = False
+    string_is_value = False
+    prev = ""  # Last significant character written outside strings
+    safe_len, safe_stack = 0, []  # Where to cut back to if the text is truncated
+
+    i = start
+    n = len(text)
+    while i < n:
+        c = text[i]
+
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+                prev = '"'
+                out.append(c)
+                if string_is_value and at_safe_level(stack):
+                    safe_len, safe_stack = len(out), list(stack)
+                i += 1
+                continue
+            elif c in "\n\r\t":
+                out.append({"\n": "\\n", "\r": "\\r", "\t": "\\t"}[c])
+                repaired = True
+                i += 1
+                continue
+            out.append(c)
+            i += 1
+            continue
+
+        if c in " \n\r\t":
+            i += 1
+            continue
+
+        if c == ",":
+            # Trailing comma: drop it if the container closes next
+            j = i + 1
+            while j < n and text[j] in " \n\r\t":
+                j += 1
+            if j < n and text[j] in "}]":
+                repaired = True
+            else:
+                if at_safe_level(stack):
+                    safe_len, safe_stack = len(out), list(stack)
+                out.append(c)
+                prev = c
+            i += 1
+            continue
+
+        if c in "{[\"" and prev in VALUE_END:
+            # Adjacent array elements or object members without a separator
+            if stack[-1] == "[" or c == '"':
+                out.append(",")
+                prev = ","
+                repaired = True
+
+        if c == '"':
+            string_is_value = not (stack[-1] == "{" and prev in ("{", ","))
+            in_string = True
+            out.append(c)
+            i += 1
+            continue
+
+        if c in "{[":
+            stack.append(c)
+            out.append(c)
+            prev = c
+            if len(stack) == 1:
+                safe_len, safe_stack = len(out), list(stack)
+            i += 1
+            continue
+
+        if c in "}]":
+            if not stack or CLOSERS[stack[-1]] != c:
+                raise JSONRepairError(f"Unbalanced {c!r} at offset {i}")
+            stack.pop()
+            out.append(c)
+            prev = c
+            i += 1
+            if not stack:
+                break
+            if at_safe_level(stack):
+                safe_len, safe_stack = len(out), list(stack)
+            continue
+
+        # Numbers, true/false/null and the key/value colon
+        out.append(c)
+        prev = c if c == ":" else "v"
+        i += 1
+        if c != ":" and i < n and text[i] in ",}] \n\r\t" and at_safe_level(stack):
+            safe_len, safe_stack = len(out), list(stack)
+
+    if stack:
+        # Truncated: keep only what was complete and close what was open
+        repaired = True
+        out = out[:safe_len]
+        out.extend(CLOSERS[opener] for opener in reversed(safe_stack))
+
+    try:
+        return json.loads("".join(out), strict=False), repaired
+    except json.JSONDecodeError as e:
+        raise JSONRepairError(f"Unrepairable JSON: {e}")
@@ -0,0 +1,89 @@
+"""
+Incremental JSON scanner for streamed LLM output.
+
+The model is asked for a single JSON object such as
+    {"summary": "...", "lesson": [{...}, {...}], "quiz": [{...}]}
+and the text arrives in small chunks. JSONStreamScanner is fed those chunks
+and reports each top-level string value and each element of a top-level
+array as soon as its closing quote/brace has been seen, without re-parsing
+the text received so far. Prose before the opening brace is skipped.
+"""
+
+import json
+
+
+class JSONStreamScanner:
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._key = None
+        self._expect_value = False
+        self._element_start = None
+
+    def feed(self, chunk: str):
+        """Consume a chunk and return a list of (key, value) pairs completed by it"""
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+
+        for i in range(self._pos, len(buffer)):
+            c = buffer[i]
+            depth = len(self._stack)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if depth == 1:
+                        value = json.loads(buffer[self._string_start:i + 1])
+                        if self._expect_value:
+                            completed.append((self._key, value))
+                            self._expect_value = False
+                        else:
+                            self._last_string = value
+                continue
+
+            if depth == 0:
+                # Skip anything the model wrote before the JSON object
+                if c == "{":
+                    self._stack.append(c)
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._stack.append(c)
+                if len(self._stack) == 3 and self._stack[1] == "[":
+                    self._element_start = i
+            elif c in "}]":
+                if len(self._stack) == 3 and self._element_start is not None:
+                    try:
+                        completed.append((self._key, json.loads(buffer[self._element_start:i + 1])))
+                    except json.JSONDecodeError:
+                        pass  # Malformed element; the final parse decides what to keep
+                    self._element_start = None
+                self._stack.pop()
+                if len(self._stack) == 1:
+                    self._expect_value = False
+            elif depth == 1 and c == ":":
+                self._key = self._last_string
+                self._expect_value = True
+            elif depth == 1 and c == ",":
+                self._expect_value = False
+
+        self._pos = len(buffer)
+        return completed
+
+    @property
+    def complete(self) -> bool:
+        """True once the outer object has been closed"""
+        return self._pos > 0 and not self._stack and "{" in self.buffer
@@ -0,0 +1,341 @@
+"""
+Deduplicated lesson generation.
+
+Concurrent requests for the same lesson inside one process share a single
+in-flight task. Across uvicorn workers, a worker must first claim the lesson
+document with an atomic find_one_and_update before calling OpenAI; the other
+workers poll the document until the content lands (or the claim goes stale).
+"""
+
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument, UpdateOne
+
+from app.models.lesson import Lesson
+from app.models.roadmap import Roadmap
+from app.services.roadmap_outline import update_outline, lesson_ref_id
+from app.services.response_cache import response_cache
+from app.services.chatgpt_service import (
+    generate_lesson_plan_and_quiz,
+    stream_lesson_plan_and_quiz,
+    lesson_events,
+)
+
+# A claim older than this is considered abandoned (e.g. the worker crashed)
+CLAIM_TIMEOUT_SECONDS = float(os.getenv("LESSON_CLAIM_TIMEOUT_SECONDS", 120))
+CLAIM_POLL_INTERVAL_SECONDS = float(os.getenv("LESSON_CLAIM_POLL_INTERVAL_SECONDS", 0.5))
+# Upper bound on concurrent OpenAI calls made by one batch generation request
+BATCH_GENERATION_CONCURRENCY = int(os.getenv("BATCH_GENERATION_CONCURRENCY", 5))
+
+_inflight = {}
+
+
+class LessonNotFound(Exception):
+    pass
+
+
+class RoadmapNotFound(Exception):
+    pass
+
+
+def is_generated(lesson_data) -> bool:
+    return bool(lesson_data.get("lesson"))
+
+
+async def get_or_generate_lesson(lesson_id):
+    """
+    Return the lesson content for lesson_id, generating it at most once
+    no matter how many callers ask concurrently.
+    """
+    key = str(lesson_id)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_generate_with_claim(lesson_id))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    # Shield so a disconnecting client doesn't cancel the generation for everyone else
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if task.cancelled():
+            # Cancelled by cancel_generation: the lesson is being deleted
+            raise LessonNotFound(key)
+        raise
+
+
+def cancel_generation(lesson_id):
+    """
+    Cancel this process's get_or_generate_lesson task for lesson_id, e.g.
+    because its roadmap was deleted; its claim is released and every caller
+    gets LessonNotFound. Streamed and batch generations are left to their
+    requests.
+    """
+    task = _inflight.get(str(lesson_id))
+    if isinstance(task, asyncio.Task):
+        task.cancel()
+
+
+async def _try_claim(lesson_id, claim_token):
+    """Atomically claim an ungenerated lesson; returns the lesson doc or None"""
+    now = datetime.now(timezone.utc)
+    return await Lesson.get_motor_collection().find_one_and_update(
+        _claimable_filter(lesson_id, now),
+        {"$set": {"generation_claimed_at": now, "generation_claim": claim_token}},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _claimable_filter(lesson_id_match, now):
+    """Ungenerated lessons that nobody holds a live claim on"""
+    return {
+        "_id": lesson_id_match,
+        "lesson.0": {"$exists": False},
+        "$or": [
+            {"generation_claimed_at": {"$exists": False}},
+            {"generation_claimed_at": {"$lt": now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)}},
+        ],
+    }
+
+
+async def _release_claim(lesson_id, claim_token):
+    """Release a claim so another request can retry straight away"""
+    await Lesson.get_motor_collection().update_one(
+        {"_id": lesson_id, "generation_claim": claim_token},
+        {"$unset": {"generation_claimed_at": "", "generation_claim": ""}}
+    )
+
+
+async def _store_generated(lesson_id, generated):
+    await Lesson.get_motor_collection().update_one(
+        {"_id": lesson_id},
+        {
+            "$set": {
+                "summary": generated["summary"],
+                "lesson": generated["lesson"],
+                "quiz": generated["quiz"]
+            },
+            "$unset": {"generation_claimed_at": "", "generation_claim": ""},
+        }
+    )
+    await update_outline(lesson_id, summary=generated["summary"])
+    response_cache.invalidate_lesson(lesson_id)
+
+
+def _topic_from_title(title):
+    return title.split(":")[0].strip()  # crude fallback from title
+
+
+async def _find_lesson(lesson_id):
+    lesson_data = await Lesson.get_motor_collection().find_one({"_id": lesson_id})
+    if not lesson_data:
+        raise LessonNotFound(str(lesson_id))
+    return lesson_data
+
+
+async def _generate_with_claim(lesson_id):
+    claim_token = uuid.uuid4().hex
+
+    while True:
+        lesson_data = await _find_lesson(lesson_id)
+        if is_generated(lesson_data):
+            return lesson_data  # Already generated
+
+        claimed = await _try_claim(lesson_id, claim_token)
+        if claimed:
+            return await _generate_claimed(claimed, claim_token)
+
+        # Another worker holds the claim; wait for its result
+        await asyncio.sleep(CLAIM_POLL_INTERVAL_SECONDS)
+
+
+async def _generate_claimed(lesson_data, claim_token):
+    title = lesson_data.get("title")
+    try:
+        generated = await generate_lesson_plan_and_quiz(
+            lesson_data.get("day"), title, _topic_from_title(title)
+        )
+    except BaseException:
+        await _release_claim(lesson_data["_id"], claim_token)
+        raise
+
+    await _store_generated(lesson_data["_id"], generated)
+    return generated
+
+
+async def stream_lesson(lesson_id):
+    """
+    Yield (event, data) pairs for a lesson as its content becomes available.
+
+    Already generated lessons are replayed from Mongo. If this process or
+    another worker is already generating the lesson, the result is awaited
+    and then replayed. Otherwise the lesson is claimed and streamed from
+    OpenAI section by section, then persisted once complete.
+    """
+    key = str(lesson_id)
+    lesson_data = await _find_lesson(lesson_id)
+    claim_token = uuid.uuid4().hex
+    claimed = None
+
+    if not is_generated(lesson_data) and key not in _inflight:
+        claimed = await _try_claim(lesson_id, claim_token)
+
+    if not claimed:
+        if not is_generated(lesson_data):
+            lesson_data = await get_or_generate_lesson(lesson_id)
+        for event in lesson_events(lesson_data):
+            yield event
+        yield "done", lesson_data
+        return
+
+    # Let non-streaming requests for this lesson share the streamed result
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    future.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    title = claimed.get("title")
+    try:
+        async for event, data in stream_lesson_plan_and_quiz(
+            claimed.get("day"), title, _topic_from_title(title)
+        ):
+            if event == "done":
+                await _store_generated(lesson_id, data)
+                future.set_result(data)
+            yield event, data
+    finally:
+        if not future.done():
+            # Stream failed or the client went away before the end
+            await _release_claim(lesson_id, claim_token)
+            future.set_exception(RuntimeError("Lesson stream ended before completion"))
+            # Mark retrieved so an unawaited future doesn't log a warning
+            future.exception()
+
+
+async def generate_roadmap_lessons(roadmap_id):
+    """
+    Generate every missing lesson of a roadmap concurrently.
+
+    Yields one status dict per lesson as it finishes (`already_generated`,
+    `generated`, `generated_elsewhere` or `failed`). All missing lessons are
+    claimed with one update_many, generated with at most
+    BATCH_GENERATION_CONCURRENCY OpenAI calls in flight, and the results are
+    written with one bulk_write per collection at the end.
+    """
+    roadmap = await Roadmap.get_motor_collection().find_one({"_id": roadmap_id}, {"lessons": 1})
+    if not roadmap:
+        raise RoadmapNotFound(str(roadmap_id))
+
+    lesson_ids = [lesson_ref_id(ref) for ref in roadmap.get("lessons", [])]
+    lessons_collection = Lesson.get_motor_collection()
+    lessons = await lessons_collection.find(
+        {"_id": {"$in": [lesson_id for lesson_id in lesson_ids if lesson_id is not None]}},
+        {"day": 1, "title": 1, "lesson": {"$slice": 1}}
+    ).sort("day", 1).to_list(length=None)
+
+    missing = []
+    for lesson_data in lessons:
+        if is_generated(lesson_data):
+            yield _batch_status(lesson_data, "already_generated")
+        else:
+            missing.append(lesson_data)
+    if not missing:
+        return
+
+    # Claim every missing lesson nobody else is generating in one round trip
+    claim_token = uuid.uuid4().hex
+    now = datetime.now(timezone.utc)
+    await lessons_collection.update_many(
+        _claimable_filter({"$in": [lesson_data["_id"] for lesson_data in missing]}, now),
+        {"$set": {"generation_claimed_at": now, "generation_claim": claim_token}}
+    )
+    claimed_ids = {
+        doc["_id"] async for doc in lessons_collection.find({"generation_claim": claim_token}, {"_id": 1})
+    }
+
+    # Single requests for these lessons in this process share our results
+    futures = {}
+    for lesson_id in claimed_ids:
+        futures[lesson_id] = asyncio.get_running_loop().create_future()
+        _inflight[str(lesson_id)] = futures[lesson_id]
+
+    semaphore = asyncio.Semaphore(BATCH_GENERATION_CONCURRENCY)
+
+    async def run(lesson_data):
+        try:
+            if lesson_data["_id"] not in claimed_ids:
+                # Claimed by another request or worker; wait for its result
+                await get_or_generate_lesson(lesson_data["_id"])
+                return lesson_data, "generated_elsewhere", None
+            async with semaphore:
+                title = lesson_data.get("title")
+                generated = await generate_lesson_plan_and_quiz(
+                    lesson_data.get("day"), title, _topic_from_title(title)
+                )
+            return lesson_data, "generated", generated
+        except Exception as e:
+            print(f"⚠️ Batch generation of lesson {lesson_data['_id']} failed: {str(e)}")
+            return lesson_data, "failed", None
+
+    tasks = [asyncio.ensure_future(run(lesson_data)) for lesson_data in missing]
+    results = {}
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            lesson_data, status, generated = await next_done
+            if generated is not None:
+                results[lesson_data["_id"]] = generated
+            yield _batch_status(lesson_data, status)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await _finish_batch(roadmap_id, claim_token, claimed_ids, results, futures)
+
+
+async def _finish_batch(roadmap_id, claim_token, claimed_ids, results, futures):
+    """Persist a batch's results with bulk writes and release what wasn't generated"""
+    lessons_collection = Lesson.get_motor_collection()
+    try:
+        if results:
+            await lessons_collection.bulk_write([
+                UpdateOne(
+                    {"_id": lesson_id, "generation_claim": claim_token},
+                    {
+                        "$set": {
+                            "summary": generated["summary"],
+                            "lesson": generated["lesson"],
+                            "quiz": generated["quiz"]
+                        },
+                        "$unset": {"generation_claimed_at": "", "generation_claim": ""},
+                    }
+                )
+                for lesson_id, generated in results.items()
+            ], ordered=False)
+            await Roadmap.get_motor_collection().bulk_write([
+                UpdateOne(
+                    {"_id": roadmap_id, "outline.lesson_id": lesson_id},
+                    {"$set": {"outline.$.summary": generated["summary"]}}
+                )
+                for lesson_id, generated in results.items()
+            ], ordered=False)
+
+        unfinished = [lesson_id for lesson_id in claimed_ids if lesson_id not in results]
+        if unfinished:
+            await lessons_collection.update_many(
+                {"_id": {"$in": unfinished}, "generation_claim": claim_token},
+                {"$unset": {"generation_claimed_at": "", "generation_claim": ""}}
+            )
+    finally:
+        for lesson_id, future in futures.items():
+            _inflight.pop(str(lesson_id), None)
+            response_cache.invalidate_lesson(lesson_id)
+            if lesson_id in results:
+                future.set_result(results[lesson_id])
+            else:
+                future.set_exception(RuntimeError("Batch generation did not produce this lesson"))
+                future.exception()  # Mark retrieved so an unawaited future doesn't log a warning
+
+
+def _batch_status(lesson_data, status):
+    return {"day": lesson_data.get("day"), "lesson_id": str(lesson_data["_id"]), "status": status}
@@ -0,0 +1,304 @@
+"""
+Shared outbound gateway for LLM provider calls.
+
+Every OpenAI and Gemini request goes through a ProviderGateway, which applies,
+in order:
+  - a circuit breaker that fails fast while the provider keeps erroring
+  - token buckets sized to the provider's requests/minute and tokens/minute
+  - a concurrency cap on in-flight requests
+  - retries on 429/5xx/connection errors with exponential backoff and full
+    jitter, honouring Retry-After when the provider sends one
+and records queue-wait and upstream-latency metrics.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import deque
+
+import httpx
+
+from app.services.metrics import llm_requests, llm_request_duration, llm_tokens
+from app.services.tracing import span
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open"""
+
+
+class TokenBucket:
+    """Classic token bucket: `capacity` tokens, refilled continuously at `rate` per second"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        # Requests larger than the bucket would never fit; let them drain it instead
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount: float):
+        """Charge (or refund) the difference once the real usage is known; may go negative"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; lets one probe through after `reset_timeout`"""
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """Raise while open; returns True if this call is the half-open probe"""
+        state = self.state
+        if state == "open" or (state == "half_open" and self._probing):
+            raise CircuitOpenError("circuit breaker is open")
+        if state == "half_open":
+            self._probing = True
+            return True
+        return False
+
+    def end_probe(self):
+        """A probe that ended without an outcome (e.g. cancelled): let the next call probe instead"""
+        self._probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.failures >= self.threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+def error_status(error):
+    """HTTP status of a provider error, if it carries one"""
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    return status
+
+
+def is_retryable(error) -> bool:
+    if isinstance(error, (httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    # The OpenAI SDK is imported lazily; if it isn't loaded, this isn't its error
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(error, openai.APIConnectionError):
+        return True
+    status = error_status(error)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def retry_after_seconds(error):
+    """Seconds from a Retry-After header on the error's response, if present"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class ProviderGateway:
+    def __init__(
+        self,
+        name: str,
+        rpm: int,
+        tpm: int,
+        max_concurrency: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        breaker_threshold: int,
+        breaker_reset: float,
+    ):
+        self.name = name
+        self.requests = TokenBucket(rpm, rpm / 60)
+        self.tokens = TokenBucket(tpm, tpm / 60)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.waiting = 0
+        self.in_flight = 0
+        self.counters = {"calls": 0, "retries": 0, "failures": 0, "rejected_open_circuit": 0}
+        self.queue_wait = deque(maxlen=1000)
+        self.upstream_latency = deque(maxlen=1000)
+
+    async def call(self, request, estimated_tokens: int = 0, usage_tokens=None, model: str = ""):
+        """
+        Run `request()` (a coroutine factory) under the gateway's limits.
+        `usage_tokens(result)` may return the real token count so the TPM
+        bucket can be corrected after the call.
+        """
+        self.counters["calls"] += 1
+        started_at = time.monotonic()
+        outcome = "error"
+        with span(f"llm.{self.name}", model=model, estimated_tokens=estimated_tokens) as call_span:
+            try:
+                result = await self._call_with_retries(request, estimated_tokens)
+                outcome = "ok"
+            except CircuitOpenError:
+                outcome = "circuit_open"
+                raise
+            finally:
+                llm_requests.inc((self.name, model, outcome))
+                llm_request_duration.observe(time.monotonic() - started_at, (self.name, model))
+
+            if usage_tokens is not None:
+                actual = usage_tokens(result)
+                if actual:
+                    self.tokens.adjust(actual - estimated_tokens)
+                    llm_tokens.inc((self.name, model), actual)
+                    if call_span is not None:
+                        call_span.attrs["tokens"] = actual
+            return result
+
+    async def _call_with_retries(self, request, estimated_tokens):
+        attempt = 0
+        while True:
+            try:
+                probe = self.breaker.before_call()
+            except CircuitOpenError:
+                self.counters["rejected_open_circuit"] += 1
+                raise
+
+            try:
+                result = await self._attempt(request, estimated_tokens)
+            except Exception as error:
+                retryable = is_retryable(error)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # A bad request says nothing about provider health
+                    self.breaker.record_success()
+                if not retryable or attempt >= self.max_retries:
+                    self.counters["failures"] += 1
+                    raise
+                attempt += 1
+                self.counters["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt, error))
+                continue
+            finally:
+                # A cancelled call (e.g. a hedge loser) is neither a success nor a
+                # failure, but it must not keep the probe slot forever
+                if probe:
+                    self.breaker.end_probe()
+
+            self.breaker.record_success()
+            return result
+
+    async def _attempt(self, request, estimated_tokens):
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            # Rate limit before taking a slot, so callers waiting for tokens
+            # don't hold slots that calls ready to go could use
+            with span("gateway.rate_limit"):
+                await self.requests.acquire(1)
+                await self.tokens.acquire(estimated_tokens)
+            with span("gateway.wait_for_slot"):
+                await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            self.queue_wait.append(time.monotonic() - queued_at)
+
+            self.in_flight += 1
+            started_at = time.monotonic()
+            try:
+                with span("upstream"):
+                    return await request()
+            finally:
+                self.in_flight -= 1
+                self.upstream_latency.append(time.monotonic() - started_at)
+        finally:
+            self.semaphore.release()
+
+    def _backoff(self, attempt, error):
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "circuit": self.breaker.state,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "queue_wait_p50_s": _percentile(self.queue_wait, 50),
+            "queue_wait_p95_s": _percentile(self.queue_wait, 95),
+            "upstream_latency_p50_s": _percentile(self.upstream_latency, 50),
+            "upstream_latency_p95_s": _percentile(self.upstream_latency, 95),
+        }
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))], 4)
+
+
+def estimate_tokens(text: str, completion_tokens: int) -> int:
+    """Rough token estimate for rate limiting: ~4 characters per prompt token"""
+    return len(text) // 4 + completion_tokens
+
+
+def _gateway_from_env(name: str, rpm: int, tpm: int, max_concurrency: int) -> ProviderGateway:
+    prefix = name.upper()
+    return ProviderGateway(
+        name,
+        rpm=int(os.getenv(f"{prefix}_RPM", rpm)),
+        tpm=int(os.getenv(f"{prefix}_TPM", tpm)),
+        max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", max_concurrency)),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", 4)),
+        backoff_base=float(os.getenv("LLM_BACKOFF_BASE_SECONDS", 0.5)),
+        backoff_max=float(os.getenv("LLM_BACKOFF_MAX_SECONDS", 20)),
+        breaker_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", 5)),
+        breaker_reset=float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30)),
+    )
+
+
+openai_gateway = _gateway_from_env("openai", rpm=500, tpm=300000, max_concurrency=8)
+gemini_gateway = _gateway_from_env("gemini", rpm=60, tpm=1000000, max_concurrency=8)
@@ -0,0 +1,285 @@
+"""
+Prometheus metrics for the API, MongoDB and the LLM providers.
+
+A small in-process registry rendered in the Prometheus text format by
+GET /metrics. MetricsMiddleware times every HTTP request per route
+template and tracks how many are in flight; MongoCommandListener counts
+Mongo commands globally and per request (a route whose commands-per-request
+histogram grows with the data is an N+1); the LLM gateway records call
+latency, outcome and token usage per provider. The stats() of the existing
+in-process components are exported as gauges alongside.
+"""
+
+import re
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from pymongo import monitoring
+from starlette.routing import compile_path
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+COMMAND_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labelnames, labels, extra="") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}{_label_text(self.labelnames, labels)} {value}"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, labels, value):
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        series = self._values.get(labels)
+        if series is None:
+            # Per-bucket counts (last slot is +Inf), then sum
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, series in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = _label_text(self.labelnames, labels, f'le="{bound}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            label_text = _label_text(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {series[-1]}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.stats_sources = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self._register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self._register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self._register(Histogram(*args, **kwargs))
+
+    def register_stats(self, component: str, stats):
+        """Export the numeric leaves of a component's stats() dict as gauges"""
+        self.stats_sources.append((component, stats))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for component, stats in self.stats_sources:
+            try:
+                lines.extend(_render_stats(f"dinolearn_{component}", stats()))
+            except Exception as e:
+                print(f"⚠️ Could not collect {component} stats: {str(e)}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name).lower()
+
+
+def _render_stats(prefix: str, stats: dict):
+    for key, value in stats.items():
+        name = f"{prefix}_{_metric_name(str(key))}"
+        if isinstance(value, dict):
+            yield from _render_stats(name, value)
+        elif isinstance(value, bool):
+            yield f"{name} {int(value)}"
+        elif isinstance(value, (int, float)):
+            yield f"{name} {value}"
+        elif isinstance(value, str):
+            # State strings such as a circuit breaker's "closed"/"open"
+            yield f'{name}{{state="{_escape(value)}"}} 1'
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status",
+    ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route")
+)
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled",
+    ("method", "route")
+)
+mongo_commands = registry.counter(
+    "mongo_commands_total", "MongoDB commands sent, by command name", ("command",)
+)
+mongo_command_duration = registry.histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ("command",)
+)
+mongo_commands_per_request = registry.histogram(
+    "mongo_commands_per_request", "MongoDB commands issued while handling one HTTP request",
+    ("method", "route"), buckets=COMMAND_COUNT_BUCKETS
+)
+llm_requests = registry.counter(
+    "llm_requests_total", "LLM provider calls by outcome (ok, error, circuit_open)",
+    ("provider", "model", "outcome")
+)
+llm_request_duration = registry.histogram(
+    "llm_request_duration_seconds", "LLM call latency including rate limiting and retries",
+    ("provider", "model"), buckets=LLM_BUCKETS
+)
+llm_tokens = registry.counter(
+    "llm_tokens_total", "Tokens used by LLM calls as reported by the provider",
+    ("provider", "model")
+)
+llm_fallbacks = registry.counter(
+    "llm_fallbacks_total", "Generations answered with placeholder content", ("kind",)
+)
+
+
+class RequestStats:
+    __slots__ = ("mongo_commands",)
+
+    def __init__(self):
+        self.mongo_commands = 0
+
+
+# Set for the duration of each HTTP request; Motor copies the context into
+# the executor threads that run pymongo, so the listener sees it
+_request_stats = ContextVar("request_stats", default=None)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        mongo_commands.inc((event.command_name,))
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.mongo_commands += 1
+
+    def succeeded(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1e6, (event.command_name,))
+
+    def failed(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1e6, (event.command_name,))
+
+
+mongo_listener = MongoCommandListener()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route latency, status, in-flight and Mongo command counts"""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        labels = (method, self._route_template(scope))
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        http_in_flight.inc(labels)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_duration.observe(time.perf_counter() - started_at, labels)
+            http_in_flight.dec(labels)
+            http_requests.inc(labels + (status[0],))
+            mongo_commands_per_request.observe(stats.mongo_commands, labels)
+            _request_stats.reset(token)
+
+    def _route_template(self, scope) -> str:
+        if self._routes is None:
+            self._routes = _route_patterns(scope["app"])
+        path = scope["path"]
+        for path_regex, template in self._routes:
+            if path_regex.match(path):
+                return template
+        # Unknown paths share one label so 404 scans can't blow up cardinality
+        return "unmatched"
+
+
+def _route_patterns(app):
+    """
+    (regex, template) for every route, built once on the first request. Routes
+    from included routers are taken from the OpenAPI paths, which carry the
+    full prefixed template whether or not the router was flattened into
+    app.routes.
+    """
+    patterns = [
+        (route.path_regex, route.path)
+        for route in app.routes
+        if getattr(route, "path_regex", None) is not None
+    ]
+    known = {template for _, template in patterns}
+    for template in app.openapi().get("paths", {}):
+        if template not in known:
+            patterns.append((compile_path(template)[0], template))
+            known.add(template)
+    return patterns
@@ -0,0 +1,123 @@
+"""
+Background pre-generation of lesson content.
+
+After a roadmap is created, its placeholder lessons are queued here so the
+content is usually ready before the user opens them. Day 1 lessons have the
+highest priority across all roadmaps, then day 2, and so on. A fixed number of
+workers caps how many generations run at once. Deleting a roadmap drops its
+queued lessons and cancels the ones being generated.
+"""
+
+import asyncio
+import itertools
+import os
+import time
+
+from app.models.roadmap import Roadmap
+from app.services.lesson_generation import get_or_generate_lesson, cancel_generation, LessonNotFound
+
+PREGENERATE_LESSONS = os.getenv("PREGENERATE_LESSONS", "true").lower() == "true"
+PREGENERATION_CONCURRENCY = int(os.getenv("PREGENERATION_CONCURRENCY", 2))
+
+
+class PregenerationPool:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._queue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._workers = []
+        self._pending = {}
+        self._cancelled = set()
+        # roadmap_id -> ids of its lessons the workers are generating now
+        self._running = {}
+        self.generated = 0
+        self.failed = 0
+        self.skipped = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    def start(self):
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.concurrency)
+        ]
+        print(f"Lesson pre-generation started with {self.concurrency} workers")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def schedule_roadmap(self, roadmap_id, lessons):
+        """Queue every lesson of a roadmap, prioritised by day"""
+        for lesson in lessons:
+            self._pending[roadmap_id] = self._pending.get(roadmap_id, 0) + 1
+            self._queue.put_nowait(
+                (lesson.day, next(self._sequence), time.monotonic(), roadmap_id, lesson.id)
+            )
+
+    def cancel_roadmap(self, roadmap_id):
+        """Drop the queued lessons of a roadmap and cancel the ones in progress (e.g. because it was deleted)"""
+        if self._pending.get(roadmap_id):
+            self._cancelled.add(roadmap_id)
+        for lesson_id in self._running.get(roadmap_id, ()):
+            cancel_generation(lesson_id)
+
+    async def _worker(self, index):
+        while True:
+            day, _, enqueued_at, roadmap_id, lesson_id = await self._queue.get()
+            try:
+                self.last_lag_seconds = time.monotonic() - enqueued_at
+                self.max_lag_seconds = max(self.max_lag_seconds, self.last_lag_seconds)
+
+                if roadmap_id in self._cancelled or not await Roadmap.get_motor_collection().count_documents(
+                    {"_id": roadmap_id}, limit=1
+                ):
+                    self.skipped += 1
+                    continue
+
+                running = self._running.setdefault(roadmap_id, set())
+                running.add(lesson_id)
+                try:
+                    await get_or_generate_lesson(lesson_id)
+                finally:
+                    running.discard(lesson_id)
+                    if not running:
+                        self._running.pop(roadmap_id, None)
+                self.generated += 1
+            except LessonNotFound:
+                self.skipped += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Pre-generation of lesson {lesson_id} (day {day}) failed: {str(e)}")
+            finally:
+                self._finish(roadmap_id)
+                self._queue.task_done()
+
+    def _finish(self, roadmap_id):
+        remaining = self._pending.get(roadmap_id, 1) - 1
+        if remaining > 0:
+            self._pending[roadmap_id] = remaining
+        else:
+            self._pending.pop(roadmap_id, None)
+            self._cancelled.discard(roadmap_id)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": PREGENERATE_LESSONS,
+            "workers": len(self._workers),
+            "queue_depth": self._queue.qsize(),
+            "roadmaps_pending": len(self._pending),
+            "generated": self.generated,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "last_lag_seconds": round(self.last_lag_seconds, 3),
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+        }
+
+
+pregeneration_pool = PregenerationPool(PREGENERATION_CONCURRENCY)
@@ -0,0 +1,118 @@
+"""
+In-process response cache for GET /api/roadmaps/{id} and GET /api/lessons/{id}.
+
+Each entry holds the serialized JSON body and a strong ETag derived from it,
+so a hit costs no Mongo query and no serialization, and a matching
+If-None-Match is answered with 304. Writes to a lesson (generation,
+completion, deletion) invalidate the lesson and every cached roadmap that
+embeds it. Entries also expire after RESPONSE_CACHE_TTL_SECONDS, which bounds
+staleness when another worker process did the write.
+
+Content that is still going to be generated is never cached: a placeholder
+lesson, or a roadmap with one, is filled in by whichever process generates
+it (app.worker, pre-generation, another uvicorn worker), and this process
+would not hear about it. Once generated, only a completion in another
+process can leave an entry stale, for at most the TTL. Ids are normalized
+through ObjectId, so equivalent id strings share one entry.
+"""
+
+import hashlib
+import os
+
+from bson import ObjectId
+from fastapi import Response
+
+from app.services.cache_service import LRUCache
+from app.services.serialization import dumps
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2048))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 30))
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.entries = LRUCache(max_entries, ttl)
+        # lesson id -> ids of cached roadmaps whose outline includes it
+        self._lesson_roadmaps = LRUCache(max_entries * 16, ttl)
+        self._writes = 0
+        self.not_modified = 0
+
+    def read_token(self) -> int:
+        """Taken before reading from Mongo; a write in between makes `set` a no-op"""
+        return self._writes
+
+    def get(self, kind: str, doc_id):
+        return self.entries.get((kind, _normalize(doc_id)))
+
+    def set(self, kind: str, doc_id, content, read_token: int, lesson_ids=(), generated: bool = True):
+        """
+        Cache the serialized content and return its entry. With generated=False
+        (content still being generated, possibly by another process) the entry
+        is only returned, not cached.
+        """
+        entry = CachedResponse(dumps(content))
+        if read_token != self._writes or not generated:
+            # A write raced with this read, or one is still to come; serve it but don't cache it
+            return entry
+
+        doc_id = _normalize(doc_id)
+        self.entries.set((kind, doc_id), entry)
+        for lesson_id in lesson_ids:
+            lesson_id = _normalize(lesson_id)
+            roadmaps = self._lesson_roadmaps.get(lesson_id) or set()
+            roadmaps.add(doc_id)
+            self._lesson_roadmaps.set(lesson_id, roadmaps)
+        return entry
+
+    def invalidate_lesson(self, lesson_id):
+        lesson_id = _normalize(lesson_id)
+        self._writes += 1
+        self.entries.delete(("lesson", lesson_id))
+        for roadmap_id in self._lesson_roadmaps.get(lesson_id) or ():
+            self.entries.delete(("roadmap", roadmap_id))
+        self._lesson_roadmaps.delete(lesson_id)
+
+    def invalidate_roadmap(self, roadmap_id):
+        self._writes += 1
+        self.entries.delete(("roadmap", _normalize(roadmap_id)))
+
+    def respond(self, entry: CachedResponse, if_none_match) -> Response:
+        """Full 200 response, or an empty 304 if the client already has this version"""
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if if_none_match and etag_matches(entry.etag, if_none_match):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "hits": self.entries.hits,
+            "misses": self.entries.misses,
+            "evictions": self.entries.evictions,
+            "not_modified": self.not_modified,
+        }
+
+
+def _normalize(doc_id) -> str:
+    """Canonical string of an id, so e.g. upper- and lower-case hex share one entry (raises on invalid ids)"""
+    return str(ObjectId(doc_id))
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
@@ -0,0 +1,180 @@
+"""
+Roadmap creation, shared by POST /api/roadmaps and the roadmap generation job.
+
+A roadmap is either cloned from an existing one (explicitly with clone_from,
+or when reuse is on and an indexed topic is similar enough) or generated by
+Gemini as placeholder lessons, then written with one insert_many plus the
+roadmap insert and queued for background lesson pre-generation. With reuse
+off (the default), a similar enough roadmap is only suggested in the
+response, for the client to clone if the user wants it.
+"""
+
+from beanie import PydanticObjectId
+from bson import ObjectId
+
+from app.models.lesson import Lesson
+from app.models.roadmap import Roadmap
+from app.services.gemini_service import generate_roadmap_from_gemini
+from app.services.pregeneration import pregeneration_pool, PREGENERATE_LESSONS
+from app.services.roadmap_outline import build_outline, lesson_ref_id
+from app.services.db_session import maybe_transaction
+from app.services.topic_index import topic_index, ROADMAP_REUSE
+from app.services.tracing import span
+
+# Content fields copied when a roadmap is cloned; claims and completion are not
+LESSON_CLONE_PROJECTION = {"day": 1, "title": 1, "summary": 1, "lesson": 1, "quiz": 1}
+
+
+class CloneSourceNotFound(Exception):
+    pass
+
+
+async def create_roadmap_from_topic(topic: str, clone_from=None, reuse: bool = ROADMAP_REUSE, roadmap_id=None):
+    """
+    Create and store a roadmap for a topic. Returns (roadmap, topic, source
+    roadmap id or None if it was generated, similar roadmap suggested instead
+    of reused or None). roadmap_id fixes the new roadmap's _id, so a retried
+    job can find the roadmap it already wrote.
+    """
+    source_id = clone_from
+    similar = None
+    if source_id is None:
+        with span("roadmap.similar_topic_lookup"):
+            match = await find_similar(topic)
+        if match and reuse:
+            source_id = ObjectId(match["_id"])
+            print(f"♻️ Reusing roadmap for '{match['topic']}' (similarity {match['similarity']:.2f}) for '{topic}'")
+        else:
+            similar = match
+
+    with span("roadmap.clone_lessons"):
+        lesson_refs = await clone_lessons(source_id) if source_id else None
+    if not lesson_refs:
+        if clone_from:
+            raise CloneSourceNotFound(f"Roadmap with ID {clone_from} not found")
+        if source_id:
+            # Deleted by another worker since it was indexed
+            topic_index.remove(source_id)
+        source_id = None
+
+        with span("roadmap.generate"):
+            roadmap_data = await generate_roadmap_from_gemini(topic)
+        topic = roadmap_data["topic"]
+
+        # Store just placeholders for now. Ids are assigned up front so the
+        # roadmap can link the lessons without reading them back.
+        lesson_refs = [
+            Lesson(
+                id=PydanticObjectId(),
+                day=item["day"],
+                title=item["title"],
+                summary="",
+                lesson=[],
+                quiz=[]
+            )
+            for item in roadmap_data["roadmap"]
+        ]
+
+    roadmap = Roadmap(
+        id=roadmap_id or PydanticObjectId(),
+        title=f"{topic} Roadmap",
+        lessons=lesson_refs,
+        outline=build_outline(lesson_refs)
+    )
+
+    # One insert_many for all lessons plus the roadmap insert, atomically
+    # when the deployment supports transactions
+    with span("roadmap.insert", lessons=len(lesson_refs)):
+        async with maybe_transaction() as session:
+            await Lesson.insert_many(lesson_refs, session=session)
+            await roadmap.insert(session=session)
+    topic_index.add(roadmap.id, topic)
+
+    # Start generating lesson content in the background, day 1 first
+    pending = [lesson for lesson in lesson_refs if not lesson.lesson]
+    if PREGENERATE_LESSONS and pending:
+        pregeneration_pool.schedule_roadmap(roadmap.id, pending)
+
+    return roadmap, topic, source_id, similar
+
+
+async def find_similar(topic: str):
+    """The existing roadmap whose topic is similar enough to clone, as {_id, topic, similarity}, or None"""
+    await topic_index.refresh()
+    match = topic_index.most_similar(topic)
+    if not match:
+        return None
+    roadmap_id, matched_topic, score = match
+    return {"_id": str(roadmap_id), "topic": matched_topic, "similarity": round(score, 3)}
+
+
+def format_created_roadmap(roadmap: Roadmap, topic: str, similar=None) -> dict:
+    """
+    Response body of create_roadmap: the roadmap with its lessons inlined,
+    plus the similar roadmap the client may clone instead, if one was found
+    """
+    body = {
+        "_id": roadmap.id,
+        "title": roadmap.title,
+        "lessons": [
+            {
+                "_id": lesson.id,
+                "day": lesson.day,
+                "title": lesson.title,
+                "summary": lesson.summary,
+                "lesson": lesson.lesson,
+                "quiz": lesson.quiz,
+                "completed": lesson.completed,
+            }
+            for lesson in roadmap.lessons
+        ],
+        "outline": [
+            {
+                "lesson_id": item.lesson_id,
+                "day": item.day,
+                "title": item.title,
+                "summary": item.summary,
+                "completed": item.completed,
+            }
+            for item in roadmap.outline
+        ],
+        "roadmap_data": {
+            "topic": topic,
+            "roadmap": [
+                {"day": item.day, "title": item.title, "summary": item.summary}
+                for item in roadmap.outline
+            ]
+        }
+    }
+    if similar:
+        body["similar"] = similar
+    return body
+
+
+async def clone_lessons(roadmap_id):
+    """
+    Copy a roadmap's lessons, including any generated content, as new
+    uncompleted lessons. Returns None if the roadmap no longer exists.
+    """
+    source = await Roadmap.get_motor_collection().find_one({"_id": roadmap_id}, {"lessons": 1})
+    if not source:
+        return None
+
+    lesson_ids = [lesson_ref_id(ref) for ref in source.get("lessons", [])]
+    cursor = Lesson.get_motor_collection().find(
+        {"_id": {"$in": [lesson_id for lesson_id in lesson_ids if lesson_id is not None]}},
+        LESSON_CLONE_PROJECTION
+    ).sort("day", 1)
+
+    lessons = [
+        Lesson(
+            id=PydanticObjectId(),
+            day=lesson_data["day"],
+            title=lesson_data["title"],
+            summary=lesson_data.get("summary", ""),
+            lesson=lesson_data.get("lesson", []),
+            quiz=lesson_data.get("quiz", [])
+        )
+        async for lesson_data in cursor
+    ]
+    return lessons or None
@@ -0,0 +1,91 @@
+"""
+Helpers for the outline embedded in each roadmap document.
+
+The outline mirrors day/title/summary/completed of every lesson so roadmap
+reads are a single find_one. Every write that changes one of those lesson
+fields must also update the copy, normally through update_outline.
+"""
+
+from bson import ObjectId, DBRef
+from pymongo import UpdateMany
+
+from app.models.lesson import Lesson
+from app.models.roadmap import Roadmap, LessonOutline
+
+# Only the outline fields are needed when listing lessons under a roadmap
+LESSON_OUTLINE_PROJECTION = {"day": 1, "title": 1, "summary": 1, "completed": 1}
+
+
+def lesson_ref_id(lesson_ref):
+    """Extract the lesson ObjectId from a stored Link (DBRef, dict or raw id)"""
+    if isinstance(lesson_ref, DBRef):
+        return lesson_ref.id
+    if isinstance(lesson_ref, dict):
+        return lesson_ref.get("$id", lesson_ref.get("_id"))
+    if isinstance(lesson_ref, ObjectId):
+        return lesson_ref
+    if isinstance(lesson_ref, str) and ObjectId.is_valid(lesson_ref):
+        return ObjectId(lesson_ref)
+    return None
+
+
+def build_outline(lessons):
+    """Outline entries for freshly created Lesson documents, sorted by day"""
+    return [
+        LessonOutline(
+            lesson_id=lesson.id,
+            day=lesson.day,
+            title=lesson.title,
+            summary=lesson.summary,
+            completed=lesson.completed,
+        )
+        for lesson in sorted(lessons, key=lambda lesson: lesson.day)
+    ]
+
+
+async def fetch_lesson_outlines(raw_roadmaps):
+    """
+    Resolve the lesson refs of a page of roadmaps with a single $in query.
+    Returns a dict of roadmap _id -> lesson outline docs, sorted by day.
+    """
+    owners = {}
+    for raw_roadmap in raw_roadmaps:
+        for lesson_ref in raw_roadmap.get("lessons", []):
+            lesson_id = lesson_ref_id(lesson_ref)
+            if lesson_id is not None:
+                owners.setdefault(lesson_id, []).append(raw_roadmap["_id"])
+
+    lessons_by_roadmap = {raw_roadmap["_id"]: [] for raw_roadmap in raw_roadmaps}
+    if not owners:
+        return lessons_by_roadmap
+
+    cursor = Lesson.get_motor_collection().find(
+        {"_id": {"$in": list(owners)}},
+        LESSON_OUTLINE_PROJECTION
+    ).sort("day", 1)
+
+    # The cursor is already in day order, so appending keeps each list sorted
+    async for lesson_data in cursor:
+        for roadmap_id in owners[lesson_data["_id"]]:
+            lessons_by_roadmap[roadmap_id].append(lesson_data)
+
+    return lessons_by_roadmap
+
+
+async def update_outline(lesson_id, **fields):
+    """Positionally $set fields on the outline entry of lesson_id in its roadmap(s)"""
+    await Roadmap.get_motor_collection().update_many(
+        {"outline.lesson_id": lesson_id},
+        {"$set": {f"outline.$.{name}": value for name, value in fields.items()}}
+    )
+
+
+async def update_outlines(lesson_ids, **fields):
+    """update_outline for many lessons in a single bulk_write"""
+    if not lesson_ids:
+        return
+    update = {"$set": {f"outline.$.{name}": value for name, value in fields.items()}}
+    await Roadmap.get_motor_collection().bulk_write(
+        [UpdateMany({"outline.lesson_id": lesson_id}, update) for lesson_id in lesson_ids],
+        ordered=False
+    )
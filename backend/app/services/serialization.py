@@ -0,0 +1,38 @@
+"""
+orjson-based JSON serialization for API responses.
+
+FastAPI's default JSONResponse runs every body through jsonable_encoder,
+which walks the whole structure in Python, and cannot encode BSON ObjectIds,
+so handlers used to str() every `_id` by hand. FastJSONResponse is the app's
+default response class instead: raw Mongo documents and handler dicts go
+straight to orjson, which encodes datetimes natively and falls back to
+encode_default for ObjectId, DBRef and pydantic models.
+"""
+
+import orjson
+from bson import DBRef, ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def encode_default(value):
+    """Encode the types orjson doesn't know about"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, DBRef):
+        # Beanie stores Link fields as DBRefs; the id is what clients use
+        return str(value.id)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson, with ObjectId support"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,262 @@
+"""
+Host-wide shared store for LLM generation results.
+
+The in-process LRU in cache_service is per worker, so with N uvicorn/gunicorn
+workers a result generated by one of them is a miss in the other N-1 until
+they each fetch it from Mongo. This store is a single SQLite file in WAL mode
+that every worker process on the host opens: readers never block writers or
+each other, and with mmap_size set, reads are served straight from the
+memory-mapped database file (shared with the other processes through the page
+cache) instead of read() copies.
+
+The file is bounded by SHARED_CACHE_MAX_BYTES. A trigger-maintained byte
+count makes the size check O(1); when a write pushes it over the limit,
+expired entries and then the least recently used ones are deleted until it
+is back under SHARED_CACHE_LOW_WATER of the limit. Hits never write: the
+keys a process has read are remembered (at most once per
+SHARED_CACHE_TOUCH_SECONDS each) and their recency is updated by its next
+write, in the same transaction as any eviction.
+
+Reads use their own connection on the event loop thread (a WAL read never
+waits for a lock); writes go through a second connection in a worker
+thread, since they may wait up to SHARED_CACHE_BUSY_TIMEOUT_MS for another
+process's write lock. Opening the file and creating the schema can wait for
+that lock too, so it is done by open() at startup, also in a thread; until
+then reads are misses.
+
+The file defaults to a per-user cache directory created with 0700
+permissions, so other local users can't read or plant cached results.
+
+Any SQLite error is counted and treated as a miss; the store is an
+accelerator, Mongo stays the source of truth.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+import orjson
+
+from app.services.serialization import dumps
+
+SHARED_CACHE_ENABLED = os.getenv("SHARED_CACHE_ENABLED", "true").lower() == "true"
+SHARED_CACHE_PATH = os.getenv(
+    "SHARED_CACHE_PATH",
+    os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "dinolearn", "llm-cache.sqlite3")
+)
+SHARED_CACHE_MAX_BYTES = int(os.getenv("SHARED_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+SHARED_CACHE_TTL_SECONDS = float(os.getenv("SHARED_CACHE_TTL_SECONDS", os.getenv("LLM_CACHE_TTL_SECONDS", 24 * 3600)))
+SHARED_CACHE_LOW_WATER = 0.9
+SHARED_CACHE_TOUCH_SECONDS = 60
+# How long a statement waits for another process's write lock before giving up
+SHARED_CACHE_BUSY_TIMEOUT_MS = 200
+EVICTION_BATCH = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('total_bytes', 0), ('entries', 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE meta SET value = value + NEW.size WHERE name = 'total_bytes';
+    UPDATE meta SET value = value + 1 WHERE name = 'entries';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE meta SET value = value - OLD.size WHERE name = 'total_bytes';
+    UPDATE meta SET value = value - 1 WHERE name = 'entries';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE meta SET value = value - OLD.size + NEW.size WHERE name = 'total_bytes';
+END;
+"""
+
+
+class SharedStore:
+    """Size-bounded key/value store in a SQLite WAL file shared by all workers on the host"""
+
+    def __init__(self, path: str, max_bytes: int, ttl: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Larger values would evict a big part of the store for one entry
+        self.max_value_bytes = max_bytes // 16
+        self._connections = {}
+        self._pid = None
+        # Serializes the write connection between worker threads
+        self._write_lock = threading.Lock()
+        # key -> last read time, applied by the next write
+        self._touched = {}
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.skipped = 0
+        self.errors = 0
+
+    def _connect(self, role: str) -> sqlite3.Connection:
+        """The process's "read" or "write" connection, opened on first use"""
+        # Connections must not be used across fork(), e.g. gunicorn --preload
+        if self._pid != os.getpid():
+            self._connections = {}
+            self._touched = {}
+            self._pid = os.getpid()
+        connection = self._connections.get(role)
+        if connection is not None:
+            return connection
+
+        connection = sqlite3.connect(
+            self.path,
+            timeout=SHARED_CACHE_BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL only fsyncs at checkpoints; losing the last writes on power loss is fine for a cache
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA mmap_size={self.max_bytes * 2}")
+        # Truncate the WAL back to this size after checkpoints so the file stays bounded
+        connection.execute(f"PRAGMA journal_size_limit={self.max_bytes // 4}")
+        if role == "write":
+            connection.executescript(SCHEMA)
+        self._connections[role] = connection
+        return connection
+
+    async def open(self):
+        """Create the file and schema and open this process's connections"""
+        try:
+            await asyncio.to_thread(self._open)
+        except (sqlite3.Error, OSError) as e:
+            self.errors += 1
+            print(f"⚠️ Shared cache unavailable: {str(e)}")
+
+    def _open(self):
+        # Only created here, so a missing directory is never world-readable
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), mode=0o700, exist_ok=True)
+        with self._write_lock:
+            # The schema is created by the write connection, before anything reads
+            self._connect("write")
+            self._connect("read")
+
+    def get(self, key: str):
+        """The stored value, or None if missing or expired (a local SQLite read, no await needed)"""
+        now = time.time()
+        connection = self._connections.get("read") if self._pid == os.getpid() else None
+        if connection is None:
+            # Not opened in this process yet; that happens off the event loop, in open() or set()
+            self.misses += 1
+            return None
+        try:
+            row = connection.execute(
+                "SELECT value, expires_at, accessed_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"⚠️ Shared cache read failed: {str(e)}")
+            return None
+
+        if row is None or row[1] < now:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if row[2] < now - SHARED_CACHE_TOUCH_SECONDS:
+            self._touched[key] = now
+        return orjson.loads(row[0])
+
+    async def set(self, key: str, value):
+        """Store a value; the write (and any eviction) runs in a thread as it may wait for the file lock"""
+        body = dumps(value)
+        if len(body) > self.max_value_bytes:
+            self.skipped += 1
+            return
+        try:
+            await asyncio.to_thread(self._set, key, body)
+        except (sqlite3.Error, OSError) as e:
+            self.errors += 1
+            print(f"⚠️ Shared cache write failed: {str(e)}")
+
+    def _set(self, key: str, body: bytes):
+        if self._connections.get("read") is None or self._pid != os.getpid():
+            self._open()
+        now = time.time()
+        with self._write_lock:
+            connection = self._connect("write")
+            touched, self._touched = self._touched, {}
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                    [(accessed_at, touched_key) for touched_key, accessed_at in touched.items()]
+                )
+                # An upsert rather than INSERT OR REPLACE, whose implicit delete doesn't fire triggers
+                connection.execute(
+                    "INSERT INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                    "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+                    (key, body, len(body) + len(key), now + self.ttl, now)
+                )
+                if self._total_bytes(connection) > self.max_bytes:
+                    self._evict(connection, now)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        self.writes += 1
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        """Delete expired, then least recently used entries until under the low-water mark"""
+        self.evictions += connection.execute("DELETE FROM entries WHERE expires_at < ?", (now,)).rowcount
+        target = self.max_bytes * SHARED_CACHE_LOW_WATER
+        while self._total_bytes(connection) > target:
+            deleted = connection.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                (EVICTION_BATCH,)
+            ).rowcount
+            if not deleted:
+                break
+            self.evictions += deleted
+
+    @staticmethod
+    def _total_bytes(connection: sqlite3.Connection) -> int:
+        return connection.execute("SELECT value FROM meta WHERE name = 'total_bytes'").fetchone()[0]
+
+    def close(self):
+        with self._write_lock:
+            if self._pid == os.getpid():
+                for connection in self._connections.values():
+                    connection.close()
+            self._connections = {}
+
+    def stats(self) -> dict:
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "skipped_oversize": self.skipped,
+            "errors": self.errors,
+            "max_bytes": self.max_bytes,
+        }
+        if "read" not in self._connections:
+            # Not used yet in this process; don't create the file just for a scrape
+            return stats
+        try:
+            meta = dict(self._connections["read"].execute("SELECT name, value FROM meta").fetchall())
+            stats["bytes"] = meta.get("total_bytes", 0)
+            stats["entries"] = meta.get("entries", 0)
+        except sqlite3.Error as e:
+            print(f"⚠️ Shared cache stats failed: {str(e)}")
+        return stats
+
+
+shared_store = (
+    SharedStore(SHARED_CACHE_PATH, SHARED_CACHE_MAX_BYTES, SHARED_CACHE_TTL_SECONDS)
+    if SHARED_CACHE_ENABLED else None
+)
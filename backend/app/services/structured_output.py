@@ -0,0 +1,77 @@
+"""
+Parse, repair and validate structured LLM output.
+
+Every generation goes through parse_structured: extract and repair the JSON
+(json_repair), then validate it against the pydantic model for its shape.
+generate_structured asks the model again only when that fails, so a
+slightly malformed but usable generation is never thrown away. Counters per
+kind (lesson, prequiz, roadmap) show how often output was clean, needed
+repair, or had to be regenerated.
+"""
+
+import os
+from pydantic import ValidationError
+from app.services.json_repair import repair_json, JSONRepairError
+from app.services.tracing import span
+
+STRUCTURED_OUTPUT_RETRIES = int(os.getenv("STRUCTURED_OUTPUT_RETRIES", 1))
+
+
+class StructuredOutputError(ValueError):
+    """The model output could not be repaired into a valid document"""
+
+
+_stats = {}
+
+def _count(kind: str, outcome: str):
+    counters = _stats.setdefault(
+        kind, {"clean": 0, "repaired": 0, "unrepairable": 0, "invalid": 0, "retries": 0}
+    )
+    counters[outcome] += 1
+
+def parse_structured(text: str, schema, kind: str) -> dict:
+    """Return the validated document as a dict, or raise StructuredOutputError"""
+    try:
+        value, repaired = repair_json(text or "")
+    except JSONRepairError as e:
+        _count(kind, "unrepairable")
+        raise StructuredOutputError(f"{kind}: {str(e)}")
+
+    try:
+        document = schema.model_validate(value).model_dump(exclude_none=True)
+    except ValidationError as e:
+        _count(kind, "invalid")
+        raise StructuredOutputError(f"{kind} failed validation: {e.error_count()} error(s)")
+
+    _count(kind, "repaired" if repaired else "clean")
+    return document
+
+async def generate_structured(generate_text, prompt: str, schema, kind: str) -> dict:
+    """
+    Call generate_text(prompt) and parse its output, asking again up to
+    STRUCTURED_OUTPUT_RETRIES times when the output can't be repaired
+    """
+    attempt = 0
+    while True:
+        text = await generate_text(prompt)
+        try:
+            with span(f"parse.{kind}", chars=len(text or "")):
+                return parse_structured(text, schema, kind)
+        except StructuredOutputError as e:
+            if attempt >= STRUCTURED_OUTPUT_RETRIES:
+                raise
+            attempt += 1
+            _count(kind, "retries")
+            print(f"⚠️ {str(e)}, regenerating (attempt {attempt + 1})")
+
+def structured_output_stats() -> dict:
+    stats = {}
+    for kind, counters in _stats.items():
+        parsed = counters["clean"] + counters["repaired"]
+        attempts = parsed + counters["unrepairable"] + counters["invalid"]
+        stats[kind] = {
+            **counters,
+            "repair_rate": round(counters["repaired"] / attempts, 4) if attempts else 0.0,
+            "retry_rate": round(counters["retries"] / attempts, 4) if attempts else 0.0,
+        }
+    return stats
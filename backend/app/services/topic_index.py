@@ -0,0 +1,202 @@
+"""
+In-process similarity index over existing roadmap topics.
+
+Topics are embedded as TF-IDF vectors of character n-grams, so "Python",
+"python programming" and "Learn Python" land close together without an
+external embedding service. The term matrix is kept in coordinate form
+(row, column, term frequency) in growable NumPy arrays. Adding a topic
+appends its n-grams, and scoring a query is a few vectorised passes over
+those arrays, so the index never has to be rebuilt from scratch.
+
+Each worker keeps its own index. refresh() pulls roadmaps inserted by
+other workers since the newest _id already indexed.
+"""
+
+import math
+import os
+import re
+import time
+import numpy as np
+from app.models.roadmap import Roadmap
+
+ROADMAP_REUSE = os.getenv("ROADMAP_REUSE", "false").lower() == "true"
+ROADMAP_REUSE_THRESHOLD = float(os.getenv("ROADMAP_REUSE_THRESHOLD", 0.85))
+TOPIC_INDEX_REFRESH_SECONDS = float(os.getenv("TOPIC_INDEX_REFRESH_SECONDS", 10))
+
+NGRAM_SIZES = (2, 3, 4)
+# Words that don't change what a roadmap is about
+FILLER_WORDS = {
+    "a", "an", "the", "to", "for", "of", "in", "on", "with",
+    "learn", "intro", "introduction", "basics", "basic", "beginner", "beginners",
+    "course", "guide", "tutorial", "roadmap", "programming", "language",
+}
+
+
+def normalize_topic(topic: str) -> str:
+    """Lowercase, strip punctuation (keeping c++ / c#) and filler words"""
+    words = re.findall(r"[a-z0-9+#.]+", topic.lower())
+    words = [word.strip(".") for word in words if word.strip(".")]
+    meaningful = [word for word in words if word not in FILLER_WORDS]
+    return " ".join(meaningful or words)
+
+
+def topic_ngrams(normalized: str) -> dict:
+    """Character n-gram counts, padded so word boundaries count"""
+    counts = {}
+    for word in normalized.split():
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            for i in range(len(padded) - size + 1):
+                gram = padded[i:i + size]
+                counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+class TopicIndex:
+    def __init__(self):
+        self._vocab = {}
+        self._df = np.zeros(1024, dtype=np.float64)
+        self._rows = np.zeros(4096, dtype=np.int32)
+        self._cols = np.zeros(4096, dtype=np.int32)
+        self._tf = np.zeros(4096, dtype=np.float64)
+        self._nnz = 0
+        self._topics = []           # row -> normalized topic
+        self._roadmap_ids = []      # row -> roadmap ids with that topic, oldest first
+        self._row_by_topic = {}
+        self._last_id = None
+        self._last_refresh = 0.0
+        self.queries = 0
+        self.matches = 0
+
+    def __len__(self):
+        return sum(1 for ids in self._roadmap_ids if ids)
+
+    def add(self, roadmap_id, topic: str):
+        normalized = normalize_topic(topic)
+        if not normalized:
+            return
+        if self._last_id is None or roadmap_id > self._last_id:
+            self._last_id = roadmap_id
+
+        row = self._row_by_topic.get(normalized)
+        if row is not None:
+            if roadmap_id not in self._roadmap_ids[row]:
+                self._roadmap_ids[row].append(roadmap_id)
+            return
+
+        row = len(self._topics)
+        self._row_by_topic[normalized] = row
+        self._topics.append(normalized)
+        self._roadmap_ids.append([roadmap_id])
+
+        grams = topic_ngrams(normalized)
+        cols = [self._column(gram) for gram in grams]
+        self._reserve(self._nnz + len(cols))
+        end = self._nnz + len(cols)
+        self._rows[self._nnz:end] = row
+        self._cols[self._nnz:end] = cols
+        # Sublinear term frequency
+        self._tf[self._nnz:end] = [1 + math.log(count) for count in grams.values()]
+        self._df[cols] += 1
+        self._nnz = end
+
+    def remove(self, roadmap_id):
+        for ids in self._roadmap_ids:
+            if roadmap_id in ids:
+                ids.remove(roadmap_id)
+
+    def most_similar(self, topic: str, threshold: float = ROADMAP_REUSE_THRESHOLD):
+        """Return (roadmap_id, topic, score) of the closest live topic scoring at least threshold"""
+        self.queries += 1
+        normalized = normalize_topic(topic)
+        if not normalized or not self._topics:
+            return None
+
+        row = self._row_by_topic.get(normalized)
+        if row is not None and self._roadmap_ids[row]:
+            self.matches += 1
+            return self._roadmap_ids[row][-1], normalized, 1.0
+
+        n_docs = len(self._topics)
+        idf = np.log((1 + n_docs) / (1 + self._df[:len(self._vocab)])) + 1
+        rows, cols = self._rows[:self._nnz], self._cols[:self._nnz]
+        weights = self._tf[:self._nnz] * idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_docs))
+
+        query = np.zeros(len(self._vocab), dtype=np.float64)
+        # N-grams never seen before don't match anything but still count
+        # towards the query's length, with the idf of an unseen term
+        unseen = 0.0
+        for gram, count in topic_ngrams(normalized).items():
+            col = self._vocab.get(gram)
+            if col is not None:
+                query[col] = (1 + math.log(count)) * idf[col]
+            else:
+                unseen += ((1 + math.log(count)) * (math.log(1 + n_docs) + 1)) ** 2
+        query_norm = math.sqrt(float(query @ query) + unseen)
+        if query_norm == 0:
+            return None
+
+        scores = np.bincount(rows, weights=weights * query[cols], minlength=n_docs)
+        scores /= np.where(norms > 0, norms, 1) * query_norm
+        alive = np.array([bool(ids) for ids in self._roadmap_ids])
+        scores[~alive] = -1
+
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            return None
+        self.matches += 1
+        return self._roadmap_ids[best][-1], self._topics[best], float(scores[best])
+
+    async def build(self):
+        """Index every existing roadmap (called at startup)"""
+        await self._load({})
+        self._last_refresh = time.monotonic()
+        print(f"🔎 Topic index built with {len(self)} roadmap topics")
+
+    async def refresh(self):
+        """Pick up roadmaps other workers inserted since the last refresh"""
+        if time.monotonic() - self._last_refresh < TOPIC_INDEX_REFRESH_SECONDS:
+            return
+        self._last_refresh = time.monotonic()
+        await self._load({"_id": {"$gt": self._last_id}} if self._last_id else {})
+
+    async def _load(self, query):
+        cursor = Roadmap.get_motor_collection().find(query, {"title": 1}).sort("_id", 1)
+        async for raw_roadmap in cursor:
+            self.add(raw_roadmap["_id"], topic_from_title(raw_roadmap.get("title", "")))
+
+    def stats(self) -> dict:
+        return {
+            "topics": len(self),
+            "ngrams": len(self._vocab),
+            "nnz": self._nnz,
+            "queries": self.queries,
+            "matches": self.matches,
+            "threshold": ROADMAP_REUSE_THRESHOLD,
+        }
+
+    def _column(self, gram: str) -> int:
+        col = self._vocab.get(gram)
+        if col is None:
+            col = self._vocab[gram] = len(self._vocab)
+            if col >= len(self._df):
+                self._df = np.concatenate([self._df, np.zeros(len(self._df))])
+        return col
+
+    def _reserve(self, size: int):
+        if size <= len(self._rows):
+            return
+        capacity = max(size, 2 * len(self._rows))
+        for name in ("_rows", "_cols", "_tf"):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self._nnz] = array[:self._nnz]
+            setattr(self, name, grown)
+
+
+def topic_from_title(title: str) -> str:
+    return title.replace(" Roadmap", "").strip()
+
+
+topic_index = TopicIndex()
@@ -0,0 +1,246 @@
+"""
+Opt-in per-request span tracing for diagnosing slow requests.
+
+With TRACING=on, a request is traced when it carries the X-Trace header or
+is picked by TRACE_SAMPLE_RATE. A traced request records a span tree: the
+request itself, every Mongo command it issues, and each LLM gateway call
+with its rate-limit wait and upstream attempts. The root span also records
+the CPU time of the event loop thread while the request ran (shared with
+any requests running concurrently). Finished traces go into a bounded ring
+buffer served by the /debug/traces routes as JSON or as folded stacks for
+flamegraph tools.
+
+With TRACING off (the default) the middleware and Mongo listener are not
+installed and span() returns a shared no-op context manager.
+"""
+
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from pymongo import monitoring
+
+TRACING_ENABLED = os.getenv("TRACING", "off").lower() == "on"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", 100))
+TRACE_HEADER = b"x-trace"
+
+
+class Span:
+    __slots__ = ("name", "start", "end", "attrs", "children")
+
+    def __init__(self, name: str, attrs=None):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = attrs or {}
+        self.children = []
+
+    def child(self, name: str, attrs=None) -> "Span":
+        span = Span(name, attrs)
+        # list.append is atomic, so Mongo listener threads can add children too
+        self.children.append(span)
+        return span
+
+    def finish(self):
+        self.end = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_dict(self, origin: float) -> dict:
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+            "children": [child.to_dict(origin) for child in list(self.children)],
+        }
+
+
+_current_span = ContextVar("current_span", default=None)
+
+
+class _SpanScope:
+    __slots__ = ("name", "attrs", "span", "token")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is None:
+            self.span = None
+            return None
+        self.span = parent.child(self.name, self.attrs)
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is not None:
+            if exc_type is not None:
+                self.span.attrs["error"] = exc_type.__name__
+            self.span.finish()
+            _current_span.reset(self.token)
+
+
+class _NoopScope:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopScope()
+
+
+def span(name: str, **attrs):
+    """Context manager recording a child span of the current traced request, if any"""
+    if not TRACING_ENABLED:
+        return _NOOP
+    return _SpanScope(name, attrs)
+
+
+class TraceBuffer:
+    def __init__(self, size: int):
+        self.traces = deque(maxlen=size)
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> str:
+        return f"{int(time.time())}-{next(self._ids)}"
+
+    def add(self, trace: dict):
+        self.traces.append(trace)
+
+    def get(self, trace_id: str):
+        for trace in self.traces:
+            if trace["id"] == trace_id:
+                return trace
+        return None
+
+    def summaries(self):
+        return [
+            {key: trace[key] for key in ("id", "method", "path", "status", "started_at", "duration_ms", "cpu_ms")}
+            for trace in reversed(self.traces)
+        ]
+
+
+trace_buffer = TraceBuffer(TRACE_BUFFER_SIZE)
+
+
+def folded_stacks(trace: dict) -> str:
+    """
+    Render a trace as folded stacks ("root;child;leaf <microseconds>"), one
+    line per span, weighted by the span's self time
+    """
+    lines = []
+
+    def walk(node, prefix):
+        frame = f"{prefix};{node['name']}" if prefix else node["name"]
+        frame = frame.replace("\n", " ")
+        children_ms = sum(child["duration_ms"] for child in node["children"])
+        self_us = max(0, int((node["duration_ms"] - children_ms) * 1000))
+        if self_us:
+            lines.append(f"{frame} {self_us}")
+        for child in node["children"]:
+            walk(child, frame)
+
+    walk(trace["root"], "")
+    return "\n".join(lines) + "\n"
+
+
+class TracingMiddleware:
+    """Records a span tree for requests sent with X-Trace or picked by sampling"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_trace(scope):
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = trace_buffer.next_id()
+        root = Span(f"{scope['method']} {scope['path']}")
+        status = [500]
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [(b"x-trace-id", trace_id.encode())]
+                }
+            await send(message)
+
+        token = _current_span.set(root)
+        started_at = time.time()
+        cpu_start = time.thread_time()
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            cpu_ms = (time.thread_time() - cpu_start) * 1000
+            root.finish()
+            _current_span.reset(token)
+            trace_buffer.add({
+                "id": trace_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status[0],
+                "started_at": started_at,
+                "duration_ms": round(root.duration * 1000, 3),
+                "cpu_ms": round(cpu_ms, 3),
+                "root": root.to_dict(root.start),
+            })
+
+    @staticmethod
+    def _should_trace(scope) -> bool:
+        for name, _ in scope["headers"]:
+            if name == TRACE_HEADER:
+                return True
+        return TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+
+
+class MongoTraceListener(monitoring.CommandListener):
+    """Adds a span per Mongo command issued by a traced request"""
+
+    def __init__(self):
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        parent = _current_span.get()
+        if parent is None:
+            return
+        collection = event.command.get(event.command_name)
+        attrs = {"db": event.database_name}
+        if isinstance(collection, str):
+            attrs["collection"] = collection
+        with self._lock:
+            self._open[(event.connection_id, event.request_id)] = parent.child(
+                f"mongo.{event.command_name}", attrs
+            )
+
+    def succeeded(self, event):
+        self._close(event)
+
+    def failed(self, event):
+        self._close(event, error=True)
+
+    def _close(self, event, error=False):
+        with self._lock:
+            span = self._open.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            # The driver's own timing, without executor scheduling delay
+            span.end = span.start + event.duration_micros / 1e6
+            if error:
+                span.attrs["error"] = True
+
+
+mongo_trace_listener = MongoTraceListener()
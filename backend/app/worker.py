@@ -0,0 +1,65 @@
+"""
+Generation job worker: drains the Mongo job queue filled by the async mode
+of the generation endpoints, so LLM calls don't tie up the API's workers.
+
+Run as many as needed; jobs are claimed with leases, so workers on any
+number of hosts can share the queue. SIGTERM/SIGINT stop claiming, give
+running jobs JOB_SHUTDOWN_GRACE_SECONDS to finish and hand the rest back to
+the queue. Lessons of roadmaps created here are pre-generated by this
+process, as they are by the API when it creates them.
+
+Usage (from the backend directory):
+    python -m app.worker --concurrency 4
+"""
+
+import argparse
+import asyncio
+import signal
+
+from dotenv import load_dotenv
+
+# Before the app modules read their settings from the environment
+load_dotenv()
+
+from app.services import gemini_service
+from app.services.database import connect_mongo
+from app.services.generation_jobs import JOB_HANDLERS
+from app.services.job_queue import JobWorker, JOB_WORKER_CONCURRENCY
+from app.services.metrics import mongo_listener
+from app.services.pregeneration import pregeneration_pool, PREGENERATE_LESSONS
+from app.services.shared_store import shared_store
+from app.services.topic_index import topic_index
+
+
+async def run(concurrency: int):
+    client, _ = await connect_mongo([mongo_listener])
+    await topic_index.build()
+    if shared_store:
+        await shared_store.open()
+    if PREGENERATE_LESSONS:
+        pregeneration_pool.start()
+
+    worker = JobWorker(JOB_HANDLERS, concurrency)
+    worker.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+
+    print("Stopping job worker...")
+    await worker.stop()
+    await pregeneration_pool.stop()
+    await gemini_service.close_http_client()
+    if shared_store:
+        shared_store.close()
+    client.close()
+    print(f"Job worker stopped: {worker.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency))
@@ -0,0 +1,185 @@
+"""
+Benchmark: cold start of one API instance, the latency an autoscaled
+instance or a fresh worker adds before it can take traffic.
+
+  import time   `python -X importtime -c "import app.main"` in a fresh
+                interpreter, cumulative time per module (app modules and
+                the heaviest third-party packages)
+  first 200     spawn `uvicorn app.main:app` against a throwaway database and
+                poll until GET / answers 200 (process accepts traffic),
+                GET /ready answers 200 (Beanie initialized, indexes created)
+                and GET /api/roadmaps/ answers 200 (first real request)
+
+With --baseline <git ref> the same time-to-first-200 runs are repeated on
+that commit (checked out in a temporary git worktree) and the ratio is
+compared against --target.
+
+Usage (from the backend directory):
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --runs 5 --baseline HEAD~1 --target 0.5
+"""
+
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BENCH_DB = "dinolearn_coldstart"
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+PROBES = [("accepting", "/"), ("ready", "/ready"), ("first request", "/api/roadmaps/?limit=1")]
+
+
+def app_env():
+    env = dict(os.environ)
+    env.update({
+        "MONGO_URI": os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"),
+        "MONGO_DB_NAME": BENCH_DB,
+        "PREGENERATE_LESSONS": "false",
+        "JOB_WORKER_INLINE": "false",
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "bench-placeholder"),
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    return env
+
+
+def import_times(cwd):
+    """Cumulative import time in ms per module, from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=cwd, env=app_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            times[match.group(3)] = int(match.group(2)) / 1000
+    return times
+
+
+def report_import_times(cwd, top):
+    times = import_times(cwd)
+    print(f"Import of app.main: {times.get('app.main', 0.0):.0f}ms")
+    app_modules = sorted(
+        ((name, ms) for name, ms in times.items() if name.startswith("app.")),
+        key=lambda item: -item[1]
+    )
+    # Cumulative times nest (fastapi includes starlette), so these don't add up
+    packages = sorted(
+        ((name, ms) for name, ms in times.items() if "." not in name and name != "app"),
+        key=lambda item: -item[1]
+    )
+    print(f"\n{'app module':<40} {'cumulative':>10}")
+    for name, ms in app_modules[:top]:
+        print(f"{name:<40} {ms:>8.0f}ms")
+    print(f"\n{'package':<40} {'cumulative':>10}")
+    for name, ms in packages[:top]:
+        print(f"{name:<40} {ms:>8.0f}ms")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_200(cwd, probes, timeout):
+    """Seconds from process spawn until each probe first answers 200"""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd, env=app_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    reached = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            for name, path in probes:
+                while True:
+                    if time.perf_counter() - start > timeout:
+                        raise TimeoutError(f"{path} did not answer 200 within {timeout}s")
+                    if process.poll() is not None:
+                        raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+                    try:
+                        if client.get(path).status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        pass
+                    time.sleep(0.005)
+                reached[name] = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+    return reached
+
+
+def measure(cwd, runs, timeout, probes=PROBES):
+    samples = {name: [] for name, _ in probes}
+    for _ in range(runs):
+        for name, seconds in time_to_first_200(cwd, probes, timeout).items():
+            samples[name].append(seconds)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def print_medians(label, medians):
+    print(f"{label:<12}" + "".join(f" {medians[name] * 1000:>14.0f}ms" for name, _ in PROBES))
+
+
+def measure_baseline(ref, runs, timeout):
+    """Run the measurement on another commit, checked out in a temporary worktree"""
+    with tempfile.TemporaryDirectory() as tmp:
+        worktree = os.path.join(tmp, "baseline")
+        subprocess.run(["git", "worktree", "add", "--detach", worktree, ref], cwd=BACKEND_DIR,
+                       check=True, capture_output=True)
+        try:
+            cwd = os.path.join(worktree, os.path.relpath(BACKEND_DIR, git_root()))
+            # Older commits have no /ready endpoint; their readiness is the first request
+            probes = [probe for probe in PROBES if probe[0] != "ready"]
+            medians = measure(cwd, runs, timeout, probes)
+            medians["ready"] = medians["first request"]
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=BACKEND_DIR,
+                           check=True, capture_output=True)
+    return medians
+
+
+def git_root():
+    return subprocess.check_output(["git", "rev-parse", "--show-toplevel"], cwd=BACKEND_DIR, text=True).strip()
+
+
+def main(args):
+    report_import_times(BACKEND_DIR, args.top)
+
+    print(f"\nTime to first 200 (median of {args.runs} runs)")
+    print(f"{'':<12}" + "".join(f" {name:>16}" for name, _ in PROBES))
+    current = measure(BACKEND_DIR, args.runs, args.timeout)
+    print_medians("current", current)
+
+    if args.baseline:
+        baseline = measure_baseline(args.baseline, args.runs, args.timeout)
+        print_medians(args.baseline, baseline)
+        ratio = current["first request"] / baseline["first request"]
+        verdict = "✅" if ratio <= args.target else "❌"
+        print(f"\nFirst request: {ratio:.2f}x of {args.baseline} (target {args.target:.2f}x) {verdict}")
+        if ratio > args.target:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Give up on a run after this many seconds")
+    parser.add_argument("--top", type=int, default=12, help="Modules to list per import-time table")
+    parser.add_argument("--baseline", help="Git ref to compare against, e.g. HEAD~1")
+    parser.add_argument("--target", type=float, default=0.5, help="Max ratio of current / baseline first-request time")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,76 @@
+"""
+Shared helpers for the DinoLearn benchmark scripts.
+
+Benchmarks run against a throwaway database on the MongoDB at BENCH_MONGO_URI
+(default: mongodb://localhost:27017) and drop it when they finish.
+"""
+
+import os
+import time
+import statistics
+import motor.motor_asyncio
+from pymongo import monitoring
+from beanie import init_beanie
+
+from app.models.lesson import Lesson
+from app.models.roadmap import Roadmap
+from app.models.job import Job
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts MongoDB commands (round trips) sent by the client"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        self.count = 0
+
+
+async def connect(db_name="dinolearn_bench"):
+    """Connect to the benchmark database, initialize Beanie and return (client, db, counter)"""
+    counter = CommandCounter()
+    mongo_uri = os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017")
+    client = motor.motor_asyncio.AsyncIOMotorClient(mongo_uri, event_listeners=[counter])
+    db = client[db_name]
+    await client.drop_database(db_name)
+    await init_beanie(database=db, document_models=[Lesson, Roadmap, Job])
+    return client, db, counter
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples_ms):
+    """Return p50/p95/p99/mean for a list of latencies in milliseconds"""
+    return {
+        "p50_ms": round(percentile(samples_ms, 50), 2),
+        "p95_ms": round(percentile(samples_ms, 95), 2),
+        "p99_ms": round(percentile(samples_ms, 99), 2),
+        "mean_ms": round(statistics.fmean(samples_ms), 2) if samples_ms else 0.0,
+    }
+
+
+async def timed(coro_factory, iterations):
+    """Await coro_factory() `iterations` times and return the latencies in ms"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await coro_factory()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
@@ -0,0 +1,76 @@
+"""
+Benchmark: per-call cost of a fresh httpx.AsyncClient vs. the shared pooled
+Gemini client, against a local stub server.
+
+The stub answers instantly, so the difference is the connection setup the
+pooled client avoids. Against the real API each fresh client also pays a TLS
+handshake, so production savings are larger than what is measured here.
+
+Usage (from the backend directory):
+    python -m benchmarks.gemini_client --calls 200 --concurrency 1 10
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from benchmarks.common import summarize
+from benchmarks.stubs import StubBehaviour, create_gemini_stub, serve
+
+PAYLOAD = {"contents": [{"parts": [{"text": 'Create a roadmap for "Benchmarks"'}]}]}
+
+
+async def run(calls, concurrency, post):
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await post()
+            response.raise_for_status()
+            samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return samples, time.perf_counter() - start
+
+
+async def main(calls, concurrencies, port):
+    async with serve(create_gemini_stub(StubBehaviour()), port) as base_url:
+        os.environ["GEMINI_API_BASE"] = f"{base_url}/v1beta"
+        from app.services import gemini_service
+
+        url = f"{base_url}/v1beta/models/{gemini_service.GEMINI_MODEL}:generateContent"
+
+        async def fresh_client_post():
+            async with httpx.AsyncClient() as client:
+                return await client.post(url, json=PAYLOAD)
+
+        async def pooled_post():
+            return await gemini_service.get_http_client().post(
+                url, json=PAYLOAD, extensions={"trace": gemini_service._trace_connection}
+            )
+
+        for concurrency in concurrencies:
+            print(f"\n{calls} calls, concurrency {concurrency}")
+            for name, post in [("new client per call", fresh_client_post), ("shared pooled client", pooled_post)]:
+                samples, elapsed = await run(calls, concurrency, post)
+                stats = summarize(samples)
+                print(f"  {name:<22} p50={stats['p50_ms']:>7}ms p99={stats['p99_ms']:>7}ms "
+                      f"throughput={calls / elapsed:>8.1f}/s")
+            print(f"  pool stats: {gemini_service.get_pool_stats()}")
+
+        await gemini_service.close_http_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--port", type=int, default=8911)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.concurrency, args.port))
@@ -0,0 +1,96 @@
+"""
+Check that hedging can't wedge a provider's circuit breaker (no Mongo or LLM needed).
+
+Every hedged request that the hedge tier wins cancels the primary tier's
+gateway call. If that call was the breaker's half-open probe, a cancelled
+probe must free the probe slot: otherwise the breaker rejects every later
+call and never closes again. For --rounds rounds this opens the primary
+gateway's breaker, waits until it is half-open, runs hedged_generate with a
+slow primary and a fast hedge (so the probe is the cancelled loser), then
+checks that the primary gateway still accepts a call and closes.
+
+Exits non-zero if the breaker is left unusable.
+
+Usage (from the backend directory):
+    python -m benchmarks.hedge_cancellation --rounds 20
+"""
+
+import argparse
+import asyncio
+import sys
+
+import httpx
+
+from app.services.hedging import HedgePolicy, Tier, hedged_generate
+from app.services.llm_gateway import CircuitOpenError, ProviderGateway
+
+BREAKER_RESET = 0.05
+
+
+def gateway(name):
+    return ProviderGateway(
+        name, rpm=60000, tpm=10 ** 9, max_concurrency=4, max_retries=0,
+        backoff_base=0.01, backoff_max=0.01, breaker_threshold=1, breaker_reset=BREAKER_RESET,
+    )
+
+
+async def run_round(primary_gateway, hedge_gateway, policy):
+    async def refuse():
+        raise httpx.ConnectError("provider down")
+
+    async def slow():
+        await asyncio.sleep(policy.budget)
+        return {"tier": "primary"}
+
+    async def fast():
+        return {"tier": "hedge"}
+
+    # Open the primary's breaker (if a previous round left it open, it still is), then let it go half-open
+    try:
+        await primary_gateway.call(refuse)
+    except (httpx.ConnectError, CircuitOpenError):
+        pass
+    await asyncio.sleep(BREAKER_RESET * 1.5)
+
+    primary = Tier("primary", lambda prompt: primary_gateway.call(slow))
+    hedge = Tier("hedge", lambda prompt: hedge_gateway.call(fast))
+    result, _ = await hedged_generate(policy, "prompt", primary, hedge)
+    # Let the cancellation of the losing probe run
+    await asyncio.sleep(0)
+
+    async def ok():
+        return "ok"
+
+    try:
+        await primary_gateway.call(ok)
+    except CircuitOpenError:
+        return result, False
+    return result, primary_gateway.breaker.state == "closed"
+
+
+async def main(args):
+    primary_gateway = gateway("primary")
+    hedge_gateway = gateway("hedge")
+    # Hedge straight away, so the fast tier always wins
+    policy = HedgePolicy("check", budget=1.0, percentile=90)
+    policy.hedge_delay = lambda: 0.0
+
+    failures = 0
+    for _ in range(args.rounds):
+        result, usable = await run_round(primary_gateway, hedge_gateway, policy)
+        failures += not usable or result != {"tier": "hedge"}
+
+    print(f"{args.rounds} hedged requests won by the hedge while the primary's breaker was probing")
+    print(f"  served_by={policy.served_by} primary gateway: {primary_gateway.stats()['circuit']}, "
+          f"rejected {primary_gateway.counters['rejected_open_circuit']} calls as circuit open")
+    if failures:
+        print(f"FAILED: {failures} rounds left the primary's breaker unusable")
+        sys.exit(1)
+    print("OK: a cancelled probe never wedges the breaker")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args))
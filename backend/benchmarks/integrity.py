@@ -0,0 +1,147 @@
+"""
+Benchmark: referential integrity check, the old check_mongo.py approach vs.
+app.integrity's streaming scan.
+
+Seeds --sizes roadmaps of --lessons lessons each, with a known number of
+each defect injected (dangling refs, orphaned lessons, stuck placeholders,
+roadmaps without an outline), then measures time, Mongo round trips and
+peak Python heap of:
+
+- list: every roadmap loaded with list(find()), then one find_one per
+  lesson ref, as check_mongo.py did (skipped above --list-max roadmaps)
+- scan: IntegrityScan in report mode
+
+The scan should find exactly the injected defects, with round trips
+growing by batch rather than per ref and a heap that stays flat as the
+collection grows. Finally --repair is run and a second scan must come back
+clean.
+
+Usage (from the backend directory):
+    python -m benchmarks.integrity --sizes 1000 10000 50000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from bson import DBRef, ObjectId
+
+from app.integrity import IntegrityScan
+from app.models.job import Job
+from app.models.lesson import Lesson
+from app.models.roadmap import Roadmap
+from app.services.database import ensure_indexes
+from benchmarks.common import connect
+
+DEFECT_EVERY = 100
+# Old enough for the scan's --min-age-minutes
+CREATED_AT = datetime.now(timezone.utc) - timedelta(hours=2)
+
+
+def new_id():
+    return ObjectId(ObjectId.from_datetime(CREATED_AT).binary[:4] + ObjectId().binary[4:])
+
+
+async def seed(db, roadmaps, lessons_per_roadmap):
+    """Insert the roadmaps and return the defects injected, one of each kind per DEFECT_EVERY roadmaps"""
+    expected = {"dangling_refs": 0, "orphaned_lessons": 0, "stuck_placeholders": 0, "outline_out_of_sync": 0}
+    for start in range(0, roadmaps, 1000):
+        lesson_docs = []
+        roadmap_docs = []
+        for index in range(start, min(start + 1000, roadmaps)):
+            defect = index % DEFECT_EVERY
+            lessons = [
+                {"_id": new_id(), "day": day, "title": f"Topic {index}: Day {day}", "summary": "Summary",
+                 "lesson": [] if defect == 1 and day == 1 else [{"section": "Intro", "content": "Content " * 50}],
+                 "quiz": [], "completed": False}
+                for day in range(1, lessons_per_roadmap + 1)
+            ]
+            lesson_docs.extend(lessons)
+            refs = [DBRef("lessons", lesson["_id"]) for lesson in lessons]
+            roadmap = {"_id": new_id(), "title": f"Topic {index} Roadmap", "lessons": refs}
+            if defect == 2:
+                # A delete that died after removing the roadmap
+                roadmap_docs.append(None)
+                expected["orphaned_lessons"] += len(lessons)
+                continue
+            if defect == 0:
+                roadmap["lessons"].append(DBRef("lessons", new_id()))
+                expected["dangling_refs"] += 1
+            if defect == 1:
+                expected["stuck_placeholders"] += 1
+            if defect == 3:
+                # Created before the embedded outline, never migrated
+                expected["outline_out_of_sync"] += 1
+            else:
+                roadmap["outline"] = [
+                    {"lesson_id": lesson["_id"], "day": lesson["day"], "title": lesson["title"],
+                     "summary": lesson["summary"], "completed": False}
+                    for lesson in lessons
+                ]
+            roadmap_docs.append(roadmap)
+        await db.lessons.insert_many(lesson_docs)
+        await db.roadmaps.insert_many([roadmap for roadmap in roadmap_docs if roadmap is not None])
+    return expected
+
+
+async def list_check(db):
+    """check_mongo.py: the whole collection in memory, one query per ref"""
+    roadmaps = await db.roadmaps.find().to_list(None)
+    missing = 0
+    for roadmap in roadmaps:
+        for lesson_ref in roadmap.get("lessons", []):
+            if not await db.lessons.find_one({"_id": lesson_ref.id}):
+                missing += 1
+    return {"dangling_refs": missing}
+
+
+async def scan_check(repair=False):
+    scan = IntegrityScan(batch_size=500, min_age_minutes=30, repair=repair, samples=0, progress_seconds=3600)
+    await scan.scan()
+    return scan.found
+
+
+async def measure(name, counter, coro_factory):
+    counter.reset()
+    tracemalloc.start()
+    start = time.perf_counter()
+    found = await coro_factory()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name:<8} time={elapsed:>7.2f}s round_trips={counter.count:<8} peak_heap={peak / 1024 / 1024:>7.2f}MiB")
+    return found
+
+
+async def main(args):
+    client, db, counter = await connect("dinolearn_bench_integrity")
+    try:
+        for size in args.sizes:
+            await client.drop_database(db.name)
+            await ensure_indexes([Lesson, Roadmap, Job])
+            expected = await seed(db, size, args.lessons)
+            print(f"\n{size} roadmaps x {args.lessons} lessons, injected: "
+                  + ", ".join(f"{issue} {count}" for issue, count in expected.items()))
+            if size <= args.list_max:
+                await measure("list", counter, lambda: list_check(db))
+            found = await measure("scan", counter, scan_check)
+            mismatched = {issue: found[issue] for issue, count in expected.items() if found[issue] != count}
+            print(f"  scan found the injected defects: {'yes' if not mismatched else f'NO {mismatched}'}")
+
+        await measure("repair", counter, lambda: scan_check(repair=True))
+        remaining = await scan_check()
+        print(f"  after --repair: {'clean' if not any(remaining.values()) else remaining}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--lessons", type=int, default=7, help="Lessons per roadmap")
+    parser.add_argument("--list-max", type=int, default=10000, help="Largest size to run the old check on")
+    args = parser.parse_args()
+    asyncio.run(main(args))
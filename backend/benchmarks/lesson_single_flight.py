@@ -0,0 +1,89 @@
+"""
+Concurrency check: parallel POST /api/lessons/generate/{id} requests for one
+lesson must result in exactly one upstream generation.
+
+Fires N concurrent requests through the route (in-process single-flight),
+then N direct claim attempts on a second lesson that bypass the in-process
+dedup, simulating separate uvicorn workers racing on the Mongo claim.
+The OpenAI call is replaced by a slow in-process stub that counts calls.
+Exits non-zero if either makes more than one call. Nothing runs it
+automatically: run it by hand after changing lesson generation.
+
+Usage (from the backend directory):
+    python -m benchmarks.lesson_single_flight --requests 50
+"""
+
+import argparse
+import asyncio
+import sys
+
+import orjson
+
+from app.models.lesson import Lesson
+from app.routes.lesson_routes import generate_lesson_by_id
+from app.services import lesson_generation
+from benchmarks.common import connect
+
+
+class StubGenerator:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    async def __call__(self, day, title, topic):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return {
+            "day": day,
+            "title": title,
+            "summary": f"Summary of {title}",
+            "lesson": [{"section": "Introduction", "content": "..."}],
+            "quiz": [],
+        }
+
+
+async def new_placeholder(day):
+    lesson = Lesson(day=day, title=f"Concurrency Day {day}", summary="", lesson=[], completed=False)
+    await lesson.insert()
+    return lesson.id
+
+
+async def main(requests, latency):
+    client, db, _ = await connect()
+    stub = StubGenerator(latency)
+    lesson_generation.generate_lesson_plan_and_quiz = stub
+    lesson_generation.CLAIM_POLL_INTERVAL_SECONDS = latency / 10
+    failures = 0
+
+    try:
+        lesson_id = await new_placeholder(1)
+        responses = await asyncio.gather(
+            *(generate_lesson_by_id(str(lesson_id), async_job=False) for _ in range(requests))
+        )
+        results = [orjson.loads(response.body) for response in responses]
+        same = all(result["lesson"] == results[0]["lesson"] for result in results)
+        print(f"route single-flight: {requests} requests -> {stub.calls} upstream call(s), identical results: {same}")
+        failures += stub.calls != 1 or not same
+
+        stub.calls = 0
+        lesson_id = await new_placeholder(2)
+        results = await asyncio.gather(*(lesson_generation._generate_with_claim(lesson_id) for _ in range(requests)))
+        same = all(result["lesson"] == results[0]["lesson"] for result in results)
+        print(f"cross-worker claim:  {requests} claimers -> {stub.calls} upstream call(s), identical results: {same}")
+        failures += stub.calls != 1 or not same
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+    if failures:
+        print("FAILED: expected exactly one upstream call per lesson")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub generation latency in seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency))
@@ -0,0 +1,234 @@
+"""
+Offline load test of the whole backend.
+
+Starts local OpenAI and Gemini stub servers (configurable latency and error
+rate), runs the FastAPI app under uvicorn against a throwaway database on the
+local MongoDB, and drives an open-loop mix of create / list / get / generate
+traffic at a target request rate. Reports throughput, p50/p95/p99 per route
+and Mongo operations per request, and saves everything as JSON so runs can be
+compared across commits.
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test --rps 50 --duration 30 --llm-latency 2.0
+    python -m benchmarks.load_test --compare benchmarks/results/<earlier run>.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import httpx
+from pymongo import monitoring
+
+from benchmarks.common import CommandCounter, summarize
+from benchmarks.stubs import StubBehaviour, create_gemini_stub, create_openai_stub, serve
+
+BENCH_DB = "dinolearn_loadtest"
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+DEFAULT_MIX = {
+    "create_roadmap": 5,
+    "list_roadmaps": 30,
+    "get_roadmap": 35,
+    "get_lesson": 15,
+    "generate_lesson": 15,
+}
+
+
+class Workload:
+    """Issues requests of each kind and remembers ids to read back"""
+
+    def __init__(self, client: httpx.AsyncClient, rng: random.Random):
+        self.client = client
+        self.rng = rng
+        self.roadmap_ids = []
+        self.lesson_ids = []
+        self.topic_counter = 0
+
+    async def create_roadmap(self):
+        self.topic_counter += 1
+        response = await self.client.post("/api/roadmaps/", json={"topic": f"Load Topic {self.topic_counter}"})
+        if response.status_code == 200:
+            roadmap_id = response.json().get("_id") or response.json().get("id")
+            if roadmap_id:
+                await self._remember(roadmap_id)
+        return response
+
+    async def _remember(self, roadmap_id):
+        self.roadmap_ids.append(roadmap_id)
+        detail = await self.client.get(f"/api/roadmaps/{roadmap_id}")
+        if detail.status_code == 200:
+            self.lesson_ids.extend(item["_id"] for item in detail.json()["roadmap_data"]["roadmap"])
+
+    async def list_roadmaps(self):
+        return await self.client.get("/api/roadmaps/", params={"limit": 50})
+
+    async def get_roadmap(self):
+        return await self.client.get(f"/api/roadmaps/{self.rng.choice(self.roadmap_ids)}")
+
+    async def get_lesson(self):
+        return await self.client.get(f"/api/lessons/{self.rng.choice(self.lesson_ids)}")
+
+    async def generate_lesson(self):
+        return await self.client.post(f"/api/lessons/generate/{self.rng.choice(self.lesson_ids)}")
+
+
+async def calibrate_mongo_ops(workload, counter, samples=5):
+    """Mongo commands per request for each route, measured one request at a time"""
+    ops = {}
+    for kind in DEFAULT_MIX:
+        counter.reset()
+        for _ in range(samples):
+            await getattr(workload, kind)()
+        ops[kind] = round(counter.count / samples, 2)
+    return ops
+
+
+async def drive(workload, mix, rps, duration):
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    latencies = {kind: [] for kind in kinds}
+    errors = {kind: 0 for kind in kinds}
+    tasks = []
+
+    async def one(kind):
+        start = time.perf_counter()
+        try:
+            response = await getattr(workload, kind)()
+            if response.status_code >= 400:
+                errors[kind] += 1
+        except httpx.HTTPError:
+            errors[kind] += 1
+        latencies[kind].append((time.perf_counter() - start) * 1000)
+
+    # Open loop: requests are started on schedule whether or not earlier ones finished
+    start = time.perf_counter()
+    interval = 1.0 / rps
+    next_at = start
+    while next_at - start < duration:
+        tasks.append(asyncio.create_task(one(workload.rng.choices(kinds, weights)[0])))
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    routes = {
+        kind: {"requests": len(latencies[kind]), "errors": errors[kind], **summarize(latencies[kind])}
+        for kind in kinds
+    }
+    return routes, sum(len(v) for v in latencies.values()) / elapsed
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline['commit']} ({baseline_path}):")
+    for kind, stats in current["routes"].items():
+        before = baseline["routes"].get(kind)
+        if not before:
+            continue
+        print(f"  {kind:<16} p50 {before['p50_ms']:>8} -> {stats['p50_ms']:>8}ms   "
+              f"p99 {before['p99_ms']:>8} -> {stats['p99_ms']:>8}ms")
+
+
+async def main(args):
+    openai_stub = StubBehaviour(args.llm_latency, error_rate=args.llm_error_rate, seed=args.seed)
+    gemini_stub = StubBehaviour(args.llm_latency, error_rate=args.llm_error_rate, seed=args.seed)
+
+    async with serve(create_openai_stub(openai_stub), args.port + 1) as openai_url, \
+            serve(create_gemini_stub(gemini_stub), args.port + 2) as gemini_url:
+        os.environ.update({
+            "MONGO_URI": os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"),
+            "MONGO_DB_NAME": BENCH_DB,
+            "OPENAI_API_KEY": "stub",
+            "OPENAI_BASE_URL": f"{openai_url}/v1",
+            "GEMINI_API_KEY": "stub",
+            "GEMINI_API_BASE": f"{gemini_url}/v1beta",
+            "PREGENERATE_LESSONS": "true" if args.pregenerate else "false",
+        })
+
+        # Listeners registered before the app creates its client see every command
+        counter = CommandCounter()
+        monitoring.register(counter)
+        from app.main import app
+
+        async with serve(app, args.port) as app_url:
+            await app.mongodb_client.drop_database(BENCH_DB)
+            async with httpx.AsyncClient(base_url=app_url, timeout=120) as client:
+                workload = Workload(client, random.Random(args.seed))
+                for _ in range(args.seed_roadmaps):
+                    await workload.create_roadmap()
+
+                mongo_ops = await calibrate_mongo_ops(workload, counter)
+                routes, throughput = await drive(workload, args.mix, args.rps, args.duration)
+
+            await app.mongodb_client.drop_database(BENCH_DB)
+
+    for kind, ops in mongo_ops.items():
+        routes[kind]["mongo_ops_per_request"] = ops
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "rps": args.rps,
+            "duration_s": args.duration,
+            "llm_latency_s": args.llm_latency,
+            "llm_error_rate": args.llm_error_rate,
+            "mix": args.mix,
+            "pregenerate": args.pregenerate,
+        },
+        "throughput_rps": round(throughput, 2),
+        "upstream_calls": {"openai": openai_stub.calls, "gemini": gemini_stub.calls},
+        "routes": routes,
+    }
+
+    print(f"\nThroughput: {result['throughput_rps']} req/s (target {args.rps})")
+    print(f"{'route':<16} {'reqs':>6} {'errs':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'mongo ops':>10}")
+    for kind, stats in routes.items():
+        print(f"{kind:<16} {stats['requests']:>6} {stats['errors']:>5} {stats['p50_ms']:>8}ms "
+              f"{stats['p95_ms']:>8}ms {stats['p99_ms']:>8}ms {stats['mongo_ops_per_request']:>10}")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load-{result['commit']}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of traffic")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="median stub latency in seconds")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX,
+                        help='JSON weights, e.g. \'{"list_roadmaps": 50, "get_roadmap": 50}\'')
+    parser.add_argument("--seed-roadmaps", type=int, default=5)
+    parser.add_argument("--pregenerate", action="store_true", help="leave background lesson pre-generation on")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8920)
+    parser.add_argument("--output", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+    for kind in args.mix:
+        if kind not in DEFAULT_MIX:
+            parser.error(f"unknown request kind in --mix: {kind}")
+    asyncio.run(main(args))
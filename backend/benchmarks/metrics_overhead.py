@@ -0,0 +1,120 @@
+"""
+Benchmark: cost of the /metrics instrumentation per request.
+
+Serves the real roadmap and lesson routers twice, with and without
+MetricsMiddleware, and measures GET /api/roadmaps/pregeneration/stats (no
+Mongo needed, so the handler itself is as cheap as a request gets and the
+overhead ratio is a worst case). Rounds alternate between the two servers
+so drift affects both equally. The middleware is also timed in isolation
+around a no-op ASGI app; that per-request cost divided by the uninstrumented
+p50 is the gated figure, since end-to-end differences of a few microseconds
+are within noise.
+
+Exits non-zero if the overhead is above --max-overhead percent of p50.
+
+Usage (from the backend directory):
+    python -m benchmarks.metrics_overhead --requests 2000 --rounds 5
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.common import summarize
+from benchmarks.stubs import serve
+
+PATH = "/api/roadmaps/pregeneration/stats"
+
+
+def build_app(instrumented):
+    from app.routes import roadmap_routes, lesson_routes
+    from app.services.metrics import MetricsMiddleware
+
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    app.include_router(roadmap_routes.router, prefix="/api/roadmaps")
+    app.include_router(lesson_routes.router, prefix="/api/lessons")
+    return app
+
+
+async def measure(client, url, requests):
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get(url)
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def middleware_cost_us(app, iterations):
+    """Per-request cost of MetricsMiddleware around a no-op ASGI app, in microseconds"""
+    from app.services.metrics import MetricsMiddleware
+
+    async def noop(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": PATH, "app": app}
+    middleware = MetricsMiddleware(noop)
+
+    timings = {}
+    for name, handler in [("bare", noop), ("instrumented", middleware)]:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await handler(scope, receive, send)
+        timings[name] = (time.perf_counter() - start) / iterations * 1e6
+    return timings["instrumented"] - timings["bare"]
+
+
+async def main(args):
+    bare_app, instrumented_app = build_app(False), build_app(True)
+    samples = {"bare": [], "instrumented": []}
+
+    async with serve(bare_app, args.port) as bare_url, \
+            serve(instrumented_app, args.port + 1) as instrumented_url, \
+            httpx.AsyncClient() as client:
+        urls = {"bare": bare_url + PATH, "instrumented": instrumented_url + PATH}
+        for url in urls.values():
+            await measure(client, url, 200)  # Warm up connections and route tables
+
+        for _ in range(args.rounds):
+            for name, url in urls.items():
+                samples[name].extend(await measure(client, url, args.requests))
+
+    stats = {name: summarize(values) for name, values in samples.items()}
+    for name, summary in stats.items():
+        print(f"{name:<13} p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms")
+
+    cost_us = await middleware_cost_us(instrumented_app, args.requests * args.rounds)
+    p50_us = stats["bare"]["p50_ms"] * 1000
+    overhead = cost_us / p50_us * 100
+    end_to_end = (stats["instrumented"]["p50_ms"] - stats["bare"]["p50_ms"]) * 1000
+    print(f"\nmiddleware cost: {cost_us:.1f}us per request = {overhead:.2f}% of the {p50_us:.0f}us p50 "
+          f"(end-to-end p50 difference: {end_to_end:+.0f}us)")
+
+    if overhead > args.max_overhead:
+        print(f"❌ Instrumentation overhead above {args.max_overhead}% of p50")
+        sys.exit(1)
+    print(f"✅ Instrumentation overhead within {args.max_overhead}% of p50")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--max-overhead", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=8931)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,100 @@
+"""
+Explain-plan check for the hot read queries.
+
+Builds the same queries the routes and the job queue issue, runs explain()
+on each against a seeded throwaway database and exits non-zero if any
+winning plan contains a COLLSCAN stage. Nothing runs it automatically:
+run it by hand after changing an index or one of these queries.
+
+Usage (from the backend directory):
+    python -m benchmarks.query_plans
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timezone
+
+from app.models.lesson import Lesson
+from app.models.roadmap import Roadmap
+from app.models.job import Job
+from app.routes.roadmap_routes import (
+    build_roadmap_query,
+    encode_cursor,
+    ROADMAP_LIST_PROJECTION,
+    ROADMAP_LIST_SORT,
+)
+from app.services.roadmap_outline import LESSON_OUTLINE_PROJECTION
+from benchmarks.common import connect
+from benchmarks.roadmap_reads import seed
+
+
+def plan_stages(plan):
+    """Yield every stage name in an explain() winning plan tree"""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        yield from plan_stages(plan.get(key))
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+
+async def explain(cursor):
+    result = await cursor.explain()
+    planner = result.get("queryPlanner", {})
+    return list(plan_stages(planner.get("winningPlan", {})))
+
+
+async def main():
+    client, db, _ = await connect()
+    failures = 0
+    try:
+        await seed(db, 200)
+        first = await db.roadmaps.find_one({}, sort=ROADMAP_LIST_SORT)
+        lesson_ids = [lesson["_id"] async for lesson in db.lessons.find({}, {"_id": 1}).limit(14)]
+
+        roadmaps = Roadmap.get_motor_collection()
+        lessons = Lesson.get_motor_collection()
+        jobs = Job.get_motor_collection()
+        now = datetime.now(timezone.utc)
+        checks = {
+            "roadmap title search": roadmaps.find(
+                build_roadmap_query("topic", None), ROADMAP_LIST_PROJECTION
+            ).sort(ROADMAP_LIST_SORT),
+            "roadmap keyset page": roadmaps.find(
+                build_roadmap_query(None, encode_cursor(first)), ROADMAP_LIST_PROJECTION
+            ).sort(ROADMAP_LIST_SORT).limit(20),
+            "roadmap search + cursor": roadmaps.find(
+                build_roadmap_query("topic", encode_cursor(first)), ROADMAP_LIST_PROJECTION
+            ).sort(ROADMAP_LIST_SORT).limit(20),
+            "lesson outlines $in": lessons.find(
+                {"_id": {"$in": lesson_ids}}, LESSON_OUTLINE_PROJECTION
+            ).sort("day", 1),
+            "lesson by day and title": lessons.find({"day": 1, "title": "Topic 0 Day 1"}),
+            # The two find_one_and_update filters of claim_job
+            "job claim": jobs.find(
+                {"status": "queued", "available_at": {"$lte": now}, "kind": {"$in": ["lesson", "roadmap"]}}
+            ).sort("available_at", 1).limit(1),
+            "job lease reclaim": jobs.find(
+                {"status": "running", "lease_expires_at": {"$lt": now}, "kind": {"$in": ["lesson", "roadmap"]}}
+            ).limit(1),
+        }
+
+        for name, cursor in checks.items():
+            stages = await explain(cursor)
+            ok = "COLLSCAN" not in stages
+            failures += not ok
+            print(f"  {'✓' if ok else '✗'} {name:<26} {' <- '.join(stages)}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+    if failures:
+        print(f"FAILED: {failures} queries fall back to a collection scan")
+        sys.exit(1)
+    print("OK: all queries use an index")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+Benchmark: peak Python heap while listing every roadmap, full JSON list vs.
+NDJSON streaming vs. keyset pages.
+
+Streaming and paging should stay flat as the collection grows; the full list
+grows linearly.
+
+Usage (from the backend directory):
+    python -m benchmarks.roadmap_listing_memory --sizes 1000 10000 50000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from app.routes.roadmap_routes import get_roadmaps
+from benchmarks.common import connect
+from benchmarks.roadmap_reads import seed
+
+
+async def full_list():
+    response = await get_roadmaps()
+    return len(response.body)
+
+
+async def ndjson_stream():
+    response = await get_roadmaps(format="ndjson")
+    total = 0
+    async for line in response.body_iterator:
+        total += len(line)
+    return total
+
+
+async def keyset_pages(page_size=100):
+    total = 0
+    cursor = None
+    while True:
+        response = await get_roadmaps(limit=page_size, cursor=cursor)
+        total += len(response.body)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return total
+
+
+async def measure(name, coro_factory):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = await coro_factory()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name:<16} bytes={size:<12} peak_heap={peak / 1024 / 1024:>8.2f}MiB time={elapsed:>7.2f}s")
+
+
+async def main(sizes):
+    client, db, _ = await connect()
+    try:
+        for size in sizes:
+            await client.drop_database(db.name)
+            await seed(db, size)
+            print(f"\n{size} roadmaps")
+            await measure("full list", full_list)
+            await measure("ndjson stream", ndjson_stream)
+            await measure("keyset pages", keyset_pages)
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes))
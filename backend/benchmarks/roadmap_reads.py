@@ -0,0 +1,98 @@
+"""
+Benchmark: Mongo round trips and latency of the roadmap read endpoints
+as the number of roadmaps grows.
+
+Compares the old per-lesson find_one lookups against the batched $in query.
+"get by id" is measured with the response cache cleared before every call,
+then again as cache hits.
+
+Usage (from the backend directory):
+    python -m benchmarks.roadmap_reads --sizes 10 100 300 --iterations 20
+"""
+
+import argparse
+import asyncio
+from bson import DBRef
+
+from app.models.lesson import Lesson
+from app.models.roadmap import Roadmap
+from app.routes.roadmap_routes import get_roadmaps, get_roadmap_by_id
+from app.services.response_cache import response_cache
+from benchmarks.common import connect, summarize, timed
+
+LESSONS_PER_ROADMAP = 14
+
+
+async def seed(db, roadmap_count):
+    """Insert roadmap_count roadmaps with 14 lessons each"""
+    # A summary, so the roadmaps count as generated and get by id can be cached
+    lessons = [
+        {"day": day, "title": f"Topic {r} Day {day}", "summary": f"Day {day}", "lesson": [], "completed": False}
+        for r in range(roadmap_count)
+        for day in range(LESSONS_PER_ROADMAP, 0, -1)
+    ]
+    inserted = await db.lessons.insert_many(lessons)
+    ids = inserted.inserted_ids
+
+    roadmaps = []
+    for r in range(roadmap_count):
+        refs = ids[r * LESSONS_PER_ROADMAP:(r + 1) * LESSONS_PER_ROADMAP]
+        roadmaps.append({
+            "title": f"Topic {r:06d} Roadmap",
+            "lessons": [DBRef("lessons", lesson_id) for lesson_id in refs],
+        })
+    result = await db.roadmaps.insert_many(roadmaps)
+    return result.inserted_ids
+
+
+async def legacy_get_roadmaps():
+    """The previous implementation: one find_one per lesson ref"""
+    roadmaps = await Roadmap.get_motor_collection().find({}).sort("title", 1).to_list(length=None)
+    result = []
+    for raw_roadmap in roadmaps:
+        lessons = []
+        for lesson_ref in raw_roadmap.get("lessons", []):
+            lesson_data = await Lesson.get_motor_collection().find_one({"_id": lesson_ref.id})
+            if lesson_data:
+                lessons.append({"day": lesson_data["day"], "title": lesson_data["title"]})
+        result.append(sorted(lessons, key=lambda x: x["day"]))
+    return result
+
+
+async def measure(name, counter, coro_factory, iterations):
+    counter.reset()
+    await coro_factory()
+    round_trips = counter.count
+    samples = await timed(coro_factory, iterations)
+    stats = summarize(samples)
+    print(f"  {name:<22} round_trips={round_trips:<6} p50={stats['p50_ms']:>8}ms p99={stats['p99_ms']:>8}ms")
+
+
+async def main(sizes, iterations):
+    client, db, counter = await connect()
+    try:
+        for size in sizes:
+            await client.drop_database(db.name)
+            roadmap_ids = await seed(db, size)
+            print(f"\n{size} roadmaps x {LESSONS_PER_ROADMAP} lessons")
+            await measure("legacy list (N+1)", counter, legacy_get_roadmaps, iterations)
+            await measure("list ($in batch)", counter, get_roadmaps, iterations)
+            roadmap_id = str(roadmap_ids[0])
+
+            async def get_uncached():
+                response_cache.invalidate_roadmap(roadmap_id)
+                return await get_roadmap_by_id(roadmap_id, None)
+
+            await measure("get by id", counter, get_uncached, iterations)
+            await measure("get by id (cached)", counter, lambda: get_roadmap_by_id(roadmap_id, None), iterations)
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 300])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.iterations))
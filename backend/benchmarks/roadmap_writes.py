@@ -0,0 +1,89 @@
+"""
+Benchmark: Mongo round trips and latency of the write paths, before and after
+batching.
+
+- roadmap creation: one insert per lesson (old) vs. insert_many + roadmap
+  insert in one transaction when available (new)
+- lesson completion: one POST /complete/{id} per lesson (old) vs. one
+  POST /complete for all ids (new)
+
+The Gemini call is replaced by the instant fallback roadmap so only the
+persistence cost is measured.
+
+Usage (from the backend directory):
+    python -m benchmarks.roadmap_writes --iterations 20
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("PREGENERATE_LESSONS", "false")
+
+from app.models.lesson import Lesson
+from app.models.roadmap import Roadmap
+from app.services import roadmap_creation
+from app.routes.lesson_routes import complete_lesson, complete_lessons
+from app.services.gemini_service import get_fallback_roadmap
+from app.services.roadmap_outline import build_outline
+from benchmarks.common import connect, summarize
+
+
+async def instant_roadmap(topic):
+    return get_fallback_roadmap(topic)
+
+
+async def legacy_create_roadmap(topic):
+    """The previous implementation: one insert per lesson, then the roadmap"""
+    roadmap_data = await instant_roadmap(topic)
+    lesson_refs = []
+    for item in roadmap_data["roadmap"]:
+        lesson = Lesson(day=item["day"], title=item["title"], summary="", lesson=[])
+        await lesson.insert()
+        lesson_refs.append(lesson)
+    roadmap = Roadmap(title=f"{topic} Roadmap", lessons=lesson_refs, outline=build_outline(lesson_refs))
+    await roadmap.insert()
+    return roadmap
+
+
+async def measure(name, counter, coro_factory, iterations):
+    samples = []
+    round_trips = []
+    for _ in range(iterations):
+        counter.reset()
+        start = time.perf_counter()
+        await coro_factory()
+        samples.append((time.perf_counter() - start) * 1000)
+        round_trips.append(counter.count)
+    stats = summarize(samples)
+    print(f"  {name:<26} round_trips={max(round_trips):<4} p50={stats['p50_ms']:>8}ms p99={stats['p99_ms']:>8}ms")
+
+
+async def main(iterations):
+    client, db, counter = await connect()
+    roadmap_creation.generate_roadmap_from_gemini = instant_roadmap
+    try:
+        print("\nroadmap creation (14 lessons)")
+        await measure("old: insert per lesson", counter, lambda: legacy_create_roadmap("Old"), iterations)
+        await measure("new: insert_many (+txn)", counter, lambda: roadmap_creation.create_roadmap_from_topic("New", reuse=False), iterations)
+
+        lesson_ids = [str(doc["_id"]) async for doc in db.lessons.find({}, {"_id": 1}).limit(14)]
+        print("\nlesson completion (14 lessons)")
+
+        async def one_by_one():
+            for lesson_id in lesson_ids:
+                await complete_lesson(lesson_id)
+
+        await measure("old: one request per lesson", counter, one_by_one, iterations)
+        await measure("new: bulk completion", counter, lambda: complete_lessons(lesson_ids), iterations)
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
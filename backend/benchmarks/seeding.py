@@ -0,0 +1,126 @@
+"""
+Benchmark: bulk seeding throughput, serial loop vs. the app.seed pipeline.
+
+Both seed --topics topics into a throwaway database through the real
+provider gateways, pointed at the local OpenAI and Gemini stubs (median
+latency --llm-latency). The serial loop is the old db_init shape: one
+roadmap, then its lessons one at a time, one insert per document. The
+pipeline is app.seed's Seeder with its default concurrency.
+
+The provider bound is the lesson rate the OpenAI gateway allows (lessons are
+the bulk of the calls) over the run's duration: OPENAI_MAX_CONCURRENCY calls
+of --llm-latency each, capped by the OPENAI_RPM token bucket (a minute's
+worth of burst, then RPM / 60 per second). The pipeline's lesson rate
+should be close to it, i.e. limited by the providers and not by the loop.
+
+Usage (from the backend directory):
+    python -m benchmarks.seeding --topics 50 --llm-latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from beanie import PydanticObjectId
+
+from benchmarks.stubs import StubBehaviour, create_gemini_stub, create_openai_stub, serve
+
+BENCH_DB = "dinolearn_bench_seeding"
+
+
+async def serial_seed(topics):
+    """The old db_init loop: everything one after another"""
+    from app.models.lesson import Lesson
+    from app.models.roadmap import Roadmap
+    from app.services.chatgpt_service import generate_lesson_plan_and_quiz
+    from app.services.gemini_service import generate_roadmap_plan
+    from app.services.roadmap_outline import build_outline
+
+    lessons_generated = 0
+    for topic in topics:
+        plan = await generate_roadmap_plan(topic)
+        lessons = []
+        for item in plan["roadmap"]:
+            generated = await generate_lesson_plan_and_quiz(item["day"], item["title"], topic)
+            lesson = Lesson(id=PydanticObjectId(), day=item["day"], title=item["title"], summary=generated["summary"],
+                            lesson=generated["lesson"], quiz=generated["quiz"])
+            await lesson.insert()
+            lessons.append(lesson)
+            lessons_generated += 1
+        await Roadmap(title=f"{plan['topic']} Roadmap", lessons=lessons, outline=build_outline(lessons)).insert()
+    return lessons_generated
+
+
+async def pipeline_seed(topics, run):
+    from app.seed import Seeder
+    from app.services.llm_gateway import openai_gateway, gemini_gateway
+
+    seeder = Seeder(run, batch_size=50, max_attempts=3)
+    await seeder.add_topics(topics)
+    pending, lesson_tasks = await seeder.load()
+    await seeder.run_online(
+        pending, lesson_tasks, gemini_gateway.max_concurrency * 2, openai_gateway.max_concurrency * 2, 2.0
+    )
+    return seeder.counts["lessons"]
+
+
+async def main(args):
+    openai_stub = StubBehaviour(args.llm_latency, seed=1)
+    gemini_stub = StubBehaviour(args.llm_latency, seed=2)
+
+    async with serve(create_openai_stub(openai_stub), args.port) as openai_url, \
+            serve(create_gemini_stub(gemini_stub), args.port + 1) as gemini_url:
+        os.environ.update({
+            "MONGO_URI": os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"),
+            "MONGO_DB_NAME": BENCH_DB,
+            "OPENAI_API_KEY": "stub",
+            "OPENAI_BASE_URL": f"{openai_url}/v1",
+            "GEMINI_API_KEY": "stub",
+            "GEMINI_API_BASE": f"{gemini_url}/v1beta",
+            # Every generation should reach the stubs: no hedged duplicates, no host-wide cache
+            "HEDGE_TIER": "none",
+            "SHARED_CACHE_ENABLED": "false",
+        })
+        from app.models.seed_topic import SeedTopic
+        from app.services.database import connect_mongo, ensure_indexes, DOCUMENT_MODELS
+        from app.services.llm_gateway import openai_gateway
+
+        models = DOCUMENT_MODELS + [SeedTopic]
+        client, _ = await connect_mongo(create_indexes=False, document_models=models)
+        await client.drop_database(BENCH_DB)
+        await ensure_indexes(models)
+
+        requests = openai_gateway.requests
+        print(f"{args.topics} topics, stub latency {args.llm_latency}s, "
+              f"OpenAI gateway: {openai_gateway.max_concurrency} concurrent, {requests.rate * 60:.0f} RPM")
+        print(f"{'mode':<10} {'topics':>7} {'lessons':>8} {'time':>9} {'lessons/s':>10} {'bound':>7} {'of bound':>9}")
+
+        modes = [("pipeline", lambda topics: pipeline_seed(topics, "bench"))]
+        if not args.skip_serial:
+            modes.insert(0, ("serial", serial_seed))
+        for name, run in modes:
+            # Unique topics per mode, so the generation cache can't serve one mode from the other
+            topics = [f"{name.title()} Topic {i}" for i in range(args.topics)]
+            start = time.perf_counter()
+            lessons = await run(topics)
+            elapsed = time.perf_counter() - start
+            rate = lessons / elapsed
+            bound = min(
+                openai_gateway.max_concurrency / args.llm_latency,
+                (requests.capacity + requests.rate * elapsed) / elapsed
+            )
+            print(f"{name:<10} {args.topics:>7} {lessons:>8} {elapsed:>8.1f}s {rate:>10.1f} {bound:>7.1f} {rate / bound:>8.0%}")
+
+        await client.drop_database(BENCH_DB)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Median stub latency in seconds")
+    parser.add_argument("--skip-serial", action="store_true", help="Only run the pipeline (the serial loop is slow)")
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+    asyncio.run(main(args))
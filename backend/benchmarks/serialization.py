@@ -0,0 +1,183 @@
+"""
+Benchmark: response serialization cost per payload size, before vs. after
+the orjson response path.
+
+Each case serves the same payload through an in-process FastAPI app twice:
+the way the handler used to respond and the way it responds now. Requests
+are driven straight through the ASGI interface, so the figures are handler
++ FastAPI response handling + rendering, without any network or Mongo.
+
+  roadmap list    GET /api/roadmaps page: str() id fixups + json.dumps,
+                  vs. raw ObjectIds rendered by orjson
+  lesson          GET /api/lessons/{id} cache fill: str() fixup +
+                  jsonable_encoder + json.dumps, vs. orjson
+  create roadmap  POST /api/roadmaps: Roadmap response_model (validation and
+                  the roadmap_data computed field), vs. a lean dict + orjson
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization --iterations 200
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from bson import ObjectId
+from beanie import PydanticObjectId
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from app.models.lesson import Lesson
+from app.models.roadmap import Roadmap
+from app.routes.roadmap_routes import format_roadmap
+from app.services.roadmap_creation import format_created_roadmap
+from app.services.roadmap_outline import build_outline
+from app.services.serialization import FastJSONResponse, dumps
+
+SECTION_TEXT = "A paragraph of generated lesson content. " * 12
+
+# Set before each measurement and read by the handlers below
+payload = {}
+
+
+def raw_roadmap(days):
+    return {
+        "_id": ObjectId(),
+        "title": f"Topic {ObjectId()} Roadmap",
+        "outline": [
+            {"lesson_id": ObjectId(), "day": day, "title": f"Day {day} title", "summary": "Summary " * 8, "completed": False}
+            for day in range(1, days + 1)
+        ],
+    }
+
+
+def raw_lesson(sections):
+    return {
+        "_id": ObjectId(),
+        "day": 1,
+        "title": "Day 1 title",
+        "summary": "Summary " * 8,
+        "lesson": [{"section": f"Section {i}", "content": SECTION_TEXT} for i in range(sections)],
+        "quiz": [
+            {"question": f"Question {i}?", "options": ["a", "b", "c", "d"], "answer": "a"}
+            for i in range(max(1, sections // 2))
+        ],
+        "completed": False,
+    }
+
+
+def created_roadmap(days):
+    # model_construct skips Beanie's collection lookup, so no database is needed
+    lessons = [
+        Lesson.model_construct(
+            id=PydanticObjectId(), day=day, title=f"Day {day} title",
+            summary="", lesson=[], quiz=[], completed=False
+        )
+        for day in range(1, days + 1)
+    ]
+    return Roadmap.model_construct(
+        id=PydanticObjectId(), title="Topic Roadmap", lessons=lessons, outline=build_outline(lessons)
+    )
+
+
+def old_render_json(content) -> bytes:
+    """The response cache's serializer before the orjson path"""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def build_app():
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.get("/before/roadmaps")
+    async def list_before():
+        result = []
+        for raw in payload["roadmaps"]:
+            roadmap = format_roadmap(raw, raw["outline"])
+            roadmap["_id"] = str(roadmap["_id"])
+            result.append(roadmap)
+        return JSONResponse(result)
+
+    @app.get("/after/roadmaps")
+    async def list_after():
+        return FastJSONResponse([format_roadmap(raw, raw["outline"]) for raw in payload["roadmaps"]])
+
+    @app.get("/before/lesson")
+    async def lesson_before():
+        lesson_data = dict(payload["lesson"])
+        lesson_data["_id"] = str(lesson_data["_id"])
+        return Response(old_render_json(lesson_data), media_type="application/json")
+
+    @app.get("/after/lesson")
+    async def lesson_after():
+        return Response(dumps(payload["lesson"]), media_type="application/json")
+
+    @app.post("/before/create", response_model=Roadmap)
+    async def create_before():
+        return payload["created"]
+
+    @app.post("/after/create", response_model=None)
+    async def create_after():
+        return FastJSONResponse(format_created_roadmap(payload["created"], "Topic"))
+
+    return app
+
+
+async def call(app, method, path):
+    """One request through the ASGI interface; returns the response body"""
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": [], "server": ("bench", 80),
+        "client": ("bench", 1),
+    }
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def measure(app, method, path, iterations):
+    await call(app, method, path)  # Warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = await call(app, method, path)
+    return (time.perf_counter() - start) / iterations * 1e6, len(body)
+
+
+CASES = [
+    ("roadmap list", "GET", "roadmaps", "roadmaps", lambda n: [raw_roadmap(14) for _ in range(n)], (10, 100, 500)),
+    ("lesson", "GET", "lesson", "lesson", raw_lesson, (4, 16, 64)),
+    ("create roadmap", "POST", "create", "created", created_roadmap, (7, 14, 60)),
+]
+SIZE_UNITS = {"roadmaps": "roadmaps", "lesson": "sections", "created": "days"}
+
+
+async def main(args):
+    app = build_app()
+    print(f"{'case':<16} {'size':>14} {'body':>9} {'before':>10} {'after':>10} {'speedup':>8}")
+    for name, method, path, key, build, sizes in CASES:
+        for size in sizes:
+            payload[key] = build(size)
+            before_us, _ = await measure(app, method, f"/before/{path}", args.iterations)
+            after_us, body_size = await measure(app, method, f"/after/{path}", args.iterations)
+            label = f"{size} {SIZE_UNITS[key]}"
+            print(f"{name:<16} {label:>14} {body_size / 1024:>7.1f}KB {before_us:>8.0f}us "
+                  f"{after_us:>8.0f}us {before_us / after_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,160 @@
+"""
+Benchmark: LLM result cache hit rate across worker processes, per-process
+LRU only vs. LRU + the host-wide SQLite store (no Mongo or LLM needed).
+
+Every worker process replays its own share of one request stream over
+--topics distinct generation keys (skewed: a few popular topics, a long
+tail). A lookup that misses every tier counts as an upstream generation and
+stores a lesson-sized result. With the per-process LRU alone each worker
+generates every key itself, so upstream calls grow with --workers; with the
+shared store they stay close to the number of distinct keys.
+
+Also reports the shared store's read latency, and fills a store capped at
+--evict-max-mb well past its limit to show the file stays bounded.
+
+Usage (from the backend directory):
+    python -m benchmarks.shared_cache --workers 4 --requests 5000 --topics 500
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from app.services.cache_service import LRUCache
+from app.services.shared_store import SharedStore
+from benchmarks.common import percentile
+
+RESULT = {
+    "summary": "Summary " * 20,
+    "lesson": [{"section": f"Section {i}", "content": "Generated lesson content. " * 40} for i in range(4)],
+    "quiz": [{"question": f"Question {i}?", "options": ["a", "b", "c", "d"], "answer": "a"} for i in range(3)],
+}
+MAX_BYTES = 256 * 1024 * 1024
+TTL = 3600
+
+
+def request_stream(topics, requests, seed):
+    """Keys with a skewed popularity: weight 1/rank"""
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, topics + 1)]
+    return [f"lesson-{index}" for index in rng.choices(range(topics), weights, k=requests)]
+
+
+def run_worker(worker, args, path, results):
+    asyncio.run(replay(worker, args, path, results))
+
+
+async def replay(worker, args, path, results):
+    memory = LRUCache(args.memory_entries, TTL)
+    shared = SharedStore(path, MAX_BYTES, TTL) if path else None
+    if shared is not None:
+        await shared.open()
+    keys = request_stream(args.topics, args.requests, seed=worker)
+    generations = 0
+    shared_hits = 0
+    read_ms = []
+
+    for key in keys:
+        if memory.get(key) is not None:
+            continue
+        if shared is not None:
+            start = time.perf_counter()
+            value = shared.get(key)
+            read_ms.append((time.perf_counter() - start) * 1000)
+            if value is not None:
+                shared_hits += 1
+                memory.set(key, value)
+                continue
+        # Upstream LLM call
+        generations += 1
+        memory.set(key, RESULT)
+        if shared is not None:
+            await shared.set(key, RESULT)
+
+    if shared is not None:
+        shared.close()
+    results.put({"generations": generations, "memory_hits": memory.hits, "shared_hits": shared_hits,
+                 "read_ms": read_ms})
+
+
+def run_mode(args, path):
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(worker, args, path, results))
+        for worker in range(args.workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    total = args.workers * args.requests
+    generations = sum(outcome["generations"] for outcome in outcomes)
+    return {
+        "generations": generations,
+        "hit_rate": 1 - generations / total,
+        "shared_hits": sum(outcome["shared_hits"] for outcome in outcomes),
+        "read_ms": [ms for outcome in outcomes for ms in outcome["read_ms"]],
+        "seconds": elapsed,
+    }
+
+
+def eviction_check(args, tmp):
+    """Write 4x the cap into a small store and report its size on disk"""
+    path = os.path.join(tmp, "evict.sqlite3")
+    max_bytes = int(args.evict_max_mb * 1024 * 1024)
+    store = SharedStore(path, max_bytes, TTL)
+
+    async def fill():
+        await store.open()
+        written = 0
+        index = 0
+        while written < max_bytes * 4:
+            await store.set(f"evict-{index}", RESULT)
+            written += len(str(RESULT))
+            index += 1
+        return index
+
+    entries = asyncio.run(fill())
+    stats = store.stats()
+    store.close()
+    on_disk = sum(os.path.getsize(path + suffix) for suffix in ("", "-wal", "-shm") if os.path.exists(path + suffix))
+    print(f"\nEviction: wrote {entries} entries (~{args.evict_max_mb * 4:.0f}MB) into a {args.evict_max_mb:.0f}MB store")
+    print(f"  live entries {stats['entries']}, tracked {stats['bytes'] / 1024 / 1024:.1f}MB, "
+          f"evicted {stats['evictions']}, on disk {on_disk / 1024 / 1024:.1f}MB (db + WAL)")
+
+
+def main(args):
+    print(f"{args.workers} workers x {args.requests} requests over {args.topics} topics "
+          f"(per-process LRU of {args.memory_entries})")
+    with tempfile.TemporaryDirectory() as tmp:
+        local = run_mode(args, None)
+        shared = run_mode(args, os.path.join(tmp, "shared.sqlite3"))
+
+        print(f"\n{'mode':<16} {'generations':>12} {'hit rate':>9} {'shared hits':>12} {'time':>8}")
+        for name, result in (("per-process", local), ("shared store", shared)):
+            print(f"{name:<16} {result['generations']:>12} {result['hit_rate']:>8.1%} "
+                  f"{result['shared_hits']:>12} {result['seconds']:>7.2f}s")
+        print(f"\nUpstream generations: {local['generations'] / max(shared['generations'], 1):.1f}x fewer with the shared store")
+        print(f"Shared store reads: p50 {percentile(shared['read_ms'], 50) * 1000:.0f}us, "
+              f"p99 {percentile(shared['read_ms'], 99) * 1000:.0f}us")
+
+        eviction_check(args, tmp)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per worker")
+    parser.add_argument("--topics", type=int, default=500, help="Distinct generation keys")
+    parser.add_argument("--memory-entries", type=int, default=512, help="Per-process LRU size (LLM_CACHE_MAX_ENTRIES)")
+    parser.add_argument("--evict-max-mb", type=float, default=4)
+    args = parser.parse_args()
+    main(args)
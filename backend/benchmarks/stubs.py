@@ -0,0 +1,174 @@
+"""
+Local stand-ins for the OpenAI and Gemini APIs used by the benchmarks.
+
+Both stubs answer with well-formed canned content after a log-normally
+distributed delay (median `latency` seconds) and fail a configurable fraction
+of requests with 429/500 so retry and fallback paths get exercised.
+"""
+
+import asyncio
+import contextlib
+import json
+import random
+import re
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class StubBehaviour:
+    def __init__(self, latency=0.0, sigma=0.3, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    async def delay(self):
+        if self.latency > 0:
+            await asyncio.sleep(self.random.lognormvariate(0, self.sigma) * self.latency)
+
+    def error_response(self):
+        """Return an error response for a random fraction of calls, else None"""
+        self.calls += 1
+        if self.random.random() >= self.error_rate:
+            return None
+        self.errors += 1
+        status = self.random.choice([429, 500, 503])
+        return JSONResponse(
+            {"error": {"code": status, "message": "stub failure"}},
+            status_code=status,
+            headers={"Retry-After": "1"} if status == 429 else None
+        )
+
+
+def _topic_from_prompt(prompt):
+    match = re.search(r'for "([^"]+)"', prompt) or re.search(r'topic of "([^"]+)"', prompt)
+    return match.group(1) if match else "Stub Topic"
+
+
+def stub_roadmap(topic):
+    return {
+        "topic": topic,
+        "roadmap": [{"day": day, "title": f"{topic} Day {day}"} for day in range(1, 15)],
+    }
+
+
+def stub_lesson(prompt):
+    match = re.search(r'Day (\d+) titled "([^"]*)"', prompt)
+    day, title = (int(match.group(1)), match.group(2)) if match else (1, "Stub Lesson")
+    return {
+        "day": day,
+        "title": title,
+        "summary": f"Stub summary of {title}",
+        "lesson": [
+            {"section": section, "content": f"{section} of {title}. " * 20}
+            for section in ["Introduction", "Key Concepts", "Examples", "Practice", "Summary"]
+        ],
+        "quiz": [
+            {"question": f"Question {n} about {title}?", "options": ["A", "B", "C", "D"], "answer": "B"}
+            for n in range(1, 4)
+        ],
+    }
+
+
+def stub_prequiz(topic):
+    return {
+        "prequiz": [
+            {"question": f"Question {n} about {topic}?", "options": ["A", "B", "C", "D"], "answer": "A"}
+            for n in range(1, 4)
+        ]
+    }
+
+
+def create_gemini_stub(behaviour: StubBehaviour):
+    app = FastAPI()
+
+    @app.post("/v1beta/models/{model_action}")
+    async def generate_content(model_action: str, request: Request):
+        body = await request.json()
+        await behaviour.delay()
+        error = behaviour.error_response()
+        if error:
+            return error
+        prompt = body["contents"][0]["parts"][0]["text"]
+        text = json.dumps(stub_roadmap(_topic_from_prompt(prompt)))
+        return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+    return app
+
+
+def create_openai_stub(behaviour: StubBehaviour):
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        model = body.get("model", "stub")
+        if "pre-quiz" in prompt:
+            content = json.dumps(stub_prequiz(_topic_from_prompt(prompt)))
+        else:
+            content = json.dumps(stub_lesson(prompt))
+
+        if body.get("stream"):
+            error = behaviour.error_response()
+            if error:
+                return error
+            return StreamingResponse(_stream_chunks(behaviour, model, content), media_type="text/event-stream")
+
+        await behaviour.delay()
+        error = behaviour.error_response()
+        if error:
+            return error
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+
+    return app
+
+
+async def _stream_chunks(behaviour, model, content, chunk_size=24):
+    pieces = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+    per_piece = behaviour.latency / max(len(pieces), 1)
+    for piece in pieces:
+        if per_piece:
+            await asyncio.sleep(per_piece)
+        chunk = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@contextlib.asynccontextmanager
+async def serve(app, port):
+    """Run an ASGI app on 127.0.0.1:port for the duration of the block"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await task
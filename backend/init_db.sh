@@ -1,5 +1,6 @@
 #!/bin/bash
 # Initialize DinoLearn database with sample data
+# Usage: ./init_db.sh [topics file] [app.seed options], e.g. ./init_db.sh topics.txt --run launch
 
 # First test API connections
 echo "Testing API connections..."
@@ -18,7 +19,7 @@ fi
 # Initialize database
 echo ""
 echo "Initializing DinoLearn database..."
-python -m app.db_init
+python -m app.seed "$@"
 
 echo ""
 echo "Database initialization complete."
@@ -43,26 +43,13 @@ export default function RoadmapPage() {
         console.log(roadmaps);
         setRoadmap(roadmaps);
 
-        // Generate the daily lessons
-        for (let i = 0; i < 14; i++) {
-          const payload = {
-            day: i,
-            title: roadmaps.title,
-          };
-
-          const res = await fetch(
-            "https://dinobackend-930h.onrender.com/api/roadmaps/generate",
-            {
-              method: "POST",
-              headers: {
-                "Content-Type": "application/json",
-              },
-              body: JSON.stringify(payload),
-            }
-          );
-
-          const data = await res.json();
-        }
+        // Generate all missing daily lessons in one request
+        await fetch(
+          `https://dinobackend-930h.onrender.com/api/roadmaps/${id}/generate`,
+          {
+            method: "POST",
+          }
+        );
       } catch (err) {
         console.error("Error fetching roadmap:", err);
         setError("Failed to load roadmap. " + err.message);